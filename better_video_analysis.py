@@ -6,16 +6,21 @@ Fast slicing with ffmpeg, async uploads, robust retries.
 """
 
 from __future__ import annotations
-import argparse, asyncio, json, logging, os, subprocess, time
+import argparse, asyncio, bisect, json, logging, os, shutil, subprocess, tempfile, time, uuid
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List
+from typing import AsyncIterator, List, Tuple
 
-import cv2
 import dotenv
 import google.generativeai as genai
+from google.api_core import exceptions as gexc
 import tenacity
+from aiolimiter import AsyncLimiter
+try:
+    import orjson
+except ImportError:            # optional speed‑up, stdlib json otherwise
+    orjson = None
 from rich.console import Console       # pretty progress
 from rich.progress import Progress, TimeElapsedColumn, BarColumn
 
@@ -24,6 +29,9 @@ dotenv.load_dotenv()
 API_KEY = os.getenv("GOOGLE_API_KEY")
 genai.configure(api_key=API_KEY)
 console = Console()
+# Slices go to fast scratch storage (tmpfs where available), away from the source
+SLICE_DIR = Path(os.getenv("XDG_RUNTIME_DIR") or tempfile.gettempdir()) / "better_video_analysis"
+CACHE_DIR = Path(os.getenv("XDG_CACHE_HOME", Path.home() / ".cache")) / "better_video_analysis"
 
 # -----------------------------------------------------------------------------#
 @dataclass
@@ -31,20 +39,26 @@ class ModelCfg:
     name: str
     max_minutes: int
     description: str
+    qpm: int = 150             # requests per minute the API key is allowed
 
 MODELS = {
     # Latest stable models (November 2025)
     "pro": ModelCfg("gemini-2.5-pro", 120,
-                    "Most powerful model with adaptive thinking; best for coding & agentic tasks"),
+                    "Most powerful model with adaptive thinking; best for coding & agentic tasks",
+                    qpm=150),
     "flash": ModelCfg("gemini-2.5-flash", 60,
-                      "Stable 2.5 Flash; optimal for large-scale processing & agentic use"),
+                      "Stable 2.5 Flash; optimal for large-scale processing & agentic use",
+                      qpm=1000),
     "flash-lite": ModelCfg("gemini-2.5-flash-lite", 30,
-                           "Fast, low-cost model with optional thinking budget"),
+                           "Fast, low-cost model with optional thinking budget",
+                           qpm=4000),
     # Latest preview models (September 2025) - 50% reduction in output tokens
     "flash-preview": ModelCfg("gemini-2.5-flash-preview-09-2025", 60,
-                              "Preview Flash with 54% SWE-Bench; improved agentic tool use"),
+                              "Preview Flash with 54% SWE-Bench; improved agentic tool use",
+                              qpm=1000),
     "flash-lite-preview": ModelCfg("gemini-2.5-flash-lite-preview-09-2025", 30,
-                                   "Preview Flash-Lite; 50% token reduction, faster"),
+                                   "Preview Flash-Lite; 50% token reduction, faster",
+                                   qpm=4000),
     # Native audio model for voice workflows
     "audio": ModelCfg("gemini-2.5-flash-native-audio-preview-09-2025", 30,
                       "Native audio model for Live API with improved function calling"),
@@ -54,26 +68,109 @@ MODELS = {
 class Segment:
     idx: int
     src: Path
-    start_s: int
-    end_s: int
+    start_s: float
+    end_s: float
     path: Path                 # temporary slice
 
 # ────────────────────────────── ffmpeg utilities ──────────────────────────────
-def slice_with_ffmpeg(src: Path, start_s: int, end_s: int) -> Path:
-    out = src.with_suffix(f".seg{start_s}_{end_s}.mp4")
-    if out.exists():
-        return out
+async def slice_with_ffmpeg(src: Path, start_s: float, end_s: float, audio_only=False,
+                            slice_dir: Path = SLICE_DIR) -> Path:
+    """
+    Cut [start_s, end_s) out of `src` without re-encoding.
+    `-ss` is an input option so ffmpeg seeks at the demuxer level instead of
+    decoding up to the cut; `-t` is the slice duration. With `-c copy` the
+    start snaps to the preceding keyframe.
+    Slices are not cached: each is deleted once uploaded, so every call cuts
+    a fresh, uniquely named file.
+    With `audio_only` the video stream is dropped and the audio re-encoded to
+    16 kHz mono Opus, a small fraction of the mp4's size, for speech-only prompts.
+    """
+    ext = ".ogg" if audio_only else ".mp4"
+    slice_dir.mkdir(parents=True, exist_ok=True)
+    # Unique per call, so concurrent videos with the same name never collide
+    out = slice_dir / f"{src.stem}.{uuid.uuid4().hex[:12]}.seg{start_s}_{end_s}{ext}"
+    if audio_only:
+        codec = ["-vn", "-c:a", "libopus", "-b:a", "24k", "-ac", "1", "-ar", "16000"]
+    else:
+        codec = ["-c", "copy", "-avoid_negative_ts", "1"]
     cmd = [
         "ffmpeg", "-loglevel", "error",
         "-ss", str(timedelta(seconds=start_s)),
-        "-to", str(timedelta(seconds=end_s)),
+        "-t", f"{end_s - start_s:.6f}",
         "-i", str(src),
-        "-c", "copy", "-avoid_negative_ts", "1",
-        str(out),
+        *codec,
+        "-y", str(out),
     ]
-    subprocess.run(cmd, check=True)
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    _, stderr = await proc.communicate()
+    if proc.returncode != 0:
+        out.unlink(missing_ok=True)
+        raise subprocess.CalledProcessError(
+            proc.returncode, cmd, stderr=stderr.decode(errors="replace")
+        )
     return out
 
+def probe_duration(src: Path) -> float:
+    """Container duration in seconds, read from the header by ffprobe."""
+    result = subprocess.run(
+        ["ffprobe", "-v", "error",
+         "-show_entries", "format=duration",
+         "-of", "default=nw=1:nk=1", str(src)],
+        capture_output=True, text=True, check=True,
+    )
+    try:
+        return float(result.stdout)
+    except ValueError:
+        # e.g. "N/A" for streams whose container records no duration
+        raise ValueError(f"ffprobe reported no usable duration for {src}: "
+                         f"{result.stdout.strip()!r}") from None
+
+def probe_keyframes(src: Path) -> List[float]:
+    """PTS (seconds) of every video keyframe, from packet flags (no decoding)."""
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-select_streams", "v:0",
+         "-show_entries", "packet=pts_time,flags",
+         "-of", "csv=p=0", str(src)],
+        capture_output=True, text=True, check=True,
+    )
+    keyframes = []
+    for line in result.stdout.splitlines():
+        pts, _, flags = line.partition(",")
+        if "K" in flags and pts not in ("", "N/A"):
+            keyframes.append(float(pts))
+    return sorted(keyframes)
+
+def segment_bounds(duration_s: float, segment_len: int,
+                   keyframes: List[float]) -> List[Tuple[float, float]]:
+    """
+    Tile [0, duration_s) into ~segment_len windows. Inner boundaries snap to
+    the nearest keyframe, so stream‑copy cuts neither overlap nor leave gaps.
+    """
+    cuts: List[float] = []
+    for nominal in range(segment_len, int(duration_s), segment_len):
+        cut = float(nominal)
+        if keyframes:
+            i = bisect.bisect_left(keyframes, nominal)
+            cut = min(keyframes[max(i - 1, 0):i + 1], key=lambda k: abs(k - nominal))
+        if 0 < cut < duration_s and (not cuts or cut > cuts[-1]):
+            cuts.append(cut)
+    edges = [0.0, *cuts, duration_s]
+    return list(zip(edges, edges[1:]))
+
+def pick_slice_dir(preferred: Path, needed_bytes: int) -> Path:
+    """`preferred` if it can hold `needed_bytes`, else the on‑disk cache dir."""
+    probe = preferred
+    while not probe.exists():
+        probe = probe.parent
+    if shutil.disk_usage(probe).free >= needed_bytes:
+        return preferred
+    logging.warning("%s is low on space; slicing into %s instead", preferred, CACHE_DIR)
+    return CACHE_DIR
+
 # ───────────────────────────── Gemini helpers ────────────────────────────────
 @tenacity.retry(
     wait=tenacity.wait_random_exponential(multiplier=2, max=30),
@@ -81,48 +178,81 @@ def slice_with_ffmpeg(src: Path, start_s: int, end_s: int) -> Path:
     reraise=True,
 )
 def upload_file(path: Path):
-    return genai.upload_file(path=str(path))
+    """Upload a slice; a failed upload is retried from the start"""
+    return genai.upload_file(path=str(path), display_name=path.name)
 
 async def wait_for_file_active(file_obj, max_wait=60):
-    """Wait for uploaded file to become active"""
-    start = time.time()
-    while time.time() - start < max_wait:
-        file = genai.get_file(file_obj.name)
-        if file.state.name == "ACTIVE":
-            return file
-        await asyncio.sleep(1)
-    raise Exception(f"File {file_obj.name} did not become active in {max_wait} seconds")
+    """Wait for uploaded file to become active (exponential backoff, 0.25 s → 4 s)"""
+    loop = asyncio.get_running_loop()
+
+    async def poll():
+        attempt = 0
+        while True:
+            file = await loop.run_in_executor(None, genai.get_file, file_obj.name)
+            if file.state.name == "ACTIVE":
+                return file
+            await asyncio.sleep(min(0.25 * 2 ** attempt, 4.0))
+            attempt += 1
+
+    try:
+        return await asyncio.wait_for(poll(), timeout=max_wait)
+    except asyncio.TimeoutError:
+        raise Exception(
+            f"File {file_obj.name} did not become active in {max_wait} seconds"
+        ) from None
+
+# Only transient failures are worth retrying; anything else is a bug or a bad request
+RETRYABLE = (
+    gexc.ResourceExhausted,
+    gexc.ServiceUnavailable,
+    gexc.DeadlineExceeded,
+    asyncio.TimeoutError,
+)
 
 @tenacity.retry(
-    wait=tenacity.wait_random_exponential(multiplier=2, max=30),
-    stop=tenacity.stop_after_attempt(3),
+    retry=tenacity.retry_if_exception_type(RETRYABLE),
+    wait=tenacity.wait_exponential_jitter(initial=2, max=60, jitter=2),
+    stop=tenacity.stop_after_attempt(6),
     reraise=True,
 )
-async def generate_content_with_retry(model, file_obj, prompt):
-    """Generate content with retry logic"""
+async def generate_content_with_retry(model, file_obj, prompt, limiter=None, timeout=120):
+    """Generate content with retry logic, waiting on `limiter` before each attempt"""
     loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(
-        None, lambda: model.generate_content([file_obj, prompt]).text
+    if limiter is not None:
+        await limiter.acquire()
+    return await asyncio.wait_for(
+        loop.run_in_executor(
+            None, lambda: model.generate_content([file_obj, prompt]).text
+        ),
+        timeout=timeout,
     )
 
-async def analyse_segment(model, seg: Segment, prompt: str) -> dict:
+async def analyse_segment(model, seg: Segment, prompt: str, limiter=None,
+                          cleanup: list | None = None) -> dict:
+    """
+    Upload, analyse and delete one segment. When `cleanup` is given the
+    server‑side delete is only scheduled and its future appended there,
+    so the caller can await all deletes together.
+    """
     loop = asyncio.get_running_loop()
     
-    # Upload file
+    # Upload file; Gemini now holds the bytes, so the local slice can go
     file_obj = await loop.run_in_executor(None, upload_file, seg.path)
+    seg.path.unlink(missing_ok=True)
     
     # Wait for file to become active
     active_file = await wait_for_file_active(file_obj)
     
     try:
         # Generate content with retry
-        content = await generate_content_with_retry(model, active_file, prompt)
+        content = await generate_content_with_retry(model, active_file, prompt, limiter)
     finally:
-        # Clean up
-        try:
-            genai.delete_file(active_file.name)
-        except:
-            pass
+        # Clean up off the event loop; failures here are not worth surfacing
+        delete = loop.run_in_executor(None, genai.delete_file, active_file.name)
+        if cleanup is not None:
+            cleanup.append(delete)
+        else:
+            await asyncio.gather(delete, return_exceptions=True)
     
     return {
         "segment": seg.idx,
@@ -131,39 +261,84 @@ async def analyse_segment(model, seg: Segment, prompt: str) -> dict:
     }
 
 # ─────────────────────────────── Main analyser ────────────────────────────────
+def make_progress() -> Progress:
+    return Progress("[progress.description]{task.description}",
+                    BarColumn(),
+                    TimeElapsedColumn(),
+                    console=console)
+
 class VideoAnalyser:
-    def __init__(self, model_key: str, segment_len: int, verbose: bool):
+    def __init__(self, model_key: str, segment_len: int, verbose: bool,
+                 concurrency: int = 4, audio_only: bool = False,
+                 tmpdir: Path = SLICE_DIR):
         self.cfg = MODELS[model_key]
         self.segment_len = segment_len * 60          # to seconds
+        self.audio_only = audio_only
+        self.tmpdir = tmpdir
+        self.sem = asyncio.Semaphore(concurrency)    # in‑flight Gemini segments
+        # Shared token bucket: hold calls back before the API has to 429 them
+        self.limiter = AsyncLimiter(int(os.getenv("GEMINI_QPM", self.cfg.qpm)), 60)
         self.model = genai.GenerativeModel(self.cfg.name)
         logging.info("Using model %s (%s)", self.cfg.name, self.cfg.description)
 
-    def split(self, video: Path) -> List[Segment]:
-        cap = cv2.VideoCapture(str(video))
-        fps = cap.get(cv2.CAP_PROP_FPS) or 30
-        total_frames = cap.get(cv2.CAP_PROP_FRAME_COUNT)
-        duration_s = int(total_frames / fps)
-        cap.release()
-
-        segments: List[Segment] = []
-        for i, start in enumerate(range(0, duration_s, self.segment_len), 1):
-            end = min(start + self.segment_len, duration_s)
-            seg_path = slice_with_ffmpeg(video, start, end)
-            segments.append(Segment(i, video, start, end, seg_path))
-        return segments
-
-    async def run(self, video: Path, prompt: str) -> List[dict]:
-        segments = self.split(video)
-        tasks = [analyse_segment(self.model, s, prompt) for s in segments]
+    async def split(self, video: Path) -> AsyncIterator[Segment]:
+        """Yield segments as soon as their slice is on disk (not in index order)."""
+        loop = asyncio.get_running_loop()
+        duration_s = await loop.run_in_executor(None, probe_duration, video)
+        # Re‑encoded audio can be cut anywhere; stream copy must cut on keyframes
+        keyframes = [] if self.audio_only else await loop.run_in_executor(
+            None, probe_keyframes, video
+        )
+        # Need room for at least one full‑length segment in the scratch dir
+        seg_bytes = video.stat().st_size * min(1.0, self.segment_len / max(duration_s, 1))
+        slice_dir = pick_slice_dir(self.tmpdir, int(seg_bytes))
+
+        # Each slice is an independent ffmpeg process; run them side by side,
+        # capped at one per CPU so the disk isn't thrashed.
+        sem = asyncio.Semaphore(os.cpu_count() or 4)
+
+        async def make_segment(i: int, start: float, end: float) -> Segment:
+            async with sem:
+                seg_path = await slice_with_ffmpeg(
+                    video, start, end, self.audio_only, slice_dir
+                )
+            return Segment(i, video, start, end, seg_path)
+
+        pending = [
+            asyncio.create_task(make_segment(i, start, end))
+            for i, (start, end) in enumerate(
+                segment_bounds(duration_s, self.segment_len, keyframes), 1)
+        ]
+        try:
+            for fut in asyncio.as_completed(pending):
+                yield await fut
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def run(self, video: Path, prompt: str,
+                  progress: Progress | None = None) -> List[dict]:
+        if progress is None:
+            with make_progress() as progress:
+                return await self.run(video, prompt, progress)
+
+        async def analyse_with_limit(seg: Segment) -> dict:
+            async with self.sem:
+                return await analyse_segment(self.model, seg, prompt,
+                                             self.limiter, cleanup)
+
+        # Segment N is uploaded/analysed while later slices are still cut
+        tasks = []
         results = []
-        with Progress("[progress.description]{task.description}",
-                      BarColumn(),
-                      TimeElapsedColumn(),
-                      console=console) as progress:
-            t = progress.add_task(f"Analysing {video.name}", total=len(tasks))
-            for coro in asyncio.as_completed(tasks):
-                results.append(await coro)
-                progress.update(t, advance=1)
+        cleanup: list = []
+        t = progress.add_task(f"Analysing {video.name}", total=None)
+        async for seg in self.split(video):
+            tasks.append(asyncio.create_task(analyse_with_limit(seg)))
+            progress.update(t, total=len(tasks))
+        for coro in asyncio.as_completed(tasks):
+            results.append(await coro)
+            progress.update(t, advance=1)
+        await asyncio.gather(*cleanup, return_exceptions=True)
         return results
 
 # ──────────────────────────────── CLI entrypoint ─────────────────────────────―
@@ -176,23 +351,45 @@ def cli():
     ap.add_argument("--prompt_file", type=Path, required=True,
                     help="txt/‑md prompt file to send for each segment")
     ap.add_argument("-o", "--outdir", type=Path, default=Path("./output"))
+    ap.add_argument("-c", "--concurrency", type=int,
+                    default=int(os.getenv("GEMINI_CONCURRENCY", "4")),
+                    help="max segments uploaded/analysed at once")
+    ap.add_argument("--audio-only", action="store_true",
+                    help="upload only the audio track (for speech-only prompts)")
+    ap.add_argument("--tmpdir", type=Path, default=SLICE_DIR,
+                    help="scratch directory for segment slices")
     args = ap.parse_args()
 
     logging.basicConfig(level=logging.INFO,
                         format="%(asctime)s | %(levelname)s | %(message)s")
-    analyser = VideoAnalyser(args.model, args.segment, verbose=True)
+    analyser = VideoAnalyser(args.model, args.segment, verbose=True,
+                             concurrency=args.concurrency,
+                             audio_only=args.audio_only,
+                             tmpdir=args.tmpdir)
     prompt = args.prompt_file.read_text()
 
     args.outdir.mkdir(exist_ok=True)
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-
-    for vid in args.videos:
-        start = time.time()
-        results = loop.run_until_complete(analyser.run(vid, prompt))
-        out = args.outdir / f"{vid.stem}__{datetime.now():%Y%m%d%H%M}.json"
-        out.write_text(json.dumps(results, indent=2))
-        logging.info("Finished %s in %.1f s ↗ %s", vid.name, time.time()-start, out)
+
+    async def process_all():
+        # Videos overlap each other's slicing/upload; segment concurrency is
+        # still capped globally by the analyser's semaphore.
+        video_sem = asyncio.Semaphore(min(len(args.videos), 4))
+
+        async def process(vid: Path):
+            async with video_sem:
+                start = time.time()
+                results = await analyser.run(vid, prompt, progress)
+                out = args.outdir / f"{vid.stem}__{datetime.now():%Y%m%d%H%M}.json"
+                if orjson is not None:
+                    out.write_bytes(orjson.dumps(results, option=orjson.OPT_INDENT_2))
+                else:
+                    out.write_text(json.dumps(results, indent=2))
+                logging.info("Finished %s in %.1f s ↗ %s", vid.name, time.time()-start, out)
+
+        with make_progress() as progress:
+            await asyncio.gather(*(process(vid) for vid in args.videos))
+
+    asyncio.run(process_all())
 
 if __name__ == "__main__":
     cli()
\ No newline at end of file
@@ -9,17 +9,181 @@ Updated: November 2025
 """
 
 from __future__ import annotations
+import copy
+import functools
+import itertools
 import json
+import os
+import secrets
 import uuid
-from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import TYPE_CHECKING, Callable, Dict, List, Any, Optional, Tuple
 from enum import Enum
 
-from n8n_workflow_generator import (
-    N8NWorkflow, N8NNode, NodeType, WorkflowGenerator
-)
+try:
+    import orjson
+except ImportError:  # optional speed-up, stdlib json otherwise
+    orjson = None
+
+if TYPE_CHECKING:
+    from n8n_workflow_generator import N8NWorkflow, WorkflowGenerator
+
+
+@functools.lru_cache(maxsize=None)
+def _node_tables():
+    """
+    Node-type lookup tables used by AgentWorkflowBuilder, built on first use
+    so that importing this module (e.g. just to list templates) doesn't load
+    n8n_workflow_generator.
+
+    Returns (triggers, llms, integrations): llms maps model-id prefixes,
+    checked in order, to LLM node types; integration keys are lowercase.
+    """
+    from n8n_workflow_generator import NodeType
+
+    triggers = {
+        "webhook": NodeType.TRIGGER_WEBHOOK.value,
+        "email_received": NodeType.TRIGGER_WEBHOOK.value,
+        "schedule": NodeType.TRIGGER_SCHEDULE.value,
+        "manual": NodeType.TRIGGER_MANUAL.value,
+        "calendar_event": NodeType.TRIGGER_WEBHOOK.value,
+        "file_upload": NodeType.TRIGGER_WEBHOOK.value,
+        "message_received": NodeType.TRIGGER_WEBHOOK.value,
+    }
+    llms = (
+        ("gemini-", NodeType.AI_GOOGLE.value),
+        ("gpt-", NodeType.AI_OPENAI.value),
+        ("openai", NodeType.AI_OPENAI.value),
+        ("claude-", NodeType.AI_ANTHROPIC.value),
+        ("anthropic", NodeType.AI_ANTHROPIC.value),
+    )
+    integrations = {
+        "gmail": NodeType.GMAIL.value,
+        "outlook": NodeType.OUTLOOK.value,
+        "microsoft outlook": NodeType.OUTLOOK.value,
+        "slack": NodeType.SLACK.value,
+        "teams": NodeType.TEAMS.value,
+        "microsoft teams": NodeType.TEAMS.value,
+        "google sheets": NodeType.SHEETS.value,
+        "excel": NodeType.EXCEL.value,
+        "microsoft excel": NodeType.EXCEL.value,
+        "zoho": NodeType.ZOHO_CRM.value,
+        "zoho crm": NodeType.ZOHO_CRM.value,
+        "notion": NodeType.NOTION.value,
+    }
+    return triggers, llms, integrations
+
+
+def _dump_json(obj: Any) -> bytes:
+    """Pretty-printed JSON as UTF-8 bytes, via orjson when installed"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2).encode()
+
+
+# x coordinate of each layout column (250 px start, 280 px spacing)
+_POS_COLS = tuple(250 + 280 * i for i in range(8))
+
+# Node ids only need to be unique within a workflow: a per-process random
+# prefix plus a counter is far cheaper than uuid4 per node
+_NODE_ID_PREFIX = secrets.token_hex(8)
+_node_counter = itertools.count()
+
+
+def _new_node_id() -> str:
+    return f"{_NODE_ID_PREFIX}-{next(_node_counter):08x}"
+
+
+@functools.lru_cache(maxsize=None)
+def _json_list(items: tuple) -> str:
+    """JSON array literal for the generated JS; cached since configs are static"""
+    return json.dumps(list(items))
+
+
+# Code-node JS; placeholders are filled from _js_subs(config)
+_INPUT_JS_TEMPLATE = """// Input processor for {agent_name}
+const items = $input.all();
+const results = [];
+
+for (const item of items) {{
+  const data = item.json;
+
+  // Prepare input for AI agent
+  const processed = {{
+    input: data,
+    timestamp: new Date().toISOString(),
+    sessionId: data.sessionId || $execution.id,
+    context: {{
+      agentType: '{agent_type}',
+      tools: {tools_json},
+      integrations: {integrations_json}
+    }}
+  }};
+
+  results.push({{ json: processed }});
+}}
+
+return results;
+"""
+
+_OUTPUT_JS_TEMPLATE = """// Output processor for {agent_name}
+const items = $input.all();
+const results = [];
+
+for (const item of items) {{
+  const agentOutput = item.json;
+
+{parse_response}
+
+  const structured = {{
+    agentType: '{agent_type}',
+    agentName: '{agent_name}',
+    timestamp: new Date().toISOString(),
+    executionId: $execution.id,
+    response: parsed,
+    metadata: {{
+      model: '{llm_model}',
+      temperature: {temperature}
+    }}
+  }};
+
+  results.push({{ json: structured }});
+}}
+
+return results;
+"""
+
+
+# Response handling spliced into _OUTPUT_JS_TEMPLATE, chosen by config.expects_json
+_PARSE_JSON_JS = """  // Parse and structure agent response
+  let parsed;
+  try {
+    parsed = typeof agentOutput.output === 'string'
+      ? JSON.parse(agentOutput.output)
+      : agentOutput.output || agentOutput;
+  } catch (e) {
+    parsed = { raw: agentOutput.output || agentOutput };
+  }"""
+
+_PASS_TEXT_JS = """  // Agent replies in prose; wrap it without attempting JSON.parse
+  const parsed = { raw: agentOutput.output || agentOutput };"""
+
+
+@functools.lru_cache(maxsize=None)
+def _js_subs(config: AgentConfig) -> Dict[str, Any]:
+    """Placeholder values for the JS templates, computed once per config"""
+    return {
+        "agent_name": config.name,
+        "agent_type": config.template.value,
+        "tools_json": _json_list(config.tools),
+        "integrations_json": _json_list(config.integrations),
+        "llm_model": config.llm_model,
+        "temperature": config.temperature,
+        "parse_response": _PARSE_JSON_JS if config.expects_json else _PASS_TEXT_JS,
+    }
 
 
 class AgentTemplate(Enum):
@@ -36,30 +200,55 @@ class AgentTemplate(Enum):
     MULTI_AGENT_ORCHESTRATOR = "multi_agent_orchestrator"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class AgentConfig:
-    """Configuration for an agent template"""
+    """Configuration for an agent template (immutable and hashable)"""
     name: str
     description: str
     template: AgentTemplate
     system_prompt: str
-    tools: List[str] = field(default_factory=list)
-    integrations: List[str] = field(default_factory=list)
-    triggers: List[str] = field(default_factory=list)
+    tools: Tuple[str, ...] = ()
+    integrations: Tuple[str, ...] = ()
+    triggers: Tuple[str, ...] = ()
     llm_model: str = "gemini-2.5-flash"
     temperature: float = 0.7
     max_iterations: int = 10
+    expects_json: bool = True  # False for agents that answer in prose
+
+    def __post_init__(self):
+        # Accept lists from callers but store tuples so the config stays hashable
+        for name in ("tools", "integrations", "triggers"):
+            value = getattr(self, name)
+            if not isinstance(value, tuple):
+                object.__setattr__(self, name, tuple(value))
+
+
+@functools.lru_cache(maxsize=None)
+def _cached_config_dict(config: AgentConfig) -> Dict[str, Any]:
+    """Shared by every caller, don't mutate; use _config_to_dict"""
+    return {
+        "name": config.name,
+        "description": config.description,
+        "template": config.template.value,
+        "system_prompt": config.system_prompt,
+        "tools": list(config.tools),
+        "integrations": list(config.integrations),
+        "triggers": list(config.triggers),
+        "llm_model": config.llm_model,
+        "temperature": config.temperature,
+        "max_iterations": config.max_iterations,
+        "expects_json": config.expects_json,
+    }
 
 
-class AgentTemplateLibrary:
-    """Library of pre-built agent templates for EVA"""
+def _config_to_dict(config: AgentConfig) -> Dict[str, Any]:
+    """Plain JSON-ready dict for the manifest (enum stored by value)"""
+    return copy.deepcopy(_cached_config_dict(config))
 
-    TEMPLATES: Dict[AgentTemplate, AgentConfig] = {
-        AgentTemplate.EMAIL_TRIAGE: AgentConfig(
-            name="Email Triage Agent",
-            description="Automatically categorizes, prioritizes, and routes incoming emails",
-            template=AgentTemplate.EMAIL_TRIAGE,
-            system_prompt="""You are an Email Triage Agent for an executive assistant system.
+
+# Per-template system prompts and config factories; a config is only built
+# when its template is first requested.
+_EMAIL_TRIAGE_PROMPT = """You are an Email Triage Agent for an executive assistant system.
 
 Your responsibilities:
 1. CATEGORIZE emails into: Urgent, Important, Informational, Spam, Personal
@@ -81,19 +270,24 @@ Always consider:
 - Time-sensitive content requires immediate flagging
 - Legal or financial matters need special attention
 - Personal matters should be marked for private review
-""",
-            tools=["email_search", "calendar_check", "contact_lookup"],
-            integrations=["Microsoft Outlook", "Gmail", "Slack"],
-            triggers=["email_received", "schedule"],
-            llm_model="gemini-2.5-flash",
-            temperature=0.3
-        ),
-
-        AgentTemplate.CRM_DATA_SYNC: AgentConfig(
-            name="CRM Data Sync Agent",
-            description="Synchronizes data between CRM systems and other tools",
-            template=AgentTemplate.CRM_DATA_SYNC,
-            system_prompt="""You are a CRM Data Synchronization Agent.
+"""
+
+
+def _make_email_triage() -> AgentConfig:
+    return AgentConfig(
+        name="Email Triage Agent",
+        description="Automatically categorizes, prioritizes, and routes incoming emails",
+        template=AgentTemplate.EMAIL_TRIAGE,
+        system_prompt=_EMAIL_TRIAGE_PROMPT,
+        tools=("email_search", "calendar_check", "contact_lookup"),
+        integrations=("Microsoft Outlook", "Gmail", "Slack"),
+        triggers=("email_received", "schedule"),
+        llm_model="gemini-2.5-flash",
+        temperature=0.3
+    )
+
+
+_CRM_DATA_SYNC_PROMPT = """You are a CRM Data Synchronization Agent.
 
 Your responsibilities:
 1. MONITOR data changes across connected systems
@@ -116,19 +310,24 @@ For each sync operation, provide:
 - conflicts_found: Any data conflicts
 - resolution: How conflicts were resolved
 - next_sync: Recommended next sync time
-""",
-            tools=["crm_api", "data_validator", "conflict_resolver"],
-            integrations=["Zoho CRM", "Salesforce", "HubSpot", "Google Sheets"],
-            triggers=["webhook", "schedule"],
-            llm_model="gemini-2.5-flash",
-            temperature=0.2
-        ),
-
-        AgentTemplate.CALENDAR_ASSISTANT: AgentConfig(
-            name="Calendar Assistant Agent",
-            description="Manages scheduling, meeting prep, and calendar optimization",
-            template=AgentTemplate.CALENDAR_ASSISTANT,
-            system_prompt="""You are a Calendar Management Agent for executive scheduling.
+"""
+
+
+def _make_crm_data_sync() -> AgentConfig:
+    return AgentConfig(
+        name="CRM Data Sync Agent",
+        description="Synchronizes data between CRM systems and other tools",
+        template=AgentTemplate.CRM_DATA_SYNC,
+        system_prompt=_CRM_DATA_SYNC_PROMPT,
+        tools=("crm_api", "data_validator", "conflict_resolver"),
+        integrations=("Zoho CRM", "Salesforce", "HubSpot", "Google Sheets"),
+        triggers=("webhook", "schedule"),
+        llm_model="gemini-2.5-flash",
+        temperature=0.2
+    )
+
+
+_CALENDAR_ASSISTANT_PROMPT = """You are a Calendar Management Agent for executive scheduling.
 
 Your responsibilities:
 1. OPTIMIZE calendar for productivity (focus blocks, meeting batching)
@@ -151,19 +350,24 @@ For each scheduling action, provide:
 - conflicts: Any detected conflicts
 - preparation: Meeting prep materials needed
 - follow_up: Post-meeting actions required
-""",
-            tools=["calendar_api", "contact_lookup", "document_search"],
-            integrations=["Google Calendar", "Microsoft Outlook", "Zoom", "Teams"],
-            triggers=["email_received", "calendar_event", "manual"],
-            llm_model="gemini-2.5-flash",
-            temperature=0.5
-        ),
-
-        AgentTemplate.DOCUMENT_PROCESSOR: AgentConfig(
-            name="Document Processor Agent",
-            description="Processes, analyzes, and routes documents intelligently",
-            template=AgentTemplate.DOCUMENT_PROCESSOR,
-            system_prompt="""You are a Document Processing Agent.
+"""
+
+
+def _make_calendar_assistant() -> AgentConfig:
+    return AgentConfig(
+        name="Calendar Assistant Agent",
+        description="Manages scheduling, meeting prep, and calendar optimization",
+        template=AgentTemplate.CALENDAR_ASSISTANT,
+        system_prompt=_CALENDAR_ASSISTANT_PROMPT,
+        tools=("calendar_api", "contact_lookup", "document_search"),
+        integrations=("Google Calendar", "Microsoft Outlook", "Zoom", "Teams"),
+        triggers=("email_received", "calendar_event", "manual"),
+        llm_model="gemini-2.5-flash",
+        temperature=0.5
+    )
+
+
+_DOCUMENT_PROCESSOR_PROMPT = """You are a Document Processing Agent.
 
 Your responsibilities:
 1. CLASSIFY documents by type and department
@@ -186,19 +390,24 @@ For each document, provide:
 - routing: Where to send next
 - tags: Indexing keywords
 - expiration: If applicable
-""",
-            tools=["ocr_processor", "pdf_parser", "data_extractor"],
-            integrations=["Google Drive", "Dropbox", "SharePoint", "Notion"],
-            triggers=["file_upload", "email_attachment", "webhook"],
-            llm_model="gemini-2.5-pro",
-            temperature=0.3
-        ),
-
-        AgentTemplate.COMMUNICATION_ROUTER: AgentConfig(
-            name="Communication Router Agent",
-            description="Routes communications to the right channels and people",
-            template=AgentTemplate.COMMUNICATION_ROUTER,
-            system_prompt="""You are a Communication Routing Agent.
+"""
+
+
+def _make_document_processor() -> AgentConfig:
+    return AgentConfig(
+        name="Document Processor Agent",
+        description="Processes, analyzes, and routes documents intelligently",
+        template=AgentTemplate.DOCUMENT_PROCESSOR,
+        system_prompt=_DOCUMENT_PROCESSOR_PROMPT,
+        tools=("ocr_processor", "pdf_parser", "data_extractor"),
+        integrations=("Google Drive", "Dropbox", "SharePoint", "Notion"),
+        triggers=("file_upload", "email_attachment", "webhook"),
+        llm_model="gemini-2.5-pro",
+        temperature=0.3
+    )
+
+
+_COMMUNICATION_ROUTER_PROMPT = """You are a Communication Routing Agent.
 
 Your responsibilities:
 1. ANALYZE incoming communications across all channels
@@ -220,19 +429,24 @@ For each communication, provide:
 - urgency: low/medium/high/critical
 - context: Relevant background info
 - sla: Expected response time
-""",
-            tools=["channel_api", "contact_directory", "escalation_rules"],
-            integrations=["Slack", "Teams", "Email", "SMS", "Voice"],
-            triggers=["message_received", "call_completed"],
-            llm_model="gemini-2.5-flash",
-            temperature=0.4
-        ),
-
-        AgentTemplate.REPORT_GENERATOR: AgentConfig(
-            name="Report Generator Agent",
-            description="Automatically generates reports from various data sources",
-            template=AgentTemplate.REPORT_GENERATOR,
-            system_prompt="""You are a Report Generation Agent.
+"""
+
+
+def _make_communication_router() -> AgentConfig:
+    return AgentConfig(
+        name="Communication Router Agent",
+        description="Routes communications to the right channels and people",
+        template=AgentTemplate.COMMUNICATION_ROUTER,
+        system_prompt=_COMMUNICATION_ROUTER_PROMPT,
+        tools=("channel_api", "contact_directory", "escalation_rules"),
+        integrations=("Slack", "Teams", "Email", "SMS", "Voice"),
+        triggers=("message_received", "call_completed"),
+        llm_model="gemini-2.5-flash",
+        temperature=0.4
+    )
+
+
+_REPORT_GENERATOR_PROMPT = """You are a Report Generation Agent.
 
 Your responsibilities:
 1. AGGREGATE data from multiple sources
@@ -255,19 +469,25 @@ For each report, provide:
 - insights: Key findings
 - recommendations: Suggested actions
 - distribution: Who receives this
-""",
-            tools=["data_aggregator", "chart_generator", "pdf_creator"],
-            integrations=["Google Sheets", "Excel", "Tableau", "Power BI"],
-            triggers=["schedule", "manual", "data_threshold"],
-            llm_model="gemini-2.5-pro",
-            temperature=0.5
-        ),
-
-        AgentTemplate.LEAD_QUALIFIER: AgentConfig(
-            name="Lead Qualifier Agent",
-            description="Qualifies and scores leads for sales team",
-            template=AgentTemplate.LEAD_QUALIFIER,
-            system_prompt="""You are a Lead Qualification Agent.
+"""
+
+
+def _make_report_generator() -> AgentConfig:
+    return AgentConfig(
+        name="Report Generator Agent",
+        description="Automatically generates reports from various data sources",
+        template=AgentTemplate.REPORT_GENERATOR,
+        system_prompt=_REPORT_GENERATOR_PROMPT,
+        tools=("data_aggregator", "chart_generator", "pdf_creator"),
+        integrations=("Google Sheets", "Excel", "Tableau", "Power BI"),
+        triggers=("schedule", "manual", "data_threshold"),
+        llm_model="gemini-2.5-pro",
+        temperature=0.5,
+        expects_json=False
+    )
+
+
+_LEAD_QUALIFIER_PROMPT = """You are a Lead Qualification Agent.
 
 Your responsibilities:
 1. SCORE leads based on defined criteria
@@ -290,19 +510,24 @@ For each lead, provide:
 - recommended_action: Next step
 - assigned_rep: Sales rep assignment
 - nurture_sequence: If applicable
-""",
-            tools=["crm_api", "enrichment_api", "email_sequences"],
-            integrations=["Zoho CRM", "Salesforce", "LinkedIn", "Clearbit"],
-            triggers=["new_lead", "lead_activity", "score_threshold"],
-            llm_model="gemini-2.5-flash",
-            temperature=0.4
-        ),
-
-        AgentTemplate.TASK_MANAGER: AgentConfig(
-            name="Task Manager Agent",
-            description="Creates, assigns, and tracks tasks from various inputs",
-            template=AgentTemplate.TASK_MANAGER,
-            system_prompt="""You are a Task Management Agent.
+"""
+
+
+def _make_lead_qualifier() -> AgentConfig:
+    return AgentConfig(
+        name="Lead Qualifier Agent",
+        description="Qualifies and scores leads for sales team",
+        template=AgentTemplate.LEAD_QUALIFIER,
+        system_prompt=_LEAD_QUALIFIER_PROMPT,
+        tools=("crm_api", "enrichment_api", "email_sequences"),
+        integrations=("Zoho CRM", "Salesforce", "LinkedIn", "Clearbit"),
+        triggers=("new_lead", "lead_activity", "score_threshold"),
+        llm_model="gemini-2.5-flash",
+        temperature=0.4
+    )
+
+
+_TASK_MANAGER_PROMPT = """You are a Task Management Agent.
 
 Your responsibilities:
 1. EXTRACT tasks from emails, meetings, and conversations
@@ -327,19 +552,24 @@ For each task, provide:
 - priority: P1/P2/P3/P4
 - dependencies: Blocking tasks
 - project: Related project
-""",
-            tools=["task_api", "notification_sender", "calendar_blocker"],
-            integrations=["Asana", "Monday", "Jira", "Notion", "Todoist"],
-            triggers=["email_received", "meeting_ended", "manual"],
-            llm_model="gemini-2.5-flash",
-            temperature=0.5
-        ),
-
-        AgentTemplate.VOICE_ASSISTANT: AgentConfig(
-            name="Voice Assistant Agent",
-            description="Handles voice interactions and call management",
-            template=AgentTemplate.VOICE_ASSISTANT,
-            system_prompt="""You are a Voice Assistant Agent for call handling.
+"""
+
+
+def _make_task_manager() -> AgentConfig:
+    return AgentConfig(
+        name="Task Manager Agent",
+        description="Creates, assigns, and tracks tasks from various inputs",
+        template=AgentTemplate.TASK_MANAGER,
+        system_prompt=_TASK_MANAGER_PROMPT,
+        tools=("task_api", "notification_sender", "calendar_blocker"),
+        integrations=("Asana", "Monday", "Jira", "Notion", "Todoist"),
+        triggers=("email_received", "meeting_ended", "manual"),
+        llm_model="gemini-2.5-flash",
+        temperature=0.5
+    )
+
+
+_VOICE_ASSISTANT_PROMPT = """You are a Voice Assistant Agent for call handling.
 
 Your responsibilities:
 1. TRANSCRIBE and analyze voice calls
@@ -362,19 +592,25 @@ For each call, provide:
 - resolution: How it was handled
 - follow_up: Next steps needed
 - sentiment: Caller satisfaction
-""",
-            tools=["speech_to_text", "text_to_speech", "call_routing"],
-            integrations=["Twilio", "JustCall", "Zoom Phone", "Teams Voice"],
-            triggers=["incoming_call", "voicemail", "scheduled_call"],
-            llm_model="gemini-2.5-flash-native-audio-preview-09-2025",
-            temperature=0.6
-        ),
-
-        AgentTemplate.MULTI_AGENT_ORCHESTRATOR: AgentConfig(
-            name="Multi-Agent Orchestrator",
-            description="Coordinates multiple agents for complex workflows",
-            template=AgentTemplate.MULTI_AGENT_ORCHESTRATOR,
-            system_prompt="""You are a Multi-Agent Orchestrator.
+"""
+
+
+def _make_voice_assistant() -> AgentConfig:
+    return AgentConfig(
+        name="Voice Assistant Agent",
+        description="Handles voice interactions and call management",
+        template=AgentTemplate.VOICE_ASSISTANT,
+        system_prompt=_VOICE_ASSISTANT_PROMPT,
+        tools=("speech_to_text", "text_to_speech", "call_routing"),
+        integrations=("Twilio", "JustCall", "Zoom Phone", "Teams Voice"),
+        triggers=("incoming_call", "voicemail", "scheduled_call"),
+        llm_model="gemini-2.5-flash-native-audio-preview-09-2025",
+        temperature=0.6,
+        expects_json=False
+    )
+
+
+_MULTI_AGENT_ORCHESTRATOR_PROMPT = """You are a Multi-Agent Orchestrator.
 
 Your responsibilities:
 1. ANALYZE incoming requests for complexity
@@ -398,56 +634,138 @@ For each orchestration, provide:
 - execution_order: Parallel vs sequential
 - aggregation_logic: How to combine results
 - fallback_plan: Error handling approach
-""",
-            tools=["agent_invoker", "workflow_executor", "state_manager"],
-            integrations=["All connected integrations"],
-            triggers=["complex_request", "escalation", "manual"],
-            llm_model="gemini-2.5-pro",
-            temperature=0.5,
-            max_iterations=20
-        ),
+"""
+
+
+def _make_multi_agent_orchestrator() -> AgentConfig:
+    return AgentConfig(
+        name="Multi-Agent Orchestrator",
+        description="Coordinates multiple agents for complex workflows",
+        template=AgentTemplate.MULTI_AGENT_ORCHESTRATOR,
+        system_prompt=_MULTI_AGENT_ORCHESTRATOR_PROMPT,
+        tools=("agent_invoker", "workflow_executor", "state_manager"),
+        integrations=("All connected integrations",),
+        triggers=("complex_request", "escalation", "manual"),
+        llm_model="gemini-2.5-pro",
+        temperature=0.5,
+        max_iterations=20
+    )
+
+
+
+class AgentTemplateLibrary:
+    """Library of pre-built agent templates for EVA"""
+
+    TEMPLATES: Dict[AgentTemplate, Callable[[], AgentConfig]] = {
+        AgentTemplate.EMAIL_TRIAGE: _make_email_triage,
+        AgentTemplate.CRM_DATA_SYNC: _make_crm_data_sync,
+        AgentTemplate.CALENDAR_ASSISTANT: _make_calendar_assistant,
+        AgentTemplate.DOCUMENT_PROCESSOR: _make_document_processor,
+        AgentTemplate.COMMUNICATION_ROUTER: _make_communication_router,
+        AgentTemplate.REPORT_GENERATOR: _make_report_generator,
+        AgentTemplate.LEAD_QUALIFIER: _make_lead_qualifier,
+        AgentTemplate.TASK_MANAGER: _make_task_manager,
+        AgentTemplate.VOICE_ASSISTANT: _make_voice_assistant,
+        AgentTemplate.MULTI_AGENT_ORCHESTRATOR: _make_multi_agent_orchestrator,
     }
 
+    _cache: Dict[AgentTemplate, AgentConfig] = {}
+    _list_cache: Optional[List[Dict[str, str]]] = None
+
     @classmethod
     def get_template(cls, template: AgentTemplate) -> AgentConfig:
-        """Get agent configuration for a template"""
-        return cls.TEMPLATES[template]
+        """Get agent configuration for a template (built once, on first use)"""
+        config = cls._cache.get(template)
+        if config is None:
+            config = cls._cache[template] = cls.TEMPLATES[template]()
+        return config
 
     @classmethod
     def list_templates(cls) -> List[Dict[str, str]]:
-        """List all available templates"""
-        return [
-            {
-                "id": t.value,
-                "name": cls.TEMPLATES[t].name,
-                "description": cls.TEMPLATES[t].description
-            }
-            for t in AgentTemplate
-        ]
+        """List all available templates (shared list; do not mutate)"""
+        if cls._list_cache is None:
+            cls._list_cache = [
+                {
+                    "id": t.value,
+                    "name": cls.get_template(t).name,
+                    "description": cls.get_template(t).description
+                }
+                for t in AgentTemplate
+            ]
+        return cls._list_cache
 
 
 class AgentWorkflowBuilder:
     """Builds complete n8n workflows from agent templates"""
 
+    # Customization keys that affect the generated workflow
+    CUSTOMIZABLE = ("name", "system_prompt", "llm_model", "integrations")
+
     def __init__(self, generator: Optional[WorkflowGenerator] = None):
-        self.generator = generator or WorkflowGenerator()
+        if generator is None:
+            from n8n_workflow_generator import WorkflowGenerator
+            generator = WorkflowGenerator()
+        self.generator = generator
+        self._skeletons: Dict[tuple, Tuple[N8NWorkflow, AgentConfig]] = {}
 
     def build_from_template(self, template: AgentTemplate,
                             customizations: Dict[str, Any] = None) -> N8NWorkflow:
-        """Build a complete workflow from an agent template"""
+        """
+        Build a complete workflow from an agent template.
+
+        The node graph is built once per (template, customizations) and
+        cached; each call returns a copy with fresh workflow, node and
+        webhook ids.
+        """
+        return self._build(template, customizations)[0]
+
+    def _build(self, template: AgentTemplate,
+               customizations: Dict[str, Any] = None) -> Tuple[N8NWorkflow, AgentConfig]:
+        """build_from_template, also returning the resolved config"""
+        key = (template, self._freeze(customizations))
+        cached = self._skeletons.get(key)
+        if cached is None:
+            cached = self._skeletons[key] = self._build_skeleton(template, customizations)
+        skeleton, config = cached
+        return self._materialize(skeleton), config
+
+    @classmethod
+    def _freeze(cls, customizations: Optional[Dict[str, Any]]) -> tuple:
+        """Hashable cache key for the customizations that matter"""
+        if not customizations:
+            return ()
+        key = []
+        for k in cls.CUSTOMIZABLE:
+            if k in customizations:
+                v = customizations[k]
+                key.append((k, tuple(v) if isinstance(v, list) else v))
+        return tuple(key)
+
+    @staticmethod
+    def _materialize(skeleton: N8NWorkflow) -> N8NWorkflow:
+        """Copy a cached skeleton, giving it ids of its own"""
+        workflow = copy.deepcopy(skeleton)
+        workflow.id = str(uuid.uuid4())
+        workflow.created_at = datetime.now().isoformat()
+        for node in workflow.nodes:
+            node.id = _new_node_id()
+            path = node.parameters.get("path")
+            if path:
+                node.parameters["path"] = f"{path.rpartition('-')[0]}-{secrets.token_hex(4)}"
+        return workflow
+
+    def _build_skeleton(self, template: AgentTemplate,
+                        customizations: Dict[str, Any] = None
+                        ) -> Tuple[N8NWorkflow, AgentConfig]:
+        """Build the workflow (and resolved config) for a template from scratch"""
+        from n8n_workflow_generator import N8NNode, N8NWorkflow, NodeType
 
         config = AgentTemplateLibrary.get_template(template)
 
-        # Apply customizations
+        # Apply customizations to a copy; the library config is shared
         if customizations:
-            if "name" in customizations:
-                config.name = customizations["name"]
-            if "system_prompt" in customizations:
-                config.system_prompt = customizations["system_prompt"]
-            if "llm_model" in customizations:
-                config.llm_model = customizations["llm_model"]
-            if "integrations" in customizations:
-                config.integrations = customizations["integrations"]
+            config = replace(config, **{k: customizations[k] for k in self.CUSTOMIZABLE
+                                        if k in customizations})
 
         workflow = N8NWorkflow(
             name=f"EVA - {config.name}",
@@ -461,10 +779,10 @@ class AgentWorkflowBuilder:
         # 1. Add trigger node
         trigger_type = config.triggers[0] if config.triggers else "manual"
         trigger_node = N8NNode(
-            id=str(uuid.uuid4()),
+            id=_new_node_id(),
             name=f"{trigger_type.title()} Trigger",
             type=self._get_trigger_type(trigger_type),
-            position=[250, 300],
+            position=[_POS_COLS[0], 300],
             parameters=self._get_trigger_params(trigger_type),
             type_version=2.0
         )
@@ -473,10 +791,10 @@ class AgentWorkflowBuilder:
 
         # 2. Add input processor
         input_processor = N8NNode(
-            id=str(uuid.uuid4()),
+            id=_new_node_id(),
             name="Process Input",
             type=NodeType.CODE.value,
-            position=[250 + 280 * pos_col, 300],
+            position=[_POS_COLS[pos_col], 300],
             parameters={
                 "jsCode": self._generate_input_processor(config),
                 "mode": "runOnceForAllItems"
@@ -489,10 +807,10 @@ class AgentWorkflowBuilder:
 
         # 3. Add main AI agent
         agent_node = N8NNode(
-            id=str(uuid.uuid4()),
+            id=_new_node_id(),
             name=config.name,
             type=NodeType.AI_AGENT.value,
-            position=[250 + 280 * pos_col, 300],
+            position=[_POS_COLS[pos_col], 300],
             parameters={
                 "options": {
                     "systemMessage": config.system_prompt,
@@ -507,10 +825,10 @@ class AgentWorkflowBuilder:
 
         # Add LLM node connected to agent
         llm_node = N8NNode(
-            id=str(uuid.uuid4()),
+            id=_new_node_id(),
             name=f"{config.name} LLM",
             type=self._get_llm_node_type(config.llm_model),
-            position=[250 + 280 * pos_col + 50, 500],
+            position=[_POS_COLS[pos_col] + 50, 500],
             parameters={
                 "modelId": config.llm_model,
                 "options": {"temperature": config.temperature}
@@ -521,10 +839,10 @@ class AgentWorkflowBuilder:
 
         # Add memory node
         memory_node = N8NNode(
-            id=str(uuid.uuid4()),
+            id=_new_node_id(),
             name=f"{config.name} Memory",
             type=NodeType.AI_MEMORY.value,
-            position=[250 + 280 * pos_col + 200, 500],
+            position=[_POS_COLS[pos_col] + 200, 500],
             parameters={
                 "sessionIdType": "customKey",
                 "sessionKey": "={{ $json.sessionId || $execution.id }}"
@@ -536,10 +854,10 @@ class AgentWorkflowBuilder:
 
         # 4. Add output processor
         output_processor = N8NNode(
-            id=str(uuid.uuid4()),
+            id=_new_node_id(),
             name="Process Output",
             type=NodeType.CODE.value,
-            position=[250 + 280 * pos_col, 300],
+            position=[_POS_COLS[pos_col], 300],
             parameters={
                 "jsCode": self._generate_output_processor(config),
                 "mode": "runOnceForAllItems"
@@ -551,31 +869,24 @@ class AgentWorkflowBuilder:
         pos_col += 1
 
         # 5. Add integration nodes based on configured integrations
-        for i, integration in enumerate(config.integrations[:3]):  # Limit to 3
+        for i, integration in enumerate(itertools.islice(config.integrations, 3)):  # Limit to 3
             int_node = N8NNode(
-                id=str(uuid.uuid4()),
+                id=_new_node_id(),
                 name=f"Send to {integration}",
                 type=self._get_integration_type(integration),
-                position=[250 + 280 * pos_col, 300 + 150 * i],
+                position=[_POS_COLS[pos_col], 300 + 150 * i],
                 parameters=self._get_integration_params(integration),
                 type_version=2.0
             )
             workflow.add_node(int_node)
             workflow.connect(output_processor.name, int_node.name, source_output=i)
 
-        return workflow
+        return workflow, config
 
     def _get_trigger_type(self, trigger: str) -> str:
         """Map trigger name to n8n node type"""
-        triggers = {
-            "webhook": NodeType.TRIGGER_WEBHOOK.value,
-            "email_received": NodeType.TRIGGER_WEBHOOK.value,
-            "schedule": NodeType.TRIGGER_SCHEDULE.value,
-            "manual": NodeType.TRIGGER_MANUAL.value,
-            "calendar_event": NodeType.TRIGGER_WEBHOOK.value,
-            "file_upload": NodeType.TRIGGER_WEBHOOK.value,
-            "message_received": NodeType.TRIGGER_WEBHOOK.value,
-        }
+        from n8n_workflow_generator import NodeType
+        triggers, _, _ = _node_tables()
         return triggers.get(trigger, NodeType.TRIGGER_MANUAL.value)
 
     def _get_trigger_params(self, trigger: str) -> Dict:
@@ -583,7 +894,7 @@ class AgentWorkflowBuilder:
         if trigger in ["webhook", "email_received", "file_upload", "message_received"]:
             return {
                 "httpMethod": "POST",
-                "path": f"eva-{trigger}-{uuid.uuid4().hex[:8]}",
+                "path": f"eva-{trigger}-{secrets.token_hex(4)}",
                 "responseMode": "lastNode"
             }
         elif trigger == "schedule":
@@ -596,30 +907,17 @@ class AgentWorkflowBuilder:
 
     def _get_llm_node_type(self, model: str) -> str:
         """Get LLM node type based on model"""
-        if "gemini" in model:
-            return NodeType.AI_GOOGLE.value
-        elif "gpt" in model or "openai" in model:
-            return NodeType.AI_OPENAI.value
-        elif "claude" in model or "anthropic" in model:
-            return NodeType.AI_ANTHROPIC.value
+        from n8n_workflow_generator import NodeType
+        _, llms, _ = _node_tables()
+        for prefix, node_type in llms:
+            if model.startswith(prefix):
+                return node_type
         return NodeType.AI_GOOGLE.value
 
     def _get_integration_type(self, integration: str) -> str:
         """Map integration name to n8n node type"""
-        integrations = {
-            "gmail": NodeType.GMAIL.value,
-            "outlook": NodeType.OUTLOOK.value,
-            "microsoft outlook": NodeType.OUTLOOK.value,
-            "slack": NodeType.SLACK.value,
-            "teams": NodeType.TEAMS.value,
-            "microsoft teams": NodeType.TEAMS.value,
-            "google sheets": NodeType.SHEETS.value,
-            "excel": NodeType.EXCEL.value,
-            "microsoft excel": NodeType.EXCEL.value,
-            "zoho": NodeType.ZOHO_CRM.value,
-            "zoho crm": NodeType.ZOHO_CRM.value,
-            "notion": NodeType.NOTION.value,
-        }
+        from n8n_workflow_generator import NodeType
+        _, _, integrations = _node_tables()
         return integrations.get(integration.lower(), NodeType.HTTP_REQUEST.value)
 
     def _get_integration_params(self, integration: str) -> Dict:
@@ -628,67 +926,11 @@ class AgentWorkflowBuilder:
 
     def _generate_input_processor(self, config: AgentConfig) -> str:
         """Generate input processing code"""
-        return f"""// Input processor for {config.name}
-const items = $input.all();
-const results = [];
-
-for (const item of items) {{
-  const data = item.json;
-
-  // Prepare input for AI agent
-  const processed = {{
-    input: data,
-    timestamp: new Date().toISOString(),
-    sessionId: data.sessionId || $execution.id,
-    context: {{
-      agentType: '{config.template.value}',
-      tools: {json.dumps(config.tools)},
-      integrations: {json.dumps(config.integrations)}
-    }}
-  }};
-
-  results.push({{ json: processed }});
-}}
-
-return results;
-"""
+        return _INPUT_JS_TEMPLATE.format_map(_js_subs(config))
 
     def _generate_output_processor(self, config: AgentConfig) -> str:
         """Generate output processing code"""
-        return f"""// Output processor for {config.name}
-const items = $input.all();
-const results = [];
-
-for (const item of items) {{
-  const agentOutput = item.json;
-
-  // Parse and structure agent response
-  let parsed;
-  try {{
-    parsed = typeof agentOutput.output === 'string'
-      ? JSON.parse(agentOutput.output)
-      : agentOutput.output || agentOutput;
-  }} catch (e) {{
-    parsed = {{ raw: agentOutput.output || agentOutput }};
-  }}
-
-  const structured = {{
-    agentType: '{config.template.value}',
-    agentName: '{config.name}',
-    timestamp: new Date().toISOString(),
-    executionId: $execution.id,
-    response: parsed,
-    metadata: {{
-      model: '{config.llm_model}',
-      temperature: {config.temperature}
-    }}
-  }};
-
-  results.push({{ json: structured }});
-}}
-
-return results;
-"""
+        return _OUTPUT_JS_TEMPLATE.format_map(_js_subs(config))
 
     def build_all_templates(self, output_dir: Path) -> Dict[str, Any]:
         """Build all agent templates and save to directory"""
@@ -699,21 +941,28 @@ return results;
             "templates": []
         }
 
-        for template in AgentTemplate:
-            workflow = self.build_from_template(template)
+        def build_one(template: AgentTemplate):
+            workflow, config = self._build(template)
             filename = f"eva_{template.value}_agent.json"
-            filepath = output_dir / filename
-            workflow.save(filepath)
+            # output_dir was created above, so write straight through
+            (output_dir / filename).write_bytes(_dump_json(workflow.to_dict()))
+            return template, workflow, config, filename
+
+        # Builds and file writes overlap; map() keeps the enum order
+        workers = min(len(AgentTemplate), (os.cpu_count() or 1) * 2)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            built = list(pool.map(build_one, AgentTemplate))
 
+        for template, workflow, config, filename in built:
             manifest["templates"].append({
                 "id": template.value,
                 "name": workflow.name,
                 "file": filename,
-                "config": AgentTemplateLibrary.get_template(template).__dict__
+                "config": _config_to_dict(config)
             })
 
         manifest_path = output_dir / "_agent_manifest.json"
-        manifest_path.write_text(json.dumps(manifest, indent=2, default=str))
+        manifest_path.write_bytes(_dump_json(manifest))
 
         return manifest
 
@@ -743,7 +992,7 @@ def main():
         workflow = builder.build_from_template(template)
         args.output.mkdir(parents=True, exist_ok=True)
         filepath = args.output / f"eva_{args.template}_agent.json"
-        workflow.save(filepath)
+        filepath.write_bytes(_dump_json(workflow.to_dict()))
         print(f"Generated: {filepath}")
     else:
         manifest = builder.build_all_templates(args.output)
@@ -9,19 +9,37 @@ Updated: November 2025
 """
 
 from __future__ import annotations
+import asyncio
+import functools
+import hashlib
+import importlib.util
 import json
 import logging
 import os
-import time
+import stat
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, Final, List, Any, Optional, Tuple
 from enum import Enum
 
 import httpx
+import tenacity
+from aiolimiter import AsyncLimiter
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:  # optional speed-up, stdlib json otherwise
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # optional, streams large manifests instead of loading them whole
+    ijson = None
+
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO,
@@ -43,29 +61,33 @@ class ImportStatus(Enum):
     REQUIRES_CREDENTIALS = "requires_credentials"
 
 
-@dataclass
+# Common credential names -> n8n credential types
+_CRED_TYPE_MAP: Final[Dict[str, str]] = {
+    "google": "googleApi",
+    "openai": "openAiApi",
+    "anthropic": "anthropicApi",
+    "slack": "slackOAuth2Api",
+    "outlook": "microsoftOutlookOAuth2Api",
+    "gmail": "gmailOAuth2",
+    "sheets": "googleSheetsOAuth2Api",
+    "zoho": "zohoCrmOAuth2Api",
+    "notion": "notionApi",
+    "teams": "microsoftTeamsOAuth2Api",
+}
+
+
+@dataclass(slots=True)
 class CredentialConfig:
     """Configuration for n8n credentials"""
     name: str
     type: str
     data: Dict[str, Any] = field(default_factory=dict)
 
-    # Common credential types
-    TYPES = {
-        "google": "googleApi",
-        "openai": "openAiApi",
-        "anthropic": "anthropicApi",
-        "slack": "slackOAuth2Api",
-        "outlook": "microsoftOutlookOAuth2Api",
-        "gmail": "gmailOAuth2",
-        "sheets": "googleSheetsOAuth2Api",
-        "zoho": "zohoCrmOAuth2Api",
-        "notion": "notionApi",
-        "teams": "microsoftTeamsOAuth2Api",
-    }
-
-
-@dataclass
+    # Common credential types (shared with the module map, not copied)
+    TYPES = _CRED_TYPE_MAP
+
+
+@dataclass(slots=True)
 class ImportResult:
     """Result of a workflow import operation"""
     workflow_name: str
@@ -76,14 +98,111 @@ class ImportResult:
     warnings: List[str] = field(default_factory=list)
 
 
+# Top-level fields n8n generates itself, stripped before create/update
+_FIELDS_TO_STRIP = frozenset({"id", "createdAt", "updatedAt", "versionId"})
+
+# Last-seen workflow index per n8n instance, revalidated by ETag
+INDEX_CACHE_DIR = Path(os.getenv("XDG_CACHE_HOME", Path.home() / ".cache")) / "n8n_importer"
+
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+def _loads(data: bytes) -> Any:
+    """Parse JSON bytes, via orjson when installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dumps(obj: Any, indent: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes, via orjson when installed"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None).encode()
+
+
+@functools.lru_cache(maxsize=256)
+def _placeholder_credential(cred_type: str) -> Tuple[str, str]:
+    """(n8n credential type, placeholder name) for a credential name"""
+    key = cred_type.lower()
+    # Map common names to n8n credential types, else infer one
+    n8n_type = _CRED_TYPE_MAP.get(key) or f"{key}Api"
+    return n8n_type, f"EVA_{cred_type.title()}_Credentials"
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """Network errors, 429 and 5xx are transient; other 4xx are not"""
+    if isinstance(exc, httpx.TransportError):
+        return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        code = exc.response.status_code
+        return code == 429 or code >= 500
+    return False
+
+
+def _read_workflow_file(filepath: Path) -> Tuple[Optional[Dict], Optional[str]]:
+    """Read and parse a workflow file, returning (data, error)"""
+    if not filepath.exists():
+        return None, f"File not found: {filepath}"
+    try:
+        return _loads(filepath.read_bytes()), None
+    except json.JSONDecodeError as e:  # orjson.JSONDecodeError subclasses it
+        return None, f"Invalid JSON: {e}"
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    """Seconds from a Retry-After header (delay-seconds form only)"""
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
+
+_backoff = tenacity.wait_exponential_jitter(initial=1, max=20)
+
+
+def _retry_wait(retry_state: tenacity.RetryCallState) -> float:
+    """Honour a 429's Retry-After, else jittered exponential backoff"""
+    exc = retry_state.outcome.exception()
+    if isinstance(exc, httpx.HTTPStatusError):
+        retry_after = _retry_after(exc.response)
+        if retry_after is not None:
+            return retry_after
+    return _backoff(retry_state)
+
+
+def _iter_manifest_entries(manifest_path: Path):
+    """Yield the workflow entries of a generator or agent manifest"""
+    if ijson is None:
+        manifest = _loads(manifest_path.read_bytes())
+        yield from manifest.get("workflows", []) or manifest.get("templates", [])
+        return
+
+    # Workflow manifests list "workflows", agent manifests list "templates"
+    for prefix in ("workflows.item", "templates.item"):
+        found = False
+        with open(manifest_path, "rb") as f:
+            for entry in ijson.items(f, prefix):
+                found = True
+                yield entry
+        if found:
+            return
+
+
 class N8NClient:
-    """Client for n8n REST API"""
+    """
+    Async client for n8n REST API (use `async with` or await `close()`).
+
+    Holds a pooled keep-alive connection; reuse one instance for a whole run,
+    since creating a client per call pays the TLS handshake every time.
+    """
 
     def __init__(
         self,
         base_url: Optional[str] = None,
         api_key: Optional[str] = None,
-        timeout: float = 30.0
+        timeout: float = 30.0,
+        rate_limit: float = 20.0
     ):
         self.base_url = (base_url or os.getenv("N8N_BASE_URL", "http://localhost:5678")).rstrip("/")
         self.api_key = api_key or os.getenv("N8N_API_KEY")
@@ -91,21 +210,56 @@ class N8NClient:
         if not self.api_key:
             raise N8NError("N8N_API_KEY is required. Set it in environment or pass to constructor.")
 
-        self.client = httpx.Client(
+        self.client = httpx.AsyncClient(
             base_url=self.base_url,
             headers={
                 "X-N8N-API-KEY": self.api_key,
                 "Content-Type": "application/json",
             },
-            timeout=timeout
+            timeout=timeout,
+            # n8n has no batch endpoint; multiplex concurrent calls over one
+            # connection instead (needs the h2 extra: httpx[http2]).
+            # retries= only re-attempts failed connects, not requests.
+            transport=httpx.AsyncHTTPTransport(
+                http2=_HTTP2_AVAILABLE,
+                limits=httpx.Limits(max_connections=32,
+                                    max_keepalive_connections=32,
+                                    keepalive_expiry=60.0),
+                retries=2,
+            ),
         )
+        # Token bucket shared by every request; a 429's Retry-After pauses it
+        self._limiter = AsyncLimiter(rate_limit, 1.0)
+        self._resume_at = 0.0
 
-    def _request(self, method: str, endpoint: str, **kwargs) -> Dict:
+    async def _request(self, method: str, endpoint: str, **kwargs) -> Dict:
         """Make API request with error handling"""
+        response = await self._send(method, endpoint, **kwargs)
+        return _loads(response.content) if response.content else {}
+
+    async def _send(self, method: str, endpoint: str, ok_statuses: Tuple[int, ...] = (),
+                    **kwargs) -> httpx.Response:
+        """Send a request with throttling and retries, raising N8NError on failure
+        unless the status is a success or one of `ok_statuses`"""
+        # Encode bodies ourselves so httpx doesn't go through stdlib json
+        if "json" in kwargs:
+            kwargs["content"] = _dumps(kwargs.pop("json"))
         try:
-            response = self.client.request(method, f"/api/v1{endpoint}", **kwargs)
-            response.raise_for_status()
-            return response.json() if response.content else {}
+            # Backoff sleeps go through asyncio, so other imports keep running
+            async for attempt in tenacity.AsyncRetrying(
+                retry=tenacity.retry_if_exception(_is_retryable),
+                wait=_retry_wait,
+                stop=tenacity.stop_after_attempt(5),
+                reraise=True,
+            ):
+                with attempt:
+                    await self._throttle()
+                    response = await self.client.request(method, f"/api/v1{endpoint}", **kwargs)
+                    if response.status_code == 429:
+                        self._pause(_retry_after(response))
+                    if response.status_code not in ok_statuses:
+                        response.raise_for_status()
+            return response
         except httpx.HTTPStatusError as e:
             error_detail = ""
             try:
@@ -116,134 +270,190 @@ class N8NClient:
         except httpx.RequestError as e:
             raise N8NError(f"Request failed: {e}")
 
-    def test_connection(self) -> bool:
+    async def _throttle(self):
+        """Wait for a token, and for any server-requested pause to end"""
+        await self._limiter.acquire()
+        delay = self._resume_at - asyncio.get_running_loop().time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _pause(self, seconds: Optional[float]):
+        """Hold back every request until a 429's Retry-After has passed"""
+        if seconds:
+            resume_at = asyncio.get_running_loop().time() + seconds
+            self._resume_at = max(self._resume_at, resume_at)
+
+    async def test_connection(self) -> bool:
         """Test connection to n8n instance"""
         try:
-            self._request("GET", "/workflows")
+            await self._request("GET", "/workflows")
             return True
         except N8NError:
             return False
 
-    def list_workflows(self, limit: int = 100) -> List[Dict]:
+    async def list_workflows(self, limit: int = 100) -> List[Dict]:
         """List all workflows"""
-        result = self._request("GET", f"/workflows?limit={limit}")
+        result = await self._request("GET", f"/workflows?limit={limit}")
         return result.get("data", [])
 
-    def get_workflow(self, workflow_id: str) -> Dict:
+    async def workflow_index(self, limit: int = 100) -> Dict[str, Dict]:
+        """
+        Existing workflows keyed by name. The last listing is cached on disk
+        per instance and revalidated with If-None-Match, so an unchanged
+        instance answers with an empty 304 instead of the full list.
+        """
+        url_key = hashlib.sha1(self.base_url.encode()).hexdigest()[:16]
+        cache_path = INDEX_CACHE_DIR / f"index-{url_key}.json"
+        try:
+            cached = _loads(cache_path.read_bytes())
+        except (OSError, ValueError):
+            cached = None
+
+        headers = {"If-None-Match": cached["etag"]} if cached else {}
+        response = await self._send("GET", f"/workflows?limit={limit}", ok_statuses=(304,),
+                                    headers=headers)
+        if response.status_code == 304 and cached:
+            return cached["index"]
+
+        workflows = _loads(response.content).get("data", []) if response.content else []
+        index = {wf.get("name"): wf for wf in workflows}
+        etag = response.headers.get("ETag")
+        if etag:
+            try:
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+                cache_path.write_bytes(_dumps({"etag": etag, "index": index}))
+            except OSError as e:
+                logger.warning(f"Could not cache workflow index: {e}")
+        return index
+
+    async def get_workflow(self, workflow_id: str) -> Dict:
         """Get workflow by ID"""
-        return self._request("GET", f"/workflows/{workflow_id}")
+        return await self._request("GET", f"/workflows/{workflow_id}")
 
-    def create_workflow(self, workflow_data: Dict) -> Dict:
+    async def create_workflow(self, workflow_data: Dict) -> Dict:
         """Create a new workflow"""
         # Clean workflow data for import
         clean_data = self._prepare_workflow_for_import(workflow_data)
-        return self._request("POST", "/workflows", json=clean_data)
+        return await self._request("POST", "/workflows", json=clean_data)
 
-    def update_workflow(self, workflow_id: str, workflow_data: Dict) -> Dict:
+    async def update_workflow(self, workflow_id: str, workflow_data: Dict) -> Dict:
         """Update existing workflow"""
         clean_data = self._prepare_workflow_for_import(workflow_data)
-        return self._request("PATCH", f"/workflows/{workflow_id}", json=clean_data)
+        return await self._request("PATCH", f"/workflows/{workflow_id}", json=clean_data)
 
-    def delete_workflow(self, workflow_id: str) -> bool:
+    async def delete_workflow(self, workflow_id: str) -> bool:
         """Delete a workflow"""
-        self._request("DELETE", f"/workflows/{workflow_id}")
+        await self._request("DELETE", f"/workflows/{workflow_id}")
         return True
 
-    def activate_workflow(self, workflow_id: str) -> Dict:
+    async def activate_workflow(self, workflow_id: str) -> Dict:
         """Activate a workflow"""
-        return self._request("PATCH", f"/workflows/{workflow_id}/activate")
+        return await self._request("PATCH", f"/workflows/{workflow_id}/activate")
 
-    def deactivate_workflow(self, workflow_id: str) -> Dict:
+    async def deactivate_workflow(self, workflow_id: str) -> Dict:
         """Deactivate a workflow"""
-        return self._request("PATCH", f"/workflows/{workflow_id}/deactivate")
+        return await self._request("PATCH", f"/workflows/{workflow_id}/deactivate")
 
-    def list_credentials(self) -> List[Dict]:
+    async def list_credentials(self) -> List[Dict]:
         """List all credentials"""
-        result = self._request("GET", "/credentials")
+        result = await self._request("GET", "/credentials")
         return result.get("data", [])
 
-    def create_credential(self, credential_data: Dict) -> Dict:
+    async def create_credential(self, credential_data: Dict) -> Dict:
         """Create a new credential"""
-        return self._request("POST", "/credentials", json=credential_data)
+        return await self._request("POST", "/credentials", json=credential_data)
 
-    def list_executions(self, workflow_id: Optional[str] = None,
+    async def list_executions(self, workflow_id: Optional[str] = None,
                         limit: int = 20) -> List[Dict]:
         """List workflow executions"""
         endpoint = f"/executions?limit={limit}"
         if workflow_id:
             endpoint += f"&workflowId={workflow_id}"
-        result = self._request("GET", endpoint)
+        result = await self._request("GET", endpoint)
         return result.get("data", [])
 
     def _prepare_workflow_for_import(self, workflow_data: Dict) -> Dict:
         """Prepare workflow data for import by cleaning/transforming"""
         # Remove fields that should be generated by n8n
-        fields_to_remove = ["id", "createdAt", "updatedAt", "versionId"]
-        clean_data = {k: v for k, v in workflow_data.items() if k not in fields_to_remove}
+        clean_data = workflow_data.copy()
+        for key in _FIELDS_TO_STRIP:
+            clean_data.pop(key, None)
 
         # Handle credential references
-        if "nodes" in clean_data:
-            for node in clean_data["nodes"]:
-                if "credentials" in node:
-                    # Mark credentials as needing setup
-                    for cred_type, cred_ref in node["credentials"].items():
-                        if isinstance(cred_ref, dict) and "id" in cred_ref:
-                            # Keep the name but remove the ID for fresh import
-                            cred_ref.pop("id", None)
+        for node in clean_data.get("nodes") or ():
+            # Mark credentials as needing setup
+            for cred_ref in node.get("credentials", {}).values():
+                try:
+                    # Keep the name but remove the ID for fresh import
+                    cred_ref.pop("id", None)
+                except (AttributeError, TypeError):  # plain name reference
+                    pass
 
         return clean_data
 
-    def close(self):
+    async def close(self):
         """Close the HTTP client"""
-        self.client.close()
+        await self.client.aclose()
 
-    def __enter__(self):
+    async def __aenter__(self):
         return self
 
-    def __exit__(self, *args):
-        self.close()
+    async def __aexit__(self, *args):
+        await self.close()
 
 
 class N8NImporter:
     """Handles batch import of workflows and agents into n8n"""
 
-    def __init__(self, client: Optional[N8NClient] = None):
+    def __init__(self, client: Optional[N8NClient] = None, concurrency: int = 8):
         self.client = client or N8NClient()
         self.results: List[ImportResult] = []
-
-    def import_workflow_file(self, filepath: Path,
+        # Caps in-flight imports during directory/manifest runs
+        self._sem = asyncio.Semaphore(concurrency)
+        # Name-keyed lookup tables, fetched once per run instead of per file
+        self._workflow_index: Optional[Dict[str, Dict]] = None
+        self._credential_names: Optional[set] = None
+        self._index_lock = asyncio.Lock()
+        # One lock per workflow name: the lookup and the create/update for a
+        # name happen together, so concurrent files can't both create it
+        self._name_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    async def import_workflow_file(self, filepath: Path,
                              activate: bool = False,
                              overwrite: bool = False) -> ImportResult:
         """Import a single workflow from JSON file"""
-
-        if not filepath.exists():
+        workflow_data, error = _read_workflow_file(filepath)
+        return await self._import_parsed(filepath, workflow_data, error, activate, overwrite)
+
+    async def _import_parsed(self, filepath: Path, workflow_data: Optional[Dict],
+                             error: Optional[str], activate: bool,
+                             overwrite: bool) -> ImportResult:
+        """Import the result of _read_workflow_file"""
+        if error:
             return ImportResult(
                 workflow_name=filepath.name,
                 status=ImportStatus.FAILED,
-                error=f"File not found: {filepath}"
+                error=error
             )
+        return await self.import_workflow(workflow_data, activate, overwrite)
 
-        try:
-            workflow_data = json.loads(filepath.read_text())
-            return self.import_workflow(workflow_data, activate, overwrite)
-        except json.JSONDecodeError as e:
-            return ImportResult(
-                workflow_name=filepath.name,
-                status=ImportStatus.FAILED,
-                error=f"Invalid JSON: {e}"
-            )
-
-    def import_workflow(self, workflow_data: Dict,
+    async def import_workflow(self, workflow_data: Dict,
                         activate: bool = False,
                         overwrite: bool = False) -> ImportResult:
         """Import a workflow from dict data"""
 
         name = workflow_data.get("name", "Unnamed Workflow")
+        async with self._name_locks[name]:
+            return await self._import_named(name, workflow_data, activate, overwrite)
+
+    async def _import_named(self, name: str, workflow_data: Dict,
+                            activate: bool, overwrite: bool) -> ImportResult:
+        """import_workflow's body, run while holding the lock for `name`"""
         result = ImportResult(workflow_name=name, status=ImportStatus.IMPORTING)
 
         try:
             # Check for existing workflow
-            existing = self._find_existing_workflow(name)
+            existing = await self._find_existing_workflow(name)
 
             if existing and not overwrite:
                 result.status = ImportStatus.FAILED
@@ -251,25 +461,27 @@ class N8NImporter:
                 return result
 
             # Detect missing credentials
-            missing_creds = self._detect_missing_credentials(workflow_data)
+            missing_creds = await self._detect_missing_credentials(workflow_data)
             if missing_creds:
                 result.missing_credentials = missing_creds
                 result.warnings.append(f"Missing credentials: {', '.join(missing_creds)}")
 
             # Import or update
             if existing and overwrite:
-                response = self.client.update_workflow(existing["id"], workflow_data)
+                response = await self.client.update_workflow(existing["id"], workflow_data)
                 result.n8n_id = existing["id"]
+                self._workflow_index[name] = response or existing
                 logger.info(f"Updated workflow: {name} (ID: {result.n8n_id})")
             else:
-                response = self.client.create_workflow(workflow_data)
+                response = await self.client.create_workflow(workflow_data)
                 result.n8n_id = response.get("id")
+                self._workflow_index[name] = response
                 logger.info(f"Created workflow: {name} (ID: {result.n8n_id})")
 
             # Activate if requested and no missing credentials
             if activate and result.n8n_id and not missing_creds:
                 try:
-                    self.client.activate_workflow(result.n8n_id)
+                    await self.client.activate_workflow(result.n8n_id)
                     logger.info(f"Activated workflow: {name}")
                 except N8NError as e:
                     result.warnings.append(f"Could not activate: {e}")
@@ -284,13 +496,26 @@ class N8NImporter:
         self.results.append(result)
         return result
 
-    def import_directory(self, directory: Path,
+    async def _limited(self, import_coro) -> ImportResult:
+        """Await an import coroutine under the concurrency cap"""
+        async with self._sem:
+            return await import_coro
+
+    async def import_directory(self, directory: Path,
                          pattern: str = "*.json",
                          activate: bool = False,
-                         overwrite: bool = False) -> List[ImportResult]:
-        """Import all workflow files from a directory"""
+                         overwrite: bool = False,
+                         missing_ok: bool = False) -> List[ImportResult]:
+        """Import all workflow files from a directory (none if missing and missing_ok)"""
 
-        if not directory.is_dir():
+        # A single stat answers both "exists?" and "is a directory?"
+        try:
+            is_dir = stat.S_ISDIR(directory.stat().st_mode)
+        except FileNotFoundError:
+            if missing_ok:
+                return []
+            is_dir = False
+        if not is_dir:
             raise N8NError(f"Not a directory: {directory}")
 
         files = list(directory.glob(pattern))
@@ -299,118 +524,139 @@ class N8NImporter:
 
         logger.info(f"Found {len(files)} workflow files to import")
 
-        results = []
-        for filepath in files:
-            result = self.import_workflow_file(filepath, activate, overwrite)
-            results.append(result)
-            time.sleep(0.5)  # Rate limiting
-
-        return results
-
-    def import_from_manifest(self, manifest_path: Path,
+        # Read and parse every file up front on a thread pool, so disk I/O
+        # overlaps instead of queueing behind each file's HTTP calls
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            parsed = await asyncio.gather(*(
+                loop.run_in_executor(pool, _read_workflow_file, filepath)
+                for filepath in files
+            ))
+
+        return list(await asyncio.gather(*(
+            self._limited(self._import_parsed(filepath, data, error, activate, overwrite))
+            for filepath, (data, error) in zip(files, parsed)
+        )))
+
+    async def import_from_manifest(self, manifest_path: Path,
                              activate: bool = False,
                              overwrite: bool = False) -> List[ImportResult]:
         """Import workflows listed in a manifest file"""
 
-        manifest = json.loads(manifest_path.read_text())
         directory = manifest_path.parent
 
-        workflows = manifest.get("workflows", []) or manifest.get("templates", [])
+        # Start each import as soon as its entry is parsed, rather than after
+        # the whole manifest has been read
+        tasks = []
+        for wf in _iter_manifest_entries(manifest_path):
+            tasks.append(asyncio.create_task(self._limited(
+                self.import_workflow_file(directory / wf["file"], activate, overwrite)
+            )))
+            await asyncio.sleep(0)  # let the new task send its first request
 
-        results = []
-        for wf in workflows:
-            filepath = directory / wf["file"]
-            result = self.import_workflow_file(filepath, activate, overwrite)
-            results.append(result)
-            time.sleep(0.5)
+        return list(await asyncio.gather(*tasks))
 
-        return results
+    async def connect(self) -> bool:
+        """Test the connection, seeding the workflow index from the same GET"""
+        try:
+            self._workflow_index = await self.client.workflow_index()
+        except N8NError:
+            return False
+        return True
 
-    def _find_existing_workflow(self, name: str) -> Optional[Dict]:
+    async def _load_indexes(self):
+        """Fetch the workflow and credential indexes on first use"""
+        async with self._index_lock:
+            if self._workflow_index is None:
+                self._workflow_index = await self.client.workflow_index()
+            if self._credential_names is None:
+                self._credential_names = {
+                    c["name"] for c in await self.client.list_credentials()
+                }
+
+    def invalidate_indexes(self):
+        """Drop cached indexes so the next lookup re-fetches from n8n"""
+        self._workflow_index = None
+        self._credential_names = None
+
+    async def _find_existing_workflow(self, name: str) -> Optional[Dict]:
         """Find existing workflow by name"""
-        workflows = self.client.list_workflows()
-        for wf in workflows:
-            if wf.get("name") == name:
-                return wf
-        return None
+        if self._workflow_index is None:
+            await self._load_indexes()
+        return self._workflow_index.get(name)
 
-    def _detect_missing_credentials(self, workflow_data: Dict) -> List[str]:
+    async def _detect_missing_credentials(self, workflow_data: Dict) -> List[str]:
         """Detect credentials referenced but not configured"""
-        missing = []
-        existing_creds = {c["name"]: c for c in self.client.list_credentials()}
+        missing = {}  # insertion-ordered set
+        if self._credential_names is None:
+            await self._load_indexes()
+        existing_names = self._credential_names
 
         for node in workflow_data.get("nodes", []):
-            for cred_type, cred_ref in node.get("credentials", {}).items():
+            for cred_ref in node.get("credentials", {}).values():
                 cred_name = cred_ref.get("name") if isinstance(cred_ref, dict) else cred_ref
-                if cred_name and cred_name not in existing_creds:
-                    if cred_name not in missing:
-                        missing.append(cred_name)
+                if cred_name and cred_name not in existing_names:
+                    missing[cred_name] = None
 
-        return missing
+        return list(missing)
 
-    def create_credential_placeholders(self, credential_types: List[str]) -> Dict[str, str]:
+    async def create_credential_placeholders(self, credential_types: List[str]) -> Dict[str, str]:
         """Create placeholder credentials for required types"""
         created = {}
 
         for cred_type in credential_types:
-            # Map common names to n8n credential types
-            n8n_type = CredentialConfig.TYPES.get(cred_type.lower())
-            if not n8n_type:
-                # Try to infer type
-                n8n_type = f"{cred_type.lower()}Api"
+            n8n_type, name = _placeholder_credential(cred_type)
 
             try:
-                name = f"EVA_{cred_type.title()}_Credentials"
-                response = self.client.create_credential({
+                response = await self.client.create_credential({
                     "name": name,
                     "type": n8n_type,
                     "data": {}  # Empty placeholder
                 })
                 created[cred_type] = response.get("id")
+                if self._credential_names is not None:
+                    self._credential_names.add(name)
                 logger.info(f"Created placeholder credential: {name}")
             except N8NError as e:
                 logger.warning(f"Could not create credential for {cred_type}: {e}")
 
         return created
 
-    def generate_import_report(self) -> Dict[str, Any]:
+    def generate_import_report(self, timestamp: Optional[str] = None) -> Dict[str, Any]:
         """Generate summary report of import operations"""
 
-        success = [r for r in self.results if r.status == ImportStatus.SUCCESS]
-        failed = [r for r in self.results if r.status == ImportStatus.FAILED]
-        needs_creds = [r for r in self.results if r.status == ImportStatus.REQUIRES_CREDENTIALS]
-
+        # One pass over the results builds every section of the report
+        success, failed, details = [], [], []
+        needs_creds = 0
         all_missing_creds = set()
         for r in self.results:
+            if r.status is ImportStatus.SUCCESS:
+                success.append({"name": r.workflow_name, "id": r.n8n_id})
+            elif r.status is ImportStatus.FAILED:
+                failed.append({"name": r.workflow_name, "error": r.error})
+            elif r.status is ImportStatus.REQUIRES_CREDENTIALS:
+                needs_creds += 1
             all_missing_creds.update(r.missing_credentials)
+            details.append({
+                "name": r.workflow_name,
+                "status": r.status.value,
+                "id": r.n8n_id,
+                "error": r.error,
+                "warnings": r.warnings
+            })
 
         return {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": timestamp or datetime.now().isoformat(),
             "summary": {
                 "total": len(self.results),
                 "success": len(success),
                 "failed": len(failed),
-                "requires_credentials": len(needs_creds)
+                "requires_credentials": needs_creds
             },
-            "successful_imports": [
-                {"name": r.workflow_name, "id": r.n8n_id}
-                for r in success
-            ],
-            "failed_imports": [
-                {"name": r.workflow_name, "error": r.error}
-                for r in failed
-            ],
+            "successful_imports": success,
+            "failed_imports": failed,
             "missing_credentials": list(all_missing_creds),
-            "details": [
-                {
-                    "name": r.workflow_name,
-                    "status": r.status.value,
-                    "id": r.n8n_id,
-                    "error": r.error,
-                    "warnings": r.warnings
-                }
-                for r in self.results
-            ]
+            "details": details
         }
 
 
@@ -421,7 +667,16 @@ class AutoImporter:
         self.client = N8NClient(base_url=n8n_url, api_key=api_key)
         self.importer = N8NImporter(self.client)
 
-    def full_import(
+    async def close(self):
+        await self.client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def full_import(
         self,
         workflows_dir: Path,
         agents_dir: Optional[Path] = None,
@@ -440,19 +695,20 @@ class AutoImporter:
         }
 
         try:
-            # Test connection
-            if not self.client.test_connection():
+            # Test connection (also loads the existing-workflow index)
+            if not await self.importer.connect():
                 raise N8NError("Cannot connect to n8n instance")
 
             # Import workflows
-            if workflows_dir.exists():
-                logger.info(f"Importing workflows from: {workflows_dir}")
-                self.importer.import_directory(workflows_dir, activate=activate, overwrite=overwrite)
+            logger.info(f"Importing workflows from: {workflows_dir}")
+            await self.importer.import_directory(workflows_dir, activate=activate,
+                                                 overwrite=overwrite, missing_ok=True)
 
             # Import agents
-            if agents_dir and agents_dir.exists():
+            if agents_dir:
                 logger.info(f"Importing agents from: {agents_dir}")
-                self.importer.import_directory(agents_dir, activate=activate, overwrite=overwrite)
+                await self.importer.import_directory(agents_dir, activate=activate,
+                                                     overwrite=overwrite, missing_ok=True)
 
             # Create missing credentials if requested
             if create_credentials:
@@ -461,11 +717,11 @@ class AutoImporter:
                     all_missing.update(result.missing_credentials)
 
                 if all_missing:
-                    created = self.importer.create_credential_placeholders(list(all_missing))
+                    created = await self.importer.create_credential_placeholders(list(all_missing))
                     report["credentials_created"] = list(created.keys())
 
             # Generate final report
-            import_report = self.importer.generate_import_report()
+            import_report = self.importer.generate_import_report(report["timestamp"])
             report["workflows"] = import_report
             report["success"] = import_report["summary"]["failed"] == 0
 
@@ -475,7 +731,7 @@ class AutoImporter:
 
         return report
 
-    def quick_deploy(self, analysis_path: Path, output_dir: Path = None) -> Dict[str, Any]:
+    async def quick_deploy(self, analysis_path: Path, output_dir: Path = None) -> Dict[str, Any]:
         """
         Quick deployment: Generate workflows from analysis and import to n8n.
         One-command solution for going from video analysis to running automations.
@@ -505,7 +761,7 @@ class AutoImporter:
 
         # Step 3: Import everything to n8n
         logger.info("Importing to n8n...")
-        report = self.full_import(
+        report = await self.full_import(
             workflows_dir=output_dir / "workflows",
             agents_dir=output_dir / "agents",
             activate=False,  # Don't auto-activate without credential setup
@@ -533,7 +789,7 @@ class AutoImporter:
 
         # Save summary
         summary_path = output_dir / "deployment_summary.json"
-        summary_path.write_text(json.dumps(summary, indent=2))
+        summary_path.write_bytes(_dumps(summary, indent=True))
         logger.info(f"Deployment complete! Summary: {summary_path}")
 
         return summary
@@ -568,38 +824,47 @@ def main():
 
     args = parser.parse_args()
 
+    if args.command in ("test", "import", "deploy"):
+        asyncio.run(_run_command(args))
+    else:
+        parser.print_help()
+
+
+async def _run_command(args):
+    """Run one CLI command on a single event loop"""
     if args.command == "test":
         try:
-            client = N8NClient(base_url=args.url, api_key=args.key)
-            if client.test_connection():
-                print("✓ Successfully connected to n8n")
-                workflows = client.list_workflows()
-                print(f"  Found {len(workflows)} existing workflows")
-            else:
-                print("✗ Could not connect to n8n")
+            async with N8NClient(base_url=args.url, api_key=args.key) as client:
+                try:
+                    workflows = await client.list_workflows()
+                except N8NError:
+                    print("✗ Could not connect to n8n")
+                else:
+                    print("✓ Successfully connected to n8n")
+                    print(f"  Found {len(workflows)} existing workflows")
         except N8NError as e:
             print(f"✗ Error: {e}")
 
     elif args.command == "import":
-        auto = AutoImporter(n8n_url=args.url, api_key=args.key)
-        if args.source.is_file():
-            result = auto.importer.import_workflow_file(
-                args.source, activate=args.activate, overwrite=args.overwrite
-            )
-            print(f"Import result: {result.status.value}")
-            if result.error:
-                print(f"Error: {result.error}")
-        else:
-            report = auto.full_import(
-                workflows_dir=args.source,
-                activate=args.activate,
-                overwrite=args.overwrite
-            )
-            print(json.dumps(report, indent=2))
+        async with AutoImporter(n8n_url=args.url, api_key=args.key) as auto:
+            if args.source.is_file():
+                result = await auto.importer.import_workflow_file(
+                    args.source, activate=args.activate, overwrite=args.overwrite
+                )
+                print(f"Import result: {result.status.value}")
+                if result.error:
+                    print(f"Error: {result.error}")
+            else:
+                report = await auto.full_import(
+                    workflows_dir=args.source,
+                    activate=args.activate,
+                    overwrite=args.overwrite
+                )
+                print(_dumps(report, indent=True).decode())
 
     elif args.command == "deploy":
-        auto = AutoImporter(n8n_url=args.url, api_key=args.key)
-        summary = auto.quick_deploy(args.analysis, args.output)
+        async with AutoImporter(n8n_url=args.url, api_key=args.key) as auto:
+            summary = await auto.quick_deploy(args.analysis, args.output)
         print("\n=== Deployment Complete ===")
         print(f"Workflows: {summary['workflows_generated']}")
         print(f"Agents: {summary['agents_generated']}")
@@ -607,9 +872,6 @@ def main():
         for step in summary["next_steps"]:
             print(f"  {step}")
 
-    else:
-        parser.print_help()
-
 
 if __name__ == "__main__":
     main()
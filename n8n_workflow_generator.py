@@ -7,14 +7,46 @@ Updated: November 2025
 """
 
 from __future__ import annotations
+import functools
 import json
-import uuid
+import operator
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Optional, Any, Sequence, Tuple
 from enum import Enum
 
+try:
+    import orjson
+except ImportError:  # optional speed-up, stdlib json otherwise
+    orjson = None
+
+
+def _loads(data) -> Any:
+    """Parse JSON str/bytes, via orjson when installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dump_json(obj: Any, indent: Optional[int] = 2) -> bytes:
+    """JSON as UTF-8 bytes, via orjson when installed (it only indents by 2)"""
+    if orjson is not None and indent in (2, None):
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    return json.dumps(obj, indent=indent).encode()
+
+
+def _fast_id() -> str:
+    """Random 128-bit hex id, without building a uuid.UUID"""
+    return os.urandom(16).hex()
+
 
 class NodeType(Enum):
     """n8n node types for workflow generation"""
@@ -50,13 +82,64 @@ class NodeType(Enum):
     NOTION = "n8n-nodes-base.notion"
 
 
-@dataclass
+# Spaces and characters that are unsafe in file names -> "_"
+_FILENAME_TRANS = str.maketrans(dict.fromkeys(' /\\:*?"<>|', "_"))
+
+# Outermost {...} span of a model response (greedy, so nested objects stay whole)
+_JSON_BLOCK_RE = re.compile(r'\{[\s\S]*\}')
+
+# Trigger name -> (node type, parameter template). A None webhook path is
+# filled with a fresh random path per node.
+_TRIGGER_MAP = MappingProxyType({
+    "webhook": (NodeType.TRIGGER_WEBHOOK, {
+        "httpMethod": "POST",
+        "path": None,
+        "responseMode": "lastNode"
+    }),
+    "schedule": (NodeType.TRIGGER_SCHEDULE, {
+        "rule": {"interval": [{"field": "hours", "hoursInterval": 1}]}
+    }),
+    "manual": (NodeType.TRIGGER_MANUAL, {}),
+    "email": (NodeType.TRIGGER_WEBHOOK, {
+        "httpMethod": "POST",
+        "path": "email-trigger",
+        "responseMode": "lastNode"
+    }),
+})
+
+# App key -> (node type, parameter template); matched on the app name with
+# spaces removed, exactly first and then as a substring in this order
+_APP_MAP = MappingProxyType({
+    "gmail": (NodeType.GMAIL, {"operation": "send"}),
+    "outlook": (NodeType.OUTLOOK, {"operation": "sendEmail"}),
+    "slack": (NodeType.SLACK, {"operation": "postMessage"}),
+    "teams": (NodeType.TEAMS, {"operation": "sendMessage"}),
+    "sheets": (NodeType.SHEETS, {"operation": "appendOrUpdate"}),
+    "excel": (NodeType.EXCEL, {"operation": "appendRow"}),
+    "zoho": (NodeType.ZOHO_CRM, {"operation": "create"}),
+    "notion": (NodeType.NOTION, {"operation": "create"}),
+})
+
+_LLM_NODE_TYPE = MappingProxyType({
+    "gemini": NodeType.AI_GOOGLE,
+    "openai": NodeType.AI_OPENAI,
+    "anthropic": NodeType.AI_ANTHROPIC,
+})
+
+_LLM_MODEL_ID = MappingProxyType({
+    "gemini": "gemini-2.5-flash",
+    "openai": "gpt-4o",
+    "anthropic": "claude-sonnet-4-5-20250929",
+})
+
+
+@dataclass(slots=True)
 class N8NNode:
     """Represents an n8n workflow node"""
     id: str
     name: str
     type: str
-    position: List[int]
+    position: Sequence[int]
     parameters: Dict[str, Any] = field(default_factory=dict)
     credentials: Dict[str, Any] = field(default_factory=dict)
     type_version: float = 1.0
@@ -75,25 +158,10 @@ class N8NNode:
         return node_dict
 
 
-@dataclass
-class N8NConnection:
-    """Represents a connection between nodes"""
-    source_node: str
-    source_output: int
-    target_node: str
-    target_input: int
+_node_to_dict = operator.methodcaller("to_dict")
 
-    def to_dict(self) -> Dict:
-        return {
-            "main": [[{
-                "node": self.target_node,
-                "type": "main",
-                "index": self.target_input
-            }]]
-        }
 
-
-@dataclass
+@dataclass(slots=True)
 class N8NWorkflow:
     """Complete n8n workflow structure"""
     name: str
@@ -101,54 +169,77 @@ class N8NWorkflow:
     connections: Dict[str, Any] = field(default_factory=dict)
     settings: Dict[str, Any] = field(default_factory=dict)
     tags: List[str] = field(default_factory=list)
+    id: str = field(init=False)
+    created_at: str = field(init=False)
+
+    # Used when no settings are given; shared by every to_dict(), don't mutate
+    _DEFAULT_SETTINGS = {
+        "executionOrder": "v1",
+        "saveManualExecutions": True,
+        "callerPolicy": "workflowsFromSameOwner"
+    }
 
     def __post_init__(self):
-        self.id = str(uuid.uuid4())
+        self.id = _fast_id()
         self.created_at = datetime.now().isoformat()
 
     def add_node(self, node: N8NNode):
         self.nodes.append(node)
 
+    def add_nodes(self, nodes: Iterable[N8NNode]):
+        self.nodes.extend(nodes)
+
+    def connect_many(self, edges: Iterable[Tuple[str, str]]):
+        """Connect each (source, target) pair, main output 0 to input 0"""
+        connections = self.connections
+        for source_name, target_name in edges:
+            connections.setdefault(source_name, {"main": [[]]})["main"][0].append({
+                "node": target_name,
+                "type": "main",
+                "index": 0
+            })
+
     def connect(self, source_name: str, target_name: str,
                 source_output: int = 0, target_input: int = 0):
-        if source_name not in self.connections:
-            self.connections[source_name] = {"main": [[]]}
+        link = {"node": target_name, "type": "main", "index": target_input}
+        outputs = self.connections.get(source_name)
+        if outputs is None:
+            # First link from this node: build its output arrays directly
+            main = [[] for _ in range(source_output)]
+            main.append([link])
+            self.connections[source_name] = {"main": main}
+            return
 
         # Ensure we have enough output arrays
-        while len(self.connections[source_name]["main"]) <= source_output:
-            self.connections[source_name]["main"].append([])
-
-        self.connections[source_name]["main"][source_output].append({
-            "node": target_name,
-            "type": "main",
-            "index": target_input
-        })
+        main = outputs["main"]
+        if len(main) <= source_output:
+            main.extend([] for _ in range(source_output - len(main) + 1))
+        main[source_output].append(link)
 
     def to_dict(self) -> Dict:
         return {
             "id": self.id,
             "name": self.name,
-            "nodes": [n.to_dict() for n in self.nodes],
+            "nodes": list(map(_node_to_dict, self.nodes)),
             "connections": self.connections,
-            "settings": self.settings or {
-                "executionOrder": "v1",
-                "saveManualExecutions": True,
-                "callerPolicy": "workflowsFromSameOwner"
-            },
+            "settings": self.settings or self._DEFAULT_SETTINGS,
             "staticData": None,
             "tags": self.tags,
             "meta": {
-                "instanceId": str(uuid.uuid4()),
+                "instanceId": _fast_id(),
                 "templateCredsSetupCompleted": True
             },
             "pinData": {}
         }
 
     def to_json(self, indent: int = 2) -> str:
-        return json.dumps(self.to_dict(), indent=indent)
+        return self.to_json_bytes(indent).decode()
+
+    def to_json_bytes(self, indent: int = 2) -> bytes:
+        return _dump_json(self.to_dict(), indent)
 
     def save(self, path: Path):
-        path.write_text(self.to_json())
+        path.write_bytes(self.to_json_bytes())
 
 
 class AutomationCategory(Enum):
@@ -165,7 +256,24 @@ class AutomationCategory(Enum):
     INTEGRATION = "integration"
 
 
-@dataclass
+# Idea keyword -> category, in priority order
+_CATEGORY_KEYWORDS = {
+    "email": AutomationCategory.EMAIL_TRIAGE,
+    "data": AutomationCategory.DATA_ENTRY,
+    "crm": AutomationCategory.CRM_UPDATE,
+    "schedule": AutomationCategory.SCHEDULING,
+    "document": AutomationCategory.DOCUMENT_PROCESSING,
+    "communication": AutomationCategory.COMMUNICATION,
+    "report": AutomationCategory.REPORTING,
+    "file": AutomationCategory.FILE_MANAGEMENT,
+}
+_CATEGORY_RANK = {key: i for i, key in enumerate(_CATEGORY_KEYWORDS)}
+# One scan for every keyword; the lookahead also reports overlapping hits
+# (e.g. both "file" and "email" in "filemail") so priority is preserved
+_CATEGORY_RE = re.compile("(?=(" + "|".join(_CATEGORY_KEYWORDS) + "))")
+
+
+@dataclass(slots=True)
 class DiscoveredAutomation:
     """Represents an automation opportunity discovered from video analysis"""
     id: str
@@ -183,27 +291,14 @@ class DiscoveredAutomation:
     @classmethod
     def from_analysis_dict(cls, data: Dict) -> 'DiscoveredAutomation':
         """Create from video analysis output"""
-        category_map = {
-            "email": AutomationCategory.EMAIL_TRIAGE,
-            "data": AutomationCategory.DATA_ENTRY,
-            "crm": AutomationCategory.CRM_UPDATE,
-            "schedule": AutomationCategory.SCHEDULING,
-            "document": AutomationCategory.DOCUMENT_PROCESSING,
-            "communication": AutomationCategory.COMMUNICATION,
-            "report": AutomationCategory.REPORTING,
-            "file": AutomationCategory.FILE_MANAGEMENT,
-        }
-
-        # Infer category from keywords
+        # Infer category from keywords; the earliest-listed keyword wins
         category = AutomationCategory.INTEGRATION
-        idea_lower = data.get("idea", "").lower()
-        for key, cat in category_map.items():
-            if key in idea_lower:
-                category = cat
-                break
+        found = {m.group(1) for m in _CATEGORY_RE.finditer(data.get("idea", "").lower())}
+        if found:
+            category = _CATEGORY_KEYWORDS[min(found, key=_CATEGORY_RANK.__getitem__)]
 
         return cls(
-            id=str(uuid.uuid4()),
+            id=_fast_id(),
             name=data.get("idea", "Unnamed Automation"),
             category=category,
             description=data.get("description", ""),
@@ -217,6 +312,90 @@ class DiscoveredAutomation:
         )
 
 
+# Agent system prompt, filled with str.format_map
+_AGENT_PROMPT_TEMPLATE = """You are an EVA (Executive Virtual Assistant) agent specialized in {category}.
+
+Your task: {task}
+
+Source Applications: {source_apps}
+Target Applications: {target_apps}
+
+Guidelines:
+1. Analyze incoming data carefully before taking action
+2. Validate all data before processing
+3. Log all decisions for audit purposes
+4. Handle errors gracefully with clear messages
+5. Maintain consistency across all operations
+
+Actions to perform: {actions}
+
+Always respond with structured JSON containing:
+- decision: Your decision on how to process
+- confidence: Confidence level (high/medium/low)
+- actions: List of actions to take
+- reasoning: Brief explanation of your decision
+"""
+
+# Code-node JavaScript, filled with str.format_map ({{ }} are literal braces)
+_TRANSFORM_TEMPLATE = """// Auto-generated transformation for: {name}
+// Category: {category}
+
+const items = $input.all();
+const results = [];
+
+for (const item of items) {{
+  const data = item.json;
+
+  // Parse AI agent response
+  const agentResponse = typeof data === 'string' ? JSON.parse(data) : data;
+
+  // Transform data for target systems
+  const transformed = {{
+    timestamp: new Date().toISOString(),
+    source: '{source}',
+    category: '{category}',
+    decision: agentResponse.decision || 'default',
+    confidence: agentResponse.confidence || 'medium',
+    payload: agentResponse.actions || [data],
+    metadata: {{
+      automationId: '{auto_id}',
+      complexity: '{complexity}',
+      generatedBy: 'EVA-WorkflowGenerator'
+    }}
+  }};
+
+  results.push({{ json: transformed }});
+}}
+
+return results;
+"""
+
+
+# Prompts and transform code depend only on a few automation fields, which
+# batches of similar automations share, so both are memoized on those.
+@functools.lru_cache(maxsize=512)
+def _agent_prompt(category: str, task: str, source_apps: Tuple[str, ...],
+                  target_apps: Tuple[str, ...], actions: Tuple[str, ...]) -> str:
+    """System prompt for a generated workflow's AI agent"""
+    return _AGENT_PROMPT_TEMPLATE.format_map({
+        "category": category,
+        "task": task,
+        "source_apps": ", ".join(source_apps) if source_apps else "Various",
+        "target_apps": ", ".join(target_apps) if target_apps else "Various",
+        "actions": ", ".join(actions) if actions else "Process and route data",
+    })
+
+
+@functools.lru_cache(maxsize=512)
+def _transform_code_parts(name: str, category: str, source: str,
+                          complexity: str) -> Tuple[str, str]:
+    """Transform code split around the automation id, which is unique per call"""
+    head, _, tail = _TRANSFORM_TEMPLATE.partition("{auto_id}")
+    params = {"name": name, "category": category, "source": source,
+              "complexity": complexity}
+    return head.format_map(params), tail.format_map(params)
+
+
 class WorkflowGenerator:
     """Generates n8n workflows from discovered automations"""
 
@@ -232,33 +411,19 @@ class WorkflowGenerator:
 
     def _next_id(self) -> str:
         self.node_counter += 1
-        return str(uuid.uuid4())
+        return _fast_id()
 
-    def _position(self, col: int, row: int = 0) -> List[int]:
-        return [self.X_START + col * self.X_SPACING,
-                self.Y_START + row * self.Y_SPACING]
+    def _position(self, col: int, row: int = 0) -> Tuple[int, int]:
+        return (self.X_START + col * self.X_SPACING,
+                self.Y_START + row * self.Y_SPACING)
 
     def generate_trigger_node(self, trigger_type: str, workflow: N8NWorkflow,
-                             position: List[int]) -> N8NNode:
+                             position: Sequence[int]) -> N8NNode:
         """Generate appropriate trigger node"""
-        trigger_map = {
-            "webhook": (NodeType.TRIGGER_WEBHOOK, {
-                "httpMethod": "POST",
-                "path": f"automation-{uuid.uuid4().hex[:8]}",
-                "responseMode": "lastNode"
-            }),
-            "schedule": (NodeType.TRIGGER_SCHEDULE, {
-                "rule": {"interval": [{"field": "hours", "hoursInterval": 1}]}
-            }),
-            "manual": (NodeType.TRIGGER_MANUAL, {}),
-            "email": (NodeType.TRIGGER_WEBHOOK, {
-                "httpMethod": "POST",
-                "path": "email-trigger",
-                "responseMode": "lastNode"
-            }),
-        }
-
-        node_type, params = trigger_map.get(trigger_type, trigger_map["manual"])
+        node_type, params = _TRIGGER_MAP.get(trigger_type, _TRIGGER_MAP["manual"])
+        params = params.copy()
+        if "path" in params and params["path"] is None:
+            params["path"] = f"automation-{os.urandom(4).hex()}"
 
         node = N8NNode(
             id=self._next_id(),
@@ -272,7 +437,7 @@ class WorkflowGenerator:
         return node
 
     def generate_ai_agent_node(self, name: str, system_prompt: str,
-                               workflow: N8NWorkflow, position: List[int],
+                               workflow: N8NWorkflow, position: Sequence[int],
                                tools: List[str] = None) -> N8NNode:
         """Generate an AI agent node with LLM and memory"""
 
@@ -294,23 +459,15 @@ class WorkflowGenerator:
         workflow.add_node(agent_node)
 
         # LLM Model node
-        llm_type = {
-            "gemini": NodeType.AI_GOOGLE,
-            "openai": NodeType.AI_OPENAI,
-            "anthropic": NodeType.AI_ANTHROPIC
-        }.get(self.default_llm, NodeType.AI_GOOGLE)
+        llm_type = _LLM_NODE_TYPE.get(self.default_llm, NodeType.AI_GOOGLE)
 
         llm_node = N8NNode(
             id=self._next_id(),
             name=f"{name} LLM",
             type=llm_type.value,
-            position=[position[0] + 50, position[1] + 180],
+            position=(position[0] + 50, position[1] + 180),
             parameters={
-                "modelId": {
-                    "gemini": "gemini-2.5-flash",
-                    "openai": "gpt-4o",
-                    "anthropic": "claude-sonnet-4-5-20250929"
-                }.get(self.default_llm, "gemini-2.5-flash"),
+                "modelId": _LLM_MODEL_ID.get(self.default_llm, "gemini-2.5-flash"),
                 "options": {
                     "temperature": 0.7
                 }
@@ -324,7 +481,7 @@ class WorkflowGenerator:
             id=self._next_id(),
             name=f"{name} Memory",
             type=NodeType.AI_MEMORY.value,
-            position=[position[0] + 200, position[1] + 180],
+            position=(position[0] + 200, position[1] + 180),
             parameters={
                 "sessionIdType": "customKey",
                 "sessionKey": "={{ $json.sessionId || 'default' }}"
@@ -336,32 +493,25 @@ class WorkflowGenerator:
         return agent_node
 
     def generate_integration_node(self, app_name: str, action: str,
-                                  workflow: N8NWorkflow, position: List[int]) -> N8NNode:
+                                  workflow: N8NWorkflow, position: Sequence[int]) -> N8NNode:
         """Generate app integration node"""
-        app_map = {
-            "gmail": (NodeType.GMAIL, {"operation": "send"}),
-            "outlook": (NodeType.OUTLOOK, {"operation": "sendEmail"}),
-            "slack": (NodeType.SLACK, {"operation": "postMessage"}),
-            "teams": (NodeType.TEAMS, {"operation": "sendMessage"}),
-            "sheets": (NodeType.SHEETS, {"operation": "appendOrUpdate"}),
-            "excel": (NodeType.EXCEL, {"operation": "appendRow"}),
-            "zoho": (NodeType.ZOHO_CRM, {"operation": "create"}),
-            "notion": (NodeType.NOTION, {"operation": "create"}),
-        }
-
         app_key = app_name.lower().replace(" ", "")
-        for key, (node_type, params) in app_map.items():
-            if key in app_key:
-                node = N8NNode(
-                    id=self._next_id(),
-                    name=f"{app_name} - {action}",
-                    type=node_type.value,
-                    position=position,
-                    parameters=params,
-                    type_version=2.0
-                )
-                workflow.add_node(node)
-                return node
+        match = _APP_MAP.get(app_key)
+        if match is None:
+            # e.g. "Google Sheets" -> "googlesheets" still maps to sheets
+            match = next((v for k, v in _APP_MAP.items() if k in app_key), None)
+        if match is not None:
+            node_type, params = match
+            node = N8NNode(
+                id=self._next_id(),
+                name=f"{app_name} - {action}",
+                type=node_type.value,
+                position=position,
+                parameters=params.copy(),
+                type_version=2.0
+            )
+            workflow.add_node(node)
+            return node
 
         # Default to HTTP request for unknown apps
         node = N8NNode(
@@ -380,7 +530,7 @@ class WorkflowGenerator:
         return node
 
     def generate_code_node(self, name: str, code: str,
-                           workflow: N8NWorkflow, position: List[int]) -> N8NNode:
+                           workflow: N8NWorkflow, position: Sequence[int]) -> N8NNode:
         """Generate a code execution node"""
         node = N8NNode(
             id=self._next_id(),
@@ -418,7 +568,7 @@ class WorkflowGenerator:
             workflow,
             self._position(1)
         )
-        workflow.connect(trigger_node.name, agent_node.name)
+        edges = [(trigger_node.name, agent_node.name)]
 
         # 3. Add data transformation
         transform_code = self._generate_transform_code(automation)
@@ -428,7 +578,7 @@ class WorkflowGenerator:
             workflow,
             self._position(2)
         )
-        workflow.connect(agent_node.name, transform_node.name)
+        edges.append((agent_node.name, transform_node.name))
 
         # 4. Add target app integrations
         prev_node = transform_node
@@ -437,111 +587,83 @@ class WorkflowGenerator:
             integration_node = self.generate_integration_node(
                 target_app, action, workflow, self._position(3 + i)
             )
-            workflow.connect(prev_node.name, integration_node.name)
+            edges.append((prev_node.name, integration_node.name))
             prev_node = integration_node
 
+        workflow.connect_many(edges)
         return workflow
 
     def _generate_agent_prompt(self, automation: DiscoveredAutomation) -> str:
         """Generate system prompt for the AI agent"""
-        return f"""You are an EVA (Executive Virtual Assistant) agent specialized in {automation.category.value}.
-
-Your task: {automation.description or automation.name}
-
-Source Applications: {', '.join(automation.source_apps) if automation.source_apps else 'Various'}
-Target Applications: {', '.join(automation.target_apps) if automation.target_apps else 'Various'}
-
-Guidelines:
-1. Analyze incoming data carefully before taking action
-2. Validate all data before processing
-3. Log all decisions for audit purposes
-4. Handle errors gracefully with clear messages
-5. Maintain consistency across all operations
-
-Actions to perform: {', '.join(automation.actions) if automation.actions else 'Process and route data'}
-
-Always respond with structured JSON containing:
-- decision: Your decision on how to process
-- confidence: Confidence level (high/medium/low)
-- actions: List of actions to take
-- reasoning: Brief explanation of your decision
-"""
+        return _agent_prompt(
+            automation.category.value,
+            automation.description or automation.name,
+            tuple(automation.source_apps),
+            tuple(automation.target_apps),
+            tuple(automation.actions),
+        )
 
     def _generate_transform_code(self, automation: DiscoveredAutomation) -> str:
         """Generate JavaScript transformation code"""
-        return f"""// Auto-generated transformation for: {automation.name}
-// Category: {automation.category.value}
-
-const items = $input.all();
-const results = [];
-
-for (const item of items) {{
-  const data = item.json;
-
-  // Parse AI agent response
-  const agentResponse = typeof data === 'string' ? JSON.parse(data) : data;
+        head, tail = _transform_code_parts(
+            automation.name,
+            automation.category.value,
+            automation.source_apps[0] if automation.source_apps else "input",
+            automation.complexity,
+        )
+        return f"{head}{automation.id}{tail}"
 
-  // Transform data for target systems
-  const transformed = {{
-    timestamp: new Date().toISOString(),
-    source: '{automation.source_apps[0] if automation.source_apps else "input"}',
-    category: '{automation.category.value}',
-    decision: agentResponse.decision || 'default',
-    confidence: agentResponse.confidence || 'medium',
-    payload: agentResponse.actions || [data],
-    metadata: {{
-      automationId: '{automation.id}',
-      complexity: '{automation.complexity}',
-      generatedBy: 'EVA-WorkflowGenerator'
-    }}
-  }};
+    def generate_from_analysis(self, analysis_path: Path) -> List[N8NWorkflow]:
+        """Generate workflows from video analysis JSON output"""
 
-  results.push({{ json: transformed }});
-}}
+        analysis_data = _loads(analysis_path.read_bytes())
 
-return results;
-"""
+        # Segments are independent CPU-bound work; spread long analyses over
+        # processes (map keeps segment order), short ones aren't worth the spawn
+        if len(analysis_data) >= _PARALLEL_MIN_SEGMENTS and (os.cpu_count() or 1) > 1:
+            worker = functools.partial(_segment_workflows, type(self), self.default_llm)
+            with ProcessPoolExecutor() as pool:
+                per_segment = list(pool.map(worker, analysis_data, chunksize=4))
+        else:
+            per_segment = map(self.generate_segment_workflows, analysis_data)
 
-    def generate_from_analysis(self, analysis_path: Path) -> List[N8NWorkflow]:
-        """Generate workflows from video analysis JSON output"""
+        return [wf for workflows in per_segment for wf in workflows]
 
-        analysis_data = json.loads(analysis_path.read_text())
+    def generate_segment_workflows(self, segment: Dict) -> List[N8NWorkflow]:
+        """Generate workflows for one segment of a video analysis"""
+        analysis = segment.get("analysis", "")
         workflows = []
 
-        for segment in analysis_data:
-            analysis = segment.get("analysis", "")
-
-            # Try to parse structured automation data
-            try:
-                # Handle both string and dict analysis
-                if isinstance(analysis, str):
-                    # Try to extract JSON from the analysis text
-                    import re
-                    json_match = re.search(r'\{[\s\S]*\}', analysis)
-                    if json_match:
-                        analysis = json.loads(json_match.group())
-
-                if isinstance(analysis, dict):
-                    automations = analysis.get("automation", [])
-                    for auto_data in automations:
-                        automation = DiscoveredAutomation.from_analysis_dict(auto_data)
-                        workflow = self.generate_workflow(automation)
-                        workflows.append(workflow)
-
-            except (json.JSONDecodeError, KeyError) as e:
-                # If parsing fails, create a generic workflow
-                automation = DiscoveredAutomation(
-                    id=str(uuid.uuid4()),
-                    name=f"Automation from Segment {segment.get('segment', 'unknown')}",
-                    category=AutomationCategory.INTEGRATION,
-                    description=str(analysis)[:500],
-                    source_apps=[],
-                    target_apps=[],
-                    complexity="medium",
-                    triggers=["manual"],
-                    actions=["process"]
-                )
-                workflows.append(self.generate_workflow(automation))
+        # Try to parse structured automation data
+        try:
+            # Handle both string and dict analysis
+            if isinstance(analysis, str) and "{" in analysis:
+                # Try to extract JSON from the analysis text
+                json_match = _JSON_BLOCK_RE.search(analysis)
+                if json_match:
+                    analysis = _loads(json_match.group())
+
+            if isinstance(analysis, dict):
+                automations = analysis.get("automation", [])
+                for auto_data in automations:
+                    automation = DiscoveredAutomation.from_analysis_dict(auto_data)
+                    workflow = self.generate_workflow(automation)
+                    workflows.append(workflow)
+
+        except (json.JSONDecodeError, KeyError) as e:  # orjson's error subclasses it
+            # If parsing fails, create a generic workflow
+            automation = DiscoveredAutomation(
+                id=_fast_id(),
+                name=f"Automation from Segment {segment.get('segment', 'unknown')}",
+                category=AutomationCategory.INTEGRATION,
+                description=str(analysis)[:500],
+                source_apps=[],
+                target_apps=[],
+                complexity="medium",
+                triggers=["manual"],
+                actions=["process"]
+            )
+            workflows.append(self.generate_workflow(automation))
 
         return workflows
 
@@ -549,16 +671,19 @@ return results;
         """Save all workflows to directory"""
         output_dir.mkdir(parents=True, exist_ok=True)
 
+        generated_at = datetime.now().isoformat()
         manifest = {
-            "generated_at": datetime.now().isoformat(),
+            "generated_at": generated_at,
             "workflow_count": len(workflows),
             "workflows": []
         }
 
+        # Serialize up front (keyed by file, so a repeated name still ends up
+        # holding the last workflow), then write the files concurrently
+        payloads = {}
         for workflow in workflows:
-            filename = f"{workflow.name.replace(' ', '_').lower()}.json"
-            filepath = output_dir / filename
-            workflow.save(filepath)
+            filename = f"{workflow.name.translate(_FILENAME_TRANS).lower()}.json"
+            payloads[filename] = workflow.to_json_bytes()
 
             manifest["workflows"].append({
                 "id": workflow.id,
@@ -567,13 +692,28 @@ return results;
                 "tags": workflow.tags
             })
 
+        if payloads:
+            with ThreadPoolExecutor(max_workers=min(32, len(payloads))) as pool:
+                list(pool.map(lambda item: (output_dir / item[0]).write_bytes(item[1]),
+                              payloads.items()))
+
         # Save manifest
         manifest_path = output_dir / "_manifest.json"
-        manifest_path.write_text(json.dumps(manifest, indent=2))
+        manifest_path.write_bytes(_dump_json(manifest))
 
         return manifest
 
 
+# Below this many segments a process pool costs more than it saves
+_PARALLEL_MIN_SEGMENTS = 64
+
+
+def _segment_workflows(generator_cls: type, default_llm: str,
+                       segment: Dict) -> List[N8NWorkflow]:
+    """Process-pool entry point for WorkflowGenerator.generate_segment_workflows"""
+    return generator_cls(default_llm=default_llm).generate_segment_workflows(segment)
+
+
 # CLI Interface
 def main():
     import argparse
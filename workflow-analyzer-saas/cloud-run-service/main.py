@@ -7,5 +7,6 @@ from video_analyzer import app
 
 if __name__ == '__main__':
     import os
+    import uvicorn
     port = int(os.environ.get('PORT', 8080))
-    app.run(host='0.0.0.0', port=port)
\ No newline at end of file
+    uvicorn.run(app, host='0.0.0.0', port=port)
\ No newline at end of file
@@ -3,12 +3,24 @@ Enhanced video analyzer with Gemini 2.0 Flash integration
 Optimized for workflow analysis and screen recording processing
 """
 
+import functools
+import gzip
+import hashlib
+import hmac
 import os
 import json
+import queue
+import re
 import logging
+import shutil
+import subprocess
 import tempfile
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set, Tuple
 import asyncio
 from dataclasses import dataclass
 import google.generativeai as genai
@@ -18,18 +30,85 @@ import numpy as np
 from PIL import Image
 import io
 import base64
-import requests
+import aiofiles
 import aiohttp
 from urllib.parse import urlparse
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+try:
+    import orjson  # optional speed-up, stdlib json otherwise
+except ImportError:
+    orjson = None
+
+
+def _dumps(obj: Any) -> str:
+    """Serialize to a JSON string, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj)
+
+
+def _dumps_signed(obj: Any) -> bytes:
+    """Serialize to compact, key-sorted JSON bytes for signing"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(obj, sort_keys=True, separators=(',', ':')).encode()
+
+
+# Gemini model used for frame analysis
+_MODEL_NAME = 'gemini-2.5-flash'
+
+# Download chunk size; large reads keep per-chunk Python overhead negligible
+_DOWNLOAD_CHUNK = 1 << 20
+
+# Downloads revalidated by ETag/Last-Modified can be kept here, most recent first,
+# up to this many bytes in total. Off by default: Cloud Run's /tmp is instance
+# memory, and signed or expiring URLs rarely hit the cache.
+_DOWNLOAD_CACHE_DIR = Path(tempfile.gettempdir()) / "video-analyzer-cache"
+_DOWNLOAD_CACHE_MAX_BYTES = int(os.environ.get("DOWNLOAD_CACHE_MAX_BYTES", "0"))
+
+# ffmpeg pipes sampled frames and ffprobe sizes them; without either, OpenCV decodes
+_FFMPEG = shutil.which("ffmpeg")
+_FFPROBE = shutil.which("ffprobe")
+
+# Bounded hand-off between the OpenCV decode, convert and package stages
+_PIPELINE_DEPTH = 4
+
+# Webhook bodies at least this large are gzipped when WEBHOOK_GZIP is enabled
+_GZIP_MIN_BYTES = 4096
+
+# Frames are downscaled to fit this box and sent to Gemini as JPEG
+_FRAME_MAX_SIZE = (1280, 720)
+_JPEG_QUALITY = 80
+
+# "Step"/"step" occurrences and any-case "error"/"issue", tallied in one scan
+_SUMMARY_TERMS_RE = re.compile(r'(?P<step>[Ss]tep)|(?P<issue>(?i:error|issue))')
+
+
+def _encode_frame(rgb: np.ndarray) -> Dict[str, Any]:
+    """Downscale a frame and JPEG-encode it as a Gemini inline blob"""
+    height, width = rgb.shape[:2]
+    # Wrap the array without copying; thumbnail() swaps in a new buffer
+    image = Image.frombuffer('RGB', (width, height), np.ascontiguousarray(rgb), 'raw', 'RGB', 0, 1)
+    if width > _FRAME_MAX_SIZE[0] or height > _FRAME_MAX_SIZE[1]:
+        image.thumbnail(_FRAME_MAX_SIZE, Image.Resampling.BILINEAR)
+    buf = io.BytesIO()
+    image.save(buf, 'JPEG', quality=_JPEG_QUALITY)
+    return {'mime_type': 'image/jpeg', 'data': buf.getvalue()}
+
+
+@functools.lru_cache(maxsize=None)
+def _gemini_model(name: str) -> genai.GenerativeModel:
+    """Shared GenerativeModel per model name"""
+    return genai.GenerativeModel(name)
+
 
 @dataclass
 class FrameData:
     timestamp: float
-    image: Image.Image
+    rgb: np.ndarray            # (height, width, 3) uint8
     frame_number: int
 
 
@@ -43,92 +122,336 @@ class VideoAnalyzer:
         
         # Initialize Gemini
         genai.configure(api_key=os.environ.get("GOOGLE_GEMINI_API_KEY"))
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        self.model = _gemini_model(_MODEL_NAME)
+        
+        # Blocking Gemini calls run here so they never stall the event loop
+        self._gemini_exec = ThreadPoolExecutor(max_workers=8, thread_name_prefix='gemini')
         
         # Webhook configuration
         self.webhook_url = os.environ.get("WEBHOOK_URL")
         self.webhook_secret = os.environ.get("WEBHOOK_SECRET")
+        self.webhook_gzip = os.environ.get("WEBHOOK_GZIP", "").lower() in ("1", "true", "yes")
+        
+        # Shared HTTP session, created lazily since it needs a running loop
+        self._http: Optional[aiohttp.ClientSession] = None
+        self._wh_session: Optional[aiohttp.ClientSession] = None
+        
+        # Cached downloads in use by running analyses, never evicted
+        self._pinned: Counter = Counter()
+        
+        # Fire-and-forget analysis and webhook tasks, referenced until they finish
+        self._background: Set[asyncio.Task] = set()
+        
+    def _get_http(self) -> aiohttp.ClientSession:
+        """Return the shared aiohttp session, creating it on first use"""
+        if self._http is None or self._http.closed:
+            self._http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=32, ttl_dns_cache=300)
+            )
+        return self._http
+    
+    async def _get_wh_session(self) -> aiohttp.ClientSession:
+        """Return the keep-alive webhook session, creating it on first use"""
+        if self._wh_session is None or self._wh_session.closed:
+            self._wh_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=20, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=10)
+            )
+        return self._wh_session
+    
+    async def close(self):
+        """Close the shared HTTP sessions"""
+        for session in (self._http, self._wh_session):
+            if session is not None and not session.closed:
+                await session.close()
+        self._http = None
+        self._wh_session = None
         
     async def download_video(self, video_url: str) -> str:
-        """Download video to temporary file"""
+        """Download video, reusing a cached copy the server confirms is unchanged"""
         try:
             # Parse URL to get filename
             parsed = urlparse(video_url)
             filename = os.path.basename(parsed.path) or "video.mp4"
             
-            # Create temp file
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=f"_{filename}")
-            
-            # Download video
-            response = requests.get(video_url, stream=True)
-            response.raise_for_status()
-            
-            for chunk in response.iter_content(chunk_size=8192):
-                temp_file.write(chunk)
-            
-            temp_file.close()
-            return temp_file.name
+            # Cache entries are keyed by URL; validators live in a sidecar file
+            key = hashlib.sha256(video_url.encode()).hexdigest()
+            cache_path = _DOWNLOAD_CACHE_DIR / f"{key}{os.path.splitext(filename)[1] or '.mp4'}"
+            meta_path = _DOWNLOAD_CACHE_DIR / f"{key}.meta.json"
+            
+            headers = {}
+            if cache_path.exists() and meta_path.exists():
+                validators = json.loads(meta_path.read_text())
+                if validators.get('etag'):
+                    headers['If-None-Match'] = validators['etag']
+                if validators.get('last_modified'):
+                    headers['If-Modified-Since'] = validators['last_modified']
+            
+            # Download video without blocking the event loop
+            async with self._get_http().get(video_url, headers=headers) as response:
+                if response.status == 304:
+                    os.utime(cache_path)
+                    self._pinned[str(cache_path)] += 1
+                    logger.info(f"Reusing cached download for {filename}")
+                    return str(cache_path)
+                response.raise_for_status()
+                
+                validators = {
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified')
+                }
+                cacheable = _DOWNLOAD_CACHE_MAX_BYTES > 0 and any(validators.values())
+                if cacheable:
+                    _DOWNLOAD_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                
+                # Create temp file
+                temp_file = tempfile.NamedTemporaryFile(
+                    delete=False,
+                    prefix=".part-" if cacheable else "tmp",
+                    suffix=f"_{filename}",
+                    dir=_DOWNLOAD_CACHE_DIR if cacheable else None
+                )
+                temp_file.close()
+                
+                try:
+                    async with aiofiles.open(temp_file.name, 'wb') as f:
+                        async for chunk in response.content.iter_chunked(_DOWNLOAD_CHUNK):
+                            await f.write(chunk)
+                except BaseException:
+                    os.unlink(temp_file.name)
+                    raise
+            
+            if not cacheable:
+                return temp_file.name
+            
+            os.replace(temp_file.name, cache_path)
+            meta_path.write_text(json.dumps(validators))
+            self._pinned[str(cache_path)] += 1
+            self._evict_downloads()
+            return str(cache_path)
             
         except Exception as e:
             logger.error(f"Error downloading video: {str(e)}")
             raise
     
+    def _release_download(self, video_path: str):
+        """Delete a downloaded video, or unpin it if it lives in the cache"""
+        if self._pinned[video_path] > 0:
+            self._pinned[video_path] -= 1
+            if not self._pinned[video_path]:
+                del self._pinned[video_path]
+                self._evict_downloads()  # it may have been kept only while pinned
+            return
+        if os.path.exists(video_path):
+            os.unlink(video_path)
+    
+    def _evict_downloads(self):
+        """Drop the least recently used cached downloads beyond the byte cap"""
+        entries = []
+        for p in _DOWNLOAD_CACHE_DIR.iterdir():
+            if p.name.startswith('.') or p.name.endswith('.meta.json'):
+                continue
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        entries.sort(key=lambda e: e[0], reverse=True)
+        total = 0
+        for _, size, path in entries:
+            total += size
+            if total <= _DOWNLOAD_CACHE_MAX_BYTES or str(path) in self._pinned:
+                continue  # within the cap, or still being analysed
+            total -= size
+            try:
+                path.unlink()
+                (_DOWNLOAD_CACHE_DIR / f"{path.stem}.meta.json").unlink(missing_ok=True)
+            except OSError:
+                pass
+    
+    def _probe_video(self, video_path: str) -> Tuple[float, int]:
+        """Return fps and frame count of a video"""
+        cap = cv2.VideoCapture(video_path)
+        try:
+            return cap.get(cv2.CAP_PROP_FPS), int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        finally:
+            cap.release()
+    
+    def _probe_display_size(self, video_path: str) -> Optional[Tuple[int, int]]:
+        """Width and height of ffmpeg's autorotated output, or None if ffprobe can't tell"""
+        if not _FFPROBE:
+            return None
+        result = subprocess.run(
+            [_FFPROBE, "-v", "error", "-select_streams", "v:0",
+             "-show_entries", "stream=width,height:stream_side_data=rotation:stream_tags=rotate",
+             "-of", "json", video_path],
+            capture_output=True, text=True,
+        )
+        try:
+            stream = json.loads(result.stdout)["streams"][0]
+            width, height = int(stream["width"]), int(stream["height"])
+        except (ValueError, KeyError, IndexError):
+            return None
+        # Rotation metadata: display-matrix side data, or the older "rotate" tag
+        rotation = stream.get("tags", {}).get("rotate", 0)
+        for side_data in stream.get("side_data_list", []):
+            rotation = side_data.get("rotation", rotation)
+        if int(float(rotation)) % 180:
+            width, height = height, width
+        return width, height
+    
     def extract_frames(self, video_path: str, interval_seconds: int = 5, max_frames: int = 20) -> List[FrameData]:
         """Extract frames from video at specified intervals"""
-        frames = []
-        cap = None
-        
         try:
-            cap = cv2.VideoCapture(video_path)
-            
             # Get video properties
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            fps, total_frames = self._probe_video(video_path)
             duration = total_frames / fps if fps > 0 else 0
             
             logger.info(f"Video info: FPS={fps}, Total frames={total_frames}, Duration={duration}s")
             
-            # Calculate frame interval
-            frame_interval = int(fps * interval_seconds)
-            if frame_interval < 1:
-                frame_interval = 1
+            # ffmpeg decodes only the sampled frames; OpenCV is the fallback.
+            # Frame size comes from ffprobe, matching ffmpeg's own rotation
+            # handling; OpenCV's auto-rotated size can disagree with it.
+            size = self._probe_display_size(video_path) if _FFMPEG else None
+            if size and size[0] > 0 and size[1] > 0:
+                width, height = size
+                frames = self._extract_frames_ffmpeg(
+                    video_path, fps, width, height, interval_seconds, max_frames
+                )
+            else:
+                frames = self._extract_frames_cv2(video_path, fps, interval_seconds, max_frames)
             
-            frame_count = 0
-            extracted_count = 0
+            logger.info(f"Extracted {len(frames)} frames from video")
+            return frames
             
-            while cap.isOpened() and extracted_count < max_frames:
-                ret, frame = cap.read()
-                if not ret:
+        except Exception as e:
+            logger.error(f"Error extracting frames: {str(e)}")
+            raise
+    
+    def _extract_frames_ffmpeg(self, video_path: str, fps: float, width: int, height: int,
+                               interval_seconds: int, max_frames: int) -> List[FrameData]:
+        """Pipe sampled frames out of ffmpeg as raw RGB24"""
+        frames = []
+        frame_size = width * height * 3
+        cmd = [
+            _FFMPEG, "-loglevel", "error",
+            "-i", video_path,
+            "-vf", f"fps=1/{interval_seconds}",
+            "-frames:v", str(max_frames),
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-",
+        ]
+        
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            while len(frames) < max_frames:
+                buf = proc.stdout.read(frame_size)
+                if len(buf) < frame_size:
                     break
                 
-                if frame_count % frame_interval == 0:
-                    # Convert BGR to RGB
-                    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                timestamp = len(frames) * interval_seconds
+                rgb_frame = np.frombuffer(buf, dtype=np.uint8).reshape(height, width, 3)
+                frames.append(FrameData(
+                    timestamp=timestamp,
+                    rgb=rgb_frame,
+                    frame_number=int(round(timestamp * fps))
+                ))
+                logger.info(f"Extracted frame {len(frames)} at {timestamp:.2f}s")
+        finally:
+            proc.stdout.close()
+            stderr = proc.stderr.read()
+            proc.stderr.close()
+            returncode = proc.wait()
+        
+        if returncode != 0 and not frames:
+            raise RuntimeError(f"ffmpeg failed: {stderr.decode(errors='replace').strip()}")
+        return frames
+    
+    def _extract_frames_cv2(self, video_path: str, fps: float,
+                            interval_seconds: int, max_frames: int) -> List[FrameData]:
+        """Extract frames with OpenCV, overlapping decode, conversion and packaging"""
+        frames: List[FrameData] = []
+        errors: List[BaseException] = []
+        stop = threading.Event()
+        read_q: queue.Queue = queue.Queue(maxsize=_PIPELINE_DEPTH)
+        convert_q: queue.Queue = queue.Queue(maxsize=_PIPELINE_DEPTH)
+        
+        # Calculate frame interval
+        frame_interval = int(fps * interval_seconds)
+        if frame_interval < 1:
+            frame_interval = 1
+        
+        def read_frames():
+            """Walk the video and queue the sampled BGR frames"""
+            cap = cv2.VideoCapture(video_path)
+            try:
+                frame_count = 0
+                extracted_count = 0
+                while cap.isOpened() and extracted_count < max_frames and not stop.is_set():
+                    # grab() only demuxes; decode just the frames we keep
+                    if not cap.grab():
+                        break
                     
-                    # Convert to PIL Image
-                    pil_image = Image.fromarray(rgb_frame)
+                    if frame_count % frame_interval == 0:
+                        ret, frame = cap.retrieve()
+                        if not ret:
+                            break
+                        read_q.put((frame_count, frame))
+                        extracted_count += 1
                     
-                    # Add to frames list
+                    frame_count += 1
+            except Exception as e:
+                errors.append(e)
+            finally:
+                cap.release()
+                read_q.put(None)
+        
+        def package_frames():
+            """Wrap converted RGB frames as FrameData"""
+            while True:
+                item = convert_q.get()
+                if item is None:
+                    break
+                if errors:
+                    continue
+                frame_count, rgb_frame = item
+                try:
                     frames.append(FrameData(
                         timestamp=frame_count / fps,
-                        image=pil_image,
+                        rgb=rgb_frame,
                         frame_number=frame_count
                     ))
-                    
-                    extracted_count += 1
-                    logger.info(f"Extracted frame {extracted_count} at {frame_count / fps:.2f}s")
-                
-                frame_count += 1
-            
-            logger.info(f"Extracted {len(frames)} frames from video")
-            return frames
-            
+                    logger.info(f"Extracted frame {len(frames)} at {frame_count / fps:.2f}s")
+                except Exception as e:
+                    errors.append(e)
+                    stop.set()
+        
+        reader = threading.Thread(target=read_frames, daemon=True)
+        packager = threading.Thread(target=package_frames, daemon=True)
+        reader.start()
+        packager.start()
+        
+        # Convert BGR to RGB on this thread while the others decode and package
+        try:
+            while True:
+                item = read_q.get()
+                if item is None:
+                    break
+                if not errors:
+                    frame_count, frame = item
+                    convert_q.put((frame_count, cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)))
         except Exception as e:
-            logger.error(f"Error extracting frames: {str(e)}")
-            raise
+            errors.append(e)
+            stop.set()
+            while read_q.get() is not None:
+                pass
         finally:
-            if cap:
-                cap.release()
+            convert_q.put(None)
+            reader.join()
+            packager.join()
+        
+        if errors:
+            raise errors[0]
+        return frames
     
     def prepare_prompt_for_workflow(self, user_prompt: str) -> str:
         """Enhance prompt with workflow-specific instructions"""
@@ -147,24 +470,31 @@ Please structure your response with clear sections and bullet points for easy re
         
         return base_prompt.format(user_prompt=user_prompt)
     
+    @staticmethod
+    def _build_content(enhanced_prompt: str, frames: List[FrameData]) -> List[Any]:
+        """Prompt followed by each frame's timestamp and JPEG part"""
+        content = [enhanced_prompt]
+        
+        # Add frame information
+        for i, frame_data in enumerate(frames):
+            # Add timestamp context
+            content.append(f"\n[Frame {i+1} - Time: {frame_data.timestamp:.2f}s]")
+            content.append(_encode_frame(frame_data.rgb))
+        return content
+    
     async def analyze_frames(self, frames: List[FrameData], prompt: str) -> Dict[str, Any]:
         """Analyze frames using Gemini 2.0 Flash"""
         try:
             # Prepare enhanced prompt
             enhanced_prompt = self.prepare_prompt_for_workflow(prompt)
             
-            # Prepare content for Gemini
-            content = [enhanced_prompt]
-            
-            # Add frame information
-            for i, frame_data in enumerate(frames):
-                # Add timestamp context
-                content.append(f"\n[Frame {i+1} - Time: {frame_data.timestamp:.2f}s]")
-                content.append(frame_data.image)
+            # Prepare content for Gemini; JPEG encoding runs off the event loop
+            content = await asyncio.to_thread(self._build_content, enhanced_prompt, frames)
             
             # Generate analysis
             logger.info(f"Sending {len(frames)} frames to Gemini for analysis")
-            response = self.model.generate_content(content)
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(self._gemini_exec, self.model.generate_content, content)
             
             # Extract structured data from response
             analysis_text = response.text
@@ -175,7 +505,7 @@ Please structure your response with clear sections and bullet points for easy re
                 "metadata": {
                     "frames_analyzed": len(frames),
                     "timestamps": [f.timestamp for f in frames],
-                    "model": "gemini-2.5-flash",
+                    "model": _MODEL_NAME,
                     "analysis_date": datetime.utcnow().isoformat()
                 },
                 "workflow_summary": self._extract_workflow_summary(analysis_text)
@@ -190,20 +520,27 @@ Please structure your response with clear sections and bullet points for easy re
     def _extract_workflow_summary(self, analysis_text: str) -> Dict[str, Any]:
         """Extract key workflow information from analysis text"""
         # This is a simple extraction - could be enhanced with more NLP
-        summary = {
-            "total_steps": analysis_text.count("Step") + analysis_text.count("step"),
-            "has_errors": "error" in analysis_text.lower() or "issue" in analysis_text.lower(),
-            "tools_mentioned": [],
-            "key_sections": []
-        }
+        total_steps = 0
+        has_errors = False
+        for match in _SUMMARY_TERMS_RE.finditer(analysis_text):
+            if match.lastgroup == 'step':
+                total_steps += 1
+            else:
+                has_errors = True
         
         # Extract section headers (lines that might be headers)
-        lines = analysis_text.split('\n')
-        for line in lines:
-            if line.strip() and (line.startswith('#') or line.endswith(':') or line.isupper()):
-                summary["key_sections"].append(line.strip())
+        key_sections = [
+            stripped for line in analysis_text.split('\n')
+            if (stripped := line.strip())
+            and (line.startswith('#') or line.endswith(':') or line.isupper())
+        ]
         
-        return summary
+        return {
+            "total_steps": total_steps,
+            "has_errors": has_errors,
+            "tools_mentioned": [],
+            "key_sections": key_sections
+        }
     
     async def send_webhook_notification(self, analysis_id: str, status: str, **kwargs):
         """Send webhook notification about analysis status"""
@@ -229,48 +566,69 @@ Please structure your response with clear sections and bullet points for easy re
                 'Content-Type': 'application/json'
             }
             
+            # Serialize once so the signed bytes are exactly the bytes sent
+            body = _dumps_signed(payload)
+            if self.webhook_gzip and len(body) >= _GZIP_MIN_BYTES:
+                body = gzip.compress(body)
+                headers['Content-Encoding'] = 'gzip'
+            
             # Add webhook signature if secret is configured
             if self.webhook_secret:
-                import hmac
-                import hashlib
-                payload_str = json.dumps(payload, sort_keys=True)
                 signature = hmac.new(
                     self.webhook_secret.encode(),
-                    payload_str.encode(),
+                    body,
                     hashlib.sha256
                 ).hexdigest()
                 headers['X-Webhook-Signature'] = signature
             
-            # Send webhook
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.webhook_url,
-                    json=payload,
-                    headers=headers,
-                    timeout=aiohttp.ClientTimeout(total=10)
-                ) as response:
-                    if response.status >= 400:
-                        logger.warning(f"Webhook returned status {response.status}")
-                    else:
-                        logger.info(f"Webhook notification sent for {analysis_id}: {status}")
+            # Send webhook over the shared keep-alive session
+            session = await self._get_wh_session()
+            async with session.post(
+                self.webhook_url,
+                data=body,
+                headers=headers
+            ) as response:
+                if response.status >= 400:
+                    logger.warning(f"Webhook returned status {response.status}")
+                else:
+                    logger.info(f"Webhook notification sent for {analysis_id}: {status}")
                         
         except Exception as e:
             logger.error(f"Failed to send webhook notification: {str(e)}")
             # Don't raise - webhook failures shouldn't stop processing
     
+    async def _update_analysis(self, analysis_id: str, fields: Dict[str, Any]):
+        """Update an analyses row; the Supabase client is synchronous, so run it off-loop"""
+        await asyncio.to_thread(
+            lambda: self.supabase.table('analyses').update(fields).eq('id', analysis_id).execute()
+        )
+    
+    def _spawn(self, coro) -> asyncio.Task:
+        """Schedule a background task and keep it referenced until it finishes"""
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+    
+    def _notify(self, analysis_id: str, status: str, **kwargs):
+        """Send a webhook notification without waiting for it"""
+        self._spawn(self.send_webhook_notification(analysis_id, status, **kwargs))
+    
+    def submit_analysis(self, analysis_id: str, video_url: str, prompt: str) -> asyncio.Task:
+        """Start processing an analysis in the background"""
+        return self._spawn(self.process_analysis(analysis_id, video_url, prompt))
+    
     async def process_analysis(self, analysis_id: str, video_url: str, prompt: str):
         """Main processing pipeline"""
         video_path = None
         
         try:
-            # Update status to processing
-            await self.supabase.table('analyses').update({
+            # Send the processing webhook in the background while the status updates
+            self._notify(analysis_id, 'processing')
+            await self._update_analysis(analysis_id, {
                 'status': 'processing',
                 'started_at': datetime.utcnow().isoformat()
-            }).eq('id', analysis_id).execute()
-            
-            # Send webhook notification if configured
-            await self.send_webhook_notification(analysis_id, 'processing')
+            })
             
             # Download video
             logger.info(f"Downloading video from: {video_url}")
@@ -278,7 +636,8 @@ Please structure your response with clear sections and bullet points for easy re
             
             # Extract frames
             logger.info("Extracting frames from video")
-            frames = self.extract_frames(video_path)
+            # ffmpeg/cv2 decoding blocks; keep /health and other requests served
+            frames = await asyncio.to_thread(self.extract_frames, video_path)
             
             if not frames:
                 raise ValueError("No frames could be extracted from the video")
@@ -287,18 +646,18 @@ Please structure your response with clear sections and bullet points for easy re
             logger.info(f"Analyzing {len(frames)} frames with Gemini")
             result = await self.analyze_frames(frames, prompt)
             
-            # Store results
-            await self.supabase.table('analyses').update({
+            # Store results in a single update
+            await self._update_analysis(analysis_id, {
                 'status': 'completed',
                 'completed_at': datetime.utcnow().isoformat(),
-                'result_data': json.dumps(result),
+                'result_data': _dumps(result),
                 'frames_analyzed': result['metadata']['frames_analyzed']
-            }).eq('id', analysis_id).execute()
+            })
             
             logger.info(f"Analysis {analysis_id} completed successfully")
             
             # Send webhook notification
-            await self.send_webhook_notification(
+            self._notify(
                 analysis_id, 
                 'completed', 
                 result=result, 
@@ -307,66 +666,83 @@ Please structure your response with clear sections and bullet points for easy re
             
         except Exception as e:
             logger.error(f"Error processing analysis {analysis_id}: {str(e)}")
-            await self.supabase.table('analyses').update({
-                'status': 'failed',
-                'error_message': str(e),
-                'completed_at': datetime.utcnow().isoformat()
-            }).eq('id', analysis_id).execute()
             
             # Send webhook notification for failure
-            await self.send_webhook_notification(
+            self._notify(
                 analysis_id,
                 'failed',
                 error=str(e)
             )
             
+            try:
+                await self._update_analysis(analysis_id, {
+                    'status': 'failed',
+                    'error_message': str(e),
+                    'completed_at': datetime.utcnow().isoformat()
+                })
+            except Exception as update_error:
+                logger.error(f"Failed to record failure for {analysis_id}: {str(update_error)}")
+            
         finally:
-            # Cleanup temporary file
-            if video_path and os.path.exists(video_path):
+            # Cleanup temporary file; cached downloads are kept for reuse
+            if video_path:
                 try:
-                    os.unlink(video_path)
+                    self._release_download(video_path)
                 except:
                     pass
 
 
-# Flask app integration
-from flask import Flask, request, jsonify
+# ASGI app integration
+from contextlib import asynccontextmanager
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 
-app = Flask(__name__)
 analyzer = VideoAnalyzer()
 
 
-@app.route('/health', methods=['GET'])
-def health_check():
-    return jsonify({'status': 'healthy', 'service': 'workflow-analyzer-runner'}), 200
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Release the analyzer's HTTP sessions on shutdown"""
+    yield
+    await analyzer.close()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.get('/health')
+async def health_check():
+    return {'status': 'healthy', 'service': 'workflow-analyzer-runner'}
 
 
-@app.route('/analyze', methods=['POST'])
-async def analyze_video():
+@app.post('/analyze')
+async def analyze_video(request: Request):
     """Endpoint to trigger video analysis"""
     try:
-        data = request.get_json()
+        data = await request.json()
         analysis_id = data.get('analysis_id')
         video_url = data.get('video_url')
         prompt = data.get('prompt', 'Analyze this workflow video and provide a detailed summary.')
         
         if not analysis_id or not video_url:
-            return jsonify({'error': 'Missing required parameters: analysis_id and video_url'}), 400
+            return JSONResponse({'error': 'Missing required parameters: analysis_id and video_url'}, status_code=400)
         
-        # Process asynchronously
-        asyncio.create_task(analyzer.process_analysis(analysis_id, video_url, prompt))
+        # Process asynchronously on the server's event loop
+        analyzer.submit_analysis(analysis_id, video_url, prompt)
         
-        return jsonify({
+        return JSONResponse({
             'status': 'accepted',
             'analysis_id': analysis_id,
             'message': 'Video analysis started'
-        }), 202
+        }, status_code=202)
         
     except Exception as e:
         logger.error(f"Error in analyze endpoint: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+        return JSONResponse({'error': str(e)}, status_code=500)
 
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 8080))
-    app.run(host='0.0.0.0', port=port)
\ No newline at end of file
+    uvicorn.run(app, host='0.0.0.0', port=port)
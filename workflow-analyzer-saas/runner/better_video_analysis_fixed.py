@@ -6,16 +6,20 @@ Fast slicing with ffmpeg, async uploads, robust retries.
 """
 
 from __future__ import annotations
-import argparse, asyncio, json, logging, os, subprocess, time
+import argparse, asyncio, functools, json, logging, os, random, subprocess, time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List
+from typing import AsyncIterator, List
 
-import cv2
 import dotenv
 import google.generativeai as genai
 import tenacity
+try:
+    import orjson
+except ImportError:            # optional speed‑up, stdlib json otherwise
+    orjson = None
 from rich.console import Console       # pretty progress
 from rich.progress import Progress, TimeElapsedColumn, BarColumn
 
@@ -41,6 +45,15 @@ MODELS = {
                            "Lowest cost & latency, good for quick analysis"),
 }
 
+# Segments analysed at once; Gemini quotas allow far more than a handful
+GEMINI_CONCURRENCY = int(os.getenv("GEMINI_CONCURRENCY", "8"))
+
+# Slices predicted above this size are re‑encoded instead of stream‑copied
+COMPRESS_ABOVE_MB = 80
+
+# Inline request parts are capped at 20 MB; leave headroom for the prompt
+INLINE_MAX_MB = 18
+
 @dataclass
 class Segment:
     idx: int
@@ -51,7 +64,8 @@ class Segment:
 
 # ────────────────────────────── ffmpeg utilities ──────────────────────────────
 def slice_with_ffmpeg(src: Path, start_s: int, end_s: int, compress=False) -> Path:
-    out = src.with_suffix(f".seg{start_s}_{end_s}.mp4")
+    tag = "c" if compress else ""
+    out = src.with_suffix(f".seg{start_s}_{end_s}{tag}.mp4")
     if out.exists():
         return out
     
@@ -62,7 +76,8 @@ def slice_with_ffmpeg(src: Path, start_s: int, end_s: int, compress=False) -> Pa
             "-ss", str(timedelta(seconds=start_s)),
             "-to", str(timedelta(seconds=end_s)),
             "-i", str(src),
-            "-c:v", "libx264", "-preset", "fast", "-crf", "28",  # Compress video
+            "-c:v", "libx264", "-preset", "veryfast", "-crf", "28",  # Compress video
+            "-threads", "0",  # Use every core
             "-c:a", "aac", "-b:a", "128k",  # Compress audio
             "-movflags", "+faststart",  # Optimize for streaming
             str(out),
@@ -81,11 +96,37 @@ def slice_with_ffmpeg(src: Path, start_s: int, end_s: int, compress=False) -> Pa
     subprocess.run(cmd, check=True)
     return out
 
+def probe_duration(src: Path) -> float:
+    """Container duration in seconds, read from the header by ffprobe"""
+    result = subprocess.run(
+        ["ffprobe", "-v", "error",
+         "-show_entries", "format=duration",
+         "-of", "default=nw=1:nk=1", str(src)],
+        capture_output=True, text=True, check=True,
+    )
+    try:
+        return float(result.stdout)
+    except ValueError:
+        # e.g. "N/A" for streams whose container records no duration
+        raise ValueError(f"ffprobe reported no usable duration for {src}: "
+                         f"{result.stdout.strip()!r}") from None
+
+def dumps_line(obj) -> bytes:
+    """One compact JSON document plus newline, for NDJSON output"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(obj).encode() + b"\n"
+
 def get_file_size_mb(path: Path) -> float:
     """Get file size in MB"""
     return path.stat().st_size / (1024 * 1024)
 
 # ───────────────────────────── Gemini helpers ────────────────────────────────
+@functools.lru_cache(maxsize=None)
+def get_model(name: str) -> genai.GenerativeModel:
+    """One shared GenerativeModel per model name"""
+    return genai.GenerativeModel(name)
+
 @tenacity.retry(
     wait=tenacity.wait_random_exponential(multiplier=2, max=30),
     stop=tenacity.stop_after_attempt(5),
@@ -94,26 +135,29 @@ def get_file_size_mb(path: Path) -> float:
 def upload_file(path: Path):
     return genai.upload_file(path=str(path))
 
-async def wait_for_file_active(file_obj, max_wait=300, check_interval=2):
+async def wait_for_file_active(file_obj, max_wait=300):
     """
-    Wait for uploaded file to become active
-    Increased timeout to 300 seconds (5 minutes) for large files
+    Wait for uploaded file to become active, polling with jittered
+    exponential backoff (0.25 s doubling to 5 s) for up to `max_wait` seconds
     """
-    start = time.time()
+    loop = asyncio.get_running_loop()
+    start = time.monotonic()
     file_name = file_obj.name
+    delay = 0.25
+    next_log = 10.0
     
-    while time.time() - start < max_wait:
+    while (elapsed := time.monotonic() - start) < max_wait:
         try:
-            file = genai.get_file(file_name)
+            file = await loop.run_in_executor(None, genai.get_file, file_name)
             if file.state.name == "ACTIVE":
                 return file
             elif file.state.name == "FAILED":
                 raise Exception(f"File upload failed for {file_name}")
             
             # Log progress every 10 seconds
-            elapsed = time.time() - start
-            if elapsed % 10 < check_interval:
+            if elapsed >= next_log:
                 logging.info(f"Waiting for file {file_name} to become active... ({elapsed:.0f}s)")
+                next_log += 10.0
                 
         except Exception as e:
             if "not found" in str(e).lower():
@@ -122,7 +166,8 @@ async def wait_for_file_active(file_obj, max_wait=300, check_interval=2):
             else:
                 raise
                 
-        await asyncio.sleep(check_interval)
+        await asyncio.sleep(delay + random.random() * 0.1 * delay)
+        delay = min(delay * 2, 5.0)
     
     raise Exception(f"File {file_name} did not become active in {max_wait} seconds")
 
@@ -138,40 +183,33 @@ async def generate_content_with_retry(model, file_obj, prompt):
         None, lambda: model.generate_content([file_obj, prompt]).text
     )
 
-async def analyse_segment(model, seg: Segment, prompt: str, compress_large_files=True) -> dict:
+async def analyse_segment(model, seg: Segment, prompt: str) -> dict:
     loop = asyncio.get_running_loop()
     
-    # Check file size and compress if needed
     file_size_mb = get_file_size_mb(seg.path)
     logging.info(f"Segment {seg.idx} file size: {file_size_mb:.1f} MB")
     
-    # If file is larger than 100MB, compress it
-    if compress_large_files and file_size_mb > 100:
-        logging.info(f"Compressing large segment {seg.idx} ({file_size_mb:.1f} MB)...")
-        compressed_path = seg.path.with_suffix('.compressed.mp4')
-        if not compressed_path.exists():
-            compressed_path = await loop.run_in_executor(
-                None, slice_with_ffmpeg, seg.src, seg.start_s, seg.end_s, True
-            )
-        seg.path = compressed_path
-        new_size_mb = get_file_size_mb(seg.path)
-        logging.info(f"Compressed to {new_size_mb:.1f} MB")
-    
-    # Upload file
-    file_obj = await loop.run_in_executor(None, upload_file, seg.path)
-    
-    # Wait for file to become active with extended timeout
-    active_file = await wait_for_file_active(file_obj, max_wait=300)
-    
-    try:
-        # Generate content with retry
-        content = await generate_content_with_retry(model, active_file, prompt)
-    finally:
-        # Clean up
+    # Small segments go inline with the request: no upload, no ACTIVE polling
+    if file_size_mb < INLINE_MAX_MB:
+        data = await loop.run_in_executor(None, seg.path.read_bytes)
+        part = {"mime_type": "video/mp4", "data": data}
+        content = await generate_content_with_retry(model, part, prompt)
+    else:
+        # Upload file
+        file_obj = await loop.run_in_executor(None, upload_file, seg.path)
+        
+        # Wait for file to become active with extended timeout
+        active_file = await wait_for_file_active(file_obj, max_wait=300)
+        
         try:
-            genai.delete_file(active_file.name)
-        except:
-            pass
+            # Generate content with retry
+            content = await generate_content_with_retry(model, active_file, prompt)
+        finally:
+            # Clean up, off the loop other segments (and jobs) share
+            try:
+                await loop.run_in_executor(None, genai.delete_file, active_file.name)
+            except:
+                pass
     
     return {
         "segment": seg.idx,
@@ -181,50 +219,116 @@ async def analyse_segment(model, seg: Segment, prompt: str, compress_large_files
 
 # ─────────────────────────────── Main analyser ────────────────────────────────
 class VideoAnalyser:
-    def __init__(self, model_key: str, segment_len: int, verbose: bool):
+    def __init__(self, model_key: str, segment_len: int, verbose: bool,
+                 concurrency: int = GEMINI_CONCURRENCY, compress: bool = True):
         self.cfg = MODELS[model_key]
         self.segment_len = segment_len * 60          # to seconds
-        self.model = genai.GenerativeModel(self.cfg.name)
+        self.compress = compress                     # re‑encode oversized slices
+        self.concurrency = concurrency               # in‑flight Gemini segments
+        self.model = get_model(self.cfg.name)
         logging.info("Using model %s (%s)", self.cfg.name, self.cfg.description)
 
-    def split(self, video: Path) -> List[Segment]:
-        cap = cv2.VideoCapture(str(video))
-        fps = cap.get(cv2.CAP_PROP_FPS) or 30
-        total_frames = cap.get(cv2.CAP_PROP_FRAME_COUNT)
-        duration_s = int(total_frames / fps)
-        cap.release()
+    async def split(self, video: Path) -> AsyncIterator[Segment]:
+        """Yield segments as soon as their slice is on disk (not in index order)"""
+        loop = asyncio.get_running_loop()
+        duration = await loop.run_in_executor(None, probe_duration, video)
+        duration_s = int(duration)
+        # Average bitrate predicts each copied slice's size, so oversized
+        # slices are encoded once instead of copied and then re‑encoded
+        mb_per_s = video.stat().st_size / 1e6 / max(duration, 1)
 
-        segments: List[Segment] = []
-        for i, start in enumerate(range(0, duration_s, self.segment_len), 1):
-            end = min(start + self.segment_len, duration_s)
-            seg_path = slice_with_ffmpeg(video, start, end)
-            segments.append(Segment(i, video, start, end, seg_path))
-        return segments
+        bounds = [(start, min(start + self.segment_len, duration_s))
+                  for start in range(0, duration_s, self.segment_len)]
 
-    async def run(self, video: Path, prompt: str) -> List[dict]:
-        segments = self.split(video)
-        
+        # Each slice is an independent ffmpeg process; run them side by side
+        ex = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 4))
+
+        async def make_segment(i: int, start: int, end: int) -> Segment:
+            compress = self.compress and mb_per_s * (end - start) > COMPRESS_ABOVE_MB
+            path = await loop.run_in_executor(
+                ex, slice_with_ffmpeg, video, start, end, compress
+            )
+            return Segment(i, video, start, end, path)
+
+        pending = [asyncio.ensure_future(make_segment(i, start, end))
+                   for i, (start, end) in enumerate(bounds, 1)]
+        try:
+            for fut in asyncio.as_completed(pending):
+                yield await fut
+        finally:
+            for task in pending:
+                task.cancel()
+            ex.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, video: Path, prompt: str,
+                  checkpoint: Path | None = None, progress_bar: bool = True) -> List[dict]:
+        """
+        Analyse every segment of `video`. With `checkpoint`, each result is
+        appended there as one NDJSON line the moment it completes.
+        Without `progress_bar` no live display is started, so several videos
+        can be analysed at once in one process.
+        """
         # Process segments with limited concurrency to avoid overwhelming the API
-        max_concurrent = 3  # Limit concurrent uploads
-        semaphore = asyncio.Semaphore(max_concurrent)
+        semaphore = asyncio.Semaphore(self.concurrency)
         
         async def process_with_limit(seg):
             async with semaphore:
                 return await analyse_segment(self.model, seg, prompt)
         
-        tasks = [process_with_limit(s) for s in segments]
+        tasks = []
         results = []
         
         with Progress("[progress.description]{task.description}",
                       BarColumn(),
                       TimeElapsedColumn(),
-                      console=console) as progress:
-            t = progress.add_task(f"Analysing {video.name}", total=len(tasks))
-            for coro in asyncio.as_completed(tasks):
-                results.append(await coro)
-                progress.update(t, advance=1)
+                      console=console,
+                      disable=not progress_bar) as progress:
+            t = progress.add_task(f"Analysing {video.name}", total=None)
+            try:
+                # Segment N is uploaded/analysed while later slices are still cut
+                async for seg in self.split(video):
+                    tasks.append(asyncio.create_task(process_with_limit(seg)))
+                    progress.update(t, total=len(tasks))
+                with open(checkpoint or os.devnull, "ab") as ckpt:
+                    for coro in asyncio.as_completed(tasks):
+                        result = await coro
+                        results.append(result)
+                        ckpt.write(dumps_line(result))
+                        ckpt.flush()
+                        progress.update(t, advance=1)
+            finally:
+                # On cancellation or a failed segment, stop the rest before returning
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
         return results
 
+# ───────────────────────────── Library entrypoint ─────────────────────────────
+async def analyse_video(video: Path, prompt_file: Path, outdir: Path,
+                        model: str = "pro", segment: int = 10, *,
+                        concurrency: int = GEMINI_CONCURRENCY,
+                        compress: bool = True, progress_bar: bool = True) -> dict:
+    """
+    Analyse `video` and write its results JSON into `outdir`, as the CLI does.
+    Lets a long‑running service reuse this process's imports, models and
+    connections instead of spawning the script per video.
+    """
+    analyser = VideoAnalyser(model, segment, verbose=True,
+                             concurrency=concurrency, compress=compress)
+    prompt = prompt_file.read_text()
+    outdir.mkdir(parents=True, exist_ok=True)
+
+    out = outdir / f"{video.stem}__{datetime.now():%Y%m%d%H%M}.json"
+    # Completed segments survive a crash in the .ndjson checkpoint
+    checkpoint = out.with_suffix(".ndjson")
+    results = await analyser.run(video, prompt, checkpoint, progress_bar)
+    if orjson is not None:
+        out.write_bytes(orjson.dumps(results, option=orjson.OPT_INDENT_2))
+    else:
+        out.write_text(json.dumps(results, indent=2))
+    checkpoint.unlink(missing_ok=True)
+    return {"json_path": out, "segments_analyzed": len(results)}
+
 # ──────────────────────────────── CLI entrypoint ─────────────────────────────―
 def cli():
     ap = argparse.ArgumentParser(description="Executive workflow analyser")
@@ -237,23 +341,26 @@ def cli():
     ap.add_argument("-o", "--outdir", type=Path, default=Path("./output"))
     ap.add_argument("--no-compress", action="store_true",
                     help="Disable automatic compression of large segments")
+    ap.add_argument("-c", "--concurrency", type=int, default=GEMINI_CONCURRENCY,
+                    help="segments analysed in parallel (env GEMINI_CONCURRENCY)")
     args = ap.parse_args()
 
     logging.basicConfig(level=logging.INFO,
                         format="%(asctime)s | %(levelname)s | %(message)s")
-    analyser = VideoAnalyser(args.model, args.segment, verbose=True)
-    prompt = args.prompt_file.read_text()
-
-    args.outdir.mkdir(exist_ok=True)
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
 
     for vid in args.videos:
         start = time.time()
-        results = loop.run_until_complete(analyser.run(vid, prompt))
-        out = args.outdir / f"{vid.stem}__{datetime.now():%Y%m%d%H%M}.json"
-        out.write_text(json.dumps(results, indent=2))
-        logging.info("Finished %s in %.1f s ↗ %s", vid.name, time.time()-start, out)
+        result = loop.run_until_complete(analyse_video(
+            vid, args.prompt_file, args.outdir, args.model, args.segment,
+            concurrency=args.concurrency, compress=not args.no_compress,
+        ))
+        logging.info("Finished %s in %.1f s ↗ %s", vid.name, time.time()-start,
+                     result["json_path"])
+        # Machine-readable summary as the last stdout line, for the runner
+        print(json.dumps({"frames_analyzed": result["segments_analyzed"],
+                          "json_path": str(result["json_path"])}), flush=True)
 
 if __name__ == "__main__":
     cli()
\ No newline at end of file
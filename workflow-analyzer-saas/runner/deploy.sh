@@ -87,6 +87,7 @@ SUPABASE_URL=$SUPABASE_URL,\
 SUPABASE_SERVICE_ROLE_KEY=$SUPABASE_SERVICE_ROLE_KEY,\
 GOOGLE_API_KEY=$GOOGLE_API_KEY,\
 WEBHOOK_URL=${NEXT_PUBLIC_APP_URL}/api/webhooks/analysis,\
+WEBHOOK_INCLUDE_PROCESSING=1,\
 POLL_INTERVAL=10,\
 WORKER_ID=cloud-run-$(date +%s)" \
   --service-account "$SERVICE_NAME@$PROJECT_ID.iam.gserviceaccount.com" \
@@ -4,88 +4,202 @@ PDF Report Generator for Workflow Analysis
 Converts JSON analysis results to professional PDF reports
 """
 
+import functools
+import hashlib
 import json
+import multiprocessing
 import os
+import shutil
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
+from heapq import nlargest
+from itertools import islice
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
+from xml.sax.saxutils import escape
 import logging
 
 from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle, StyleSheet1
 from reportlab.lib.units import inch
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from reportlab.platypus import (
-    SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle,
-    PageBreak, Image, KeepTogether
+    BaseDocTemplate, Frame, PageTemplate, Paragraph, Spacer, Table, TableStyle,
+    ListFlowable, ListItem
 )
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
-from reportlab.pdfgen import canvas
+from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
+
+try:
+    import orjson
+except ImportError:            # optional speed‑up, stdlib json otherwise
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
 
+def _loads(data: bytes) -> Any:
+    """Parse JSON bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+@dataclass(slots=True)
+class _SegmentSummary:
+    """The parts of one analysed segment that the report renders."""
+    start: Any
+    end: Any
+    active_windows: List[Any]
+    actions: List[Any]         # display text of the first five actions
+
+
+@dataclass(slots=True)
+class _ReportData:
+    """Everything the report sections need, gathered in one pass over the segments."""
+    segments: List[_SegmentSummary] = field(default_factory=list)
+    total_duration: float = 0
+    total_actions: int = 0
+    pattern_counts: Counter = field(default_factory=Counter)
+    pattern_details: Dict[str, List[Dict[str, Any]]] = field(default_factory=lambda: defaultdict(list))
+    all_automations: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def _create_custom_styles(styles: StyleSheet1):
+    """Create custom paragraph styles for the report."""
+    # Title style
+    styles.add(ParagraphStyle(
+        name='CustomTitle',
+        parent=styles['Title'],
+        fontSize=24,
+        textColor=colors.HexColor('#1F2937'),
+        spaceAfter=30,
+        alignment=TA_CENTER
+    ))
+
+    # Section header style
+    styles.add(ParagraphStyle(
+        name='SectionHeader',
+        parent=styles['Heading1'],
+        fontSize=18,
+        textColor=colors.HexColor('#2563EB'),
+        spaceAfter=12,
+        spaceBefore=20
+    ))
+
+    # Subsection header style
+    styles.add(ParagraphStyle(
+        name='SubsectionHeader',
+        parent=styles['Heading2'],
+        fontSize=14,
+        textColor=colors.HexColor('#374151'),
+        spaceAfter=8,
+        spaceBefore=12
+    ))
+
+    # Body text style
+    styles.add(ParagraphStyle(
+        name='CustomBodyText',
+        parent=styles['BodyText'],
+        fontSize=11,
+        textColor=colors.HexColor('#4B5563'),
+        alignment=TA_JUSTIFY,
+        spaceAfter=8
+    ))
+
+    # Automation table cell style; cells wrap within their column
+    styles.add(ParagraphStyle(
+        name='AutomationCell',
+        parent=styles['BodyText'],
+        fontName='Helvetica',
+        fontSize=10,
+        leading=12,
+        textColor=_C_TEXT
+    ))
+
+    # Highlight box style
+    styles.add(ParagraphStyle(
+        name='HighlightBox',
+        parent=styles['BodyText'],
+        fontSize=11,
+        textColor=colors.HexColor('#1E40AF'),
+        backColor=colors.HexColor('#EFF6FF'),
+        borderColor=colors.HexColor('#3B82F6'),
+        borderWidth=1,
+        borderPadding=10,
+        spaceAfter=12
+    ))
+
+
+@functools.lru_cache(maxsize=1)
+def _get_styles() -> StyleSheet1:
+    """Sample stylesheet plus the report's custom styles, built once per process."""
+    styles = getSampleStyleSheet()
+    _create_custom_styles(styles)
+    return styles
+
+
+# Report palette, parsed once at import
+_C_TEXT = colors.HexColor('#4B5563')
+_C_GRID = colors.HexColor('#E5E7EB')
+_C_HEADER_BG = colors.HexColor('#2563EB')
+_C_ROW_BG = colors.HexColor('#F9FAFB')
+_C_FOOTER = colors.HexColor('#9CA3AF')
+
+# Executive summary metrics: header row plus shaded value rows
+_SUMMARY_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), _C_HEADER_BG),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), _C_ROW_BG),
+    ('GRID', (0, 0), (-1, -1), 1, _C_GRID),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 12),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 12),
+    ('TOPPADDING', (0, 1), (-1, -1), 8),
+    ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
+])
+
+# Automation recommendation rows, shared by every complexity group
+# Cells are Paragraphs in the AutomationCell style, which sets their font and colour
+_AUTO_TABLE_STYLE = TableStyle([
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('LINEBELOW', (0, 0), (-1, -1), 0.5, _C_GRID),
+    ('LEFTPADDING', (0, 0), (-1, -1), 4),
+    ('TOPPADDING', (0, 0), (-1, -1), 4),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+])
+
+# Bucket for automations whose complexity is missing or not one of the three groups
+_DEFAULT_COMPLEXITY = 'medium'
+
+# Fixed A4 layout: one body frame inside 72pt margins on every page
+_MARGIN = 72
+_BODY_FRAME = (_MARGIN, _MARGIN, A4[0] - 2 * _MARGIN, A4[1] - 2 * _MARGIN)
+
+# Footer drawn on every page
+_FOOTER_FONT = ('Helvetica', 9)
+_FOOTER_TEXT = "Workflow Analyzer Pro - Confidential Report"
+_PAGE_LABEL = "Page {}".format
+
+# Rendered PDFs keyed by input hash; bump _REPORT_VERSION whenever the layout changes
+_REPORT_VERSION = "1"
+_PDF_CACHE_DIR = Path(os.getenv("PDF_CACHE_DIR", "/var/tmp/workflow_pdf_cache"))
+_PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", 5 << 30))
+
+
 class WorkflowPDFGenerator:
     """Generates professional PDF reports from workflow analysis results."""
     
     def __init__(self):
-        self.styles = getSampleStyleSheet()
-        self._create_custom_styles()
-        
-    def _create_custom_styles(self):
-        """Create custom paragraph styles for the report."""
-        # Title style
-        self.styles.add(ParagraphStyle(
-            name='CustomTitle',
-            parent=self.styles['Title'],
-            fontSize=24,
-            textColor=colors.HexColor('#1F2937'),
-            spaceAfter=30,
-            alignment=TA_CENTER
-        ))
-        
-        # Section header style
-        self.styles.add(ParagraphStyle(
-            name='SectionHeader',
-            parent=self.styles['Heading1'],
-            fontSize=18,
-            textColor=colors.HexColor('#2563EB'),
-            spaceAfter=12,
-            spaceBefore=20
-        ))
-        
-        # Subsection header style
-        self.styles.add(ParagraphStyle(
-            name='SubsectionHeader',
-            parent=self.styles['Heading2'],
-            fontSize=14,
-            textColor=colors.HexColor('#374151'),
-            spaceAfter=8,
-            spaceBefore=12
-        ))
-        
-        # Body text style
-        self.styles.add(ParagraphStyle(
-            name='CustomBodyText',
-            parent=self.styles['BodyText'],
-            fontSize=11,
-            textColor=colors.HexColor('#4B5563'),
-            alignment=TA_JUSTIFY,
-            spaceAfter=8
-        ))
-        
-        # Highlight box style
-        self.styles.add(ParagraphStyle(
-            name='HighlightBox',
-            parent=self.styles['BodyText'],
-            fontSize=11,
-            textColor=colors.HexColor('#1E40AF'),
-            backColor=colors.HexColor('#EFF6FF'),
-            borderColor=colors.HexColor('#3B82F6'),
-            borderWidth=1,
-            borderPadding=10,
-            spaceAfter=12
-        ))
+        # Shared per process; getSampleStyleSheet and the custom styles are built once
+        self.styles = _get_styles()
     
     def generate_report(self, 
                        analysis_data: Dict[str, Any], 
@@ -95,39 +209,48 @@ class WorkflowPDFGenerator:
         """Generate a PDF report from analysis data."""
         try:
             # Create document
-            doc = SimpleDocTemplate(
+            doc = BaseDocTemplate(
                 str(output_path),
                 pagesize=A4,
-                rightMargin=72,
-                leftMargin=72,
-                topMargin=72,
-                bottomMargin=72
+                rightMargin=_MARGIN,
+                leftMargin=_MARGIN,
+                topMargin=_MARGIN,
+                bottomMargin=_MARGIN,
+                pageCompression=1
             )
+            doc.addPageTemplates([PageTemplate(
+                id='main',
+                frames=[Frame(*_BODY_FRAME, id='body')],
+                onPage=self._add_page_number
+            )])
+            
+            # Walk the segments once; every section reads from the summary
+            report = self._precompute(analysis_data)
+            generated = datetime.now().strftime('%B %d, %Y at %I:%M %p')
             
             # Build story (content)
             story = []
             
             # Add header
-            story.extend(self._create_header(video_filename, company_name))
+            story.extend(self._create_header(video_filename, company_name, generated))
             
             # Add executive summary
-            story.extend(self._create_executive_summary(analysis_data))
+            story.extend(self._create_executive_summary(report))
             
             # Add workflow analysis
-            story.extend(self._create_workflow_analysis(analysis_data))
+            story.extend(self._create_workflow_analysis(report))
             
             # Add automation recommendations
-            story.extend(self._create_automation_recommendations(analysis_data))
+            story.extend(self._create_automation_recommendations(report))
             
             # Add patterns and insights
-            story.extend(self._create_patterns_section(analysis_data))
+            story.extend(self._create_patterns_section(report))
             
             # Add next steps
-            story.extend(self._create_next_steps(analysis_data))
+            story.extend(self._create_next_steps(report))
             
             # Build PDF
-            doc.build(story, onFirstPage=self._add_page_number, 
-                     onLaterPages=self._add_page_number)
+            doc.build(story)
             
             logger.info(f"PDF report generated successfully: {output_path}")
             return output_path
@@ -136,7 +259,51 @@ class WorkflowPDFGenerator:
             logger.error(f"Error generating PDF report: {str(e)}")
             raise
     
-    def _create_header(self, video_filename: str, company_name: str) -> List:
+    def _precompute(self, analysis_data: Dict[str, Any]) -> _ReportData:
+        """Gather the metrics, patterns and automations of every segment in one pass."""
+        report = _ReportData()
+        durations = []
+        action_counts = []
+        
+        for segment in analysis_data.get('segments', []):
+            result = segment.get('result') or {}
+            durations.append(segment.get('duration', 0))
+            
+            actions = result.get('chronological_actions', [])
+            action_counts.append(len(actions))
+            report.segments.append(_SegmentSummary(
+                start=segment.get('start', 0),
+                end=segment.get('end', 0),
+                active_windows=result.get('active_windows_apps', []),
+                actions=[
+                    # str(action) only when needed; it is the slow path for big dicts
+                    (action['description'] if 'description' in action else str(action))
+                    if isinstance(action, dict) else action
+                    for action in actions[:5]  # Limit to top 5
+                ]
+            ))
+            
+            for pattern, details in result.get('patterns', {}).items():
+                report.pattern_counts[pattern] += details.get('frequency', 1)
+                report.pattern_details[pattern].append(details)
+            
+            for automation in result.get('automation_ideas', []):
+                if isinstance(automation, dict):
+                    report.all_automations.append(automation)
+                else:
+                    # Handle string format
+                    report.all_automations.append({
+                        'task': automation,
+                        'complexity': 'Medium',
+                        'tool': 'Custom',
+                        'impact': 'Medium'
+                    })
+        
+        report.total_duration = sum(durations)
+        report.total_actions = sum(action_counts)
+        return report
+    
+    def _create_header(self, video_filename: str, company_name: str, generated: str) -> List:
         """Create report header."""
         story = []
         
@@ -149,7 +316,7 @@ class WorkflowPDFGenerator:
         # Metadata
         story.append(Paragraph(
             f"<b>Video:</b> {video_filename}<br/>"
-            f"<b>Generated:</b> {datetime.now().strftime('%B %d, %Y at %I:%M %p')}<br/>"
+            f"<b>Generated:</b> {generated}<br/>"
             f"<b>Analysis Model:</b> Google Gemini 2.5 Flash",
             self.styles['Normal']
         ))
@@ -158,59 +325,27 @@ class WorkflowPDFGenerator:
         
         return story
     
-    def _create_executive_summary(self, analysis_data: Dict[str, Any]) -> List:
+    def _create_executive_summary(self, report: _ReportData) -> List:
         """Create executive summary section."""
         story = []
         
         story.append(Paragraph("Executive Summary", self.styles['SectionHeader']))
         
-        # Extract key metrics
-        segments = analysis_data.get('segments', [])
-        total_duration = sum(s.get('duration', 0) for s in segments)
-        num_segments = len(segments)
-        
-        # Count actions and patterns
-        total_actions = 0
-        patterns = {}
-        for segment in segments:
-            result = segment.get('result', {})
-            actions = result.get('chronological_actions', [])
-            total_actions += len(actions)
-            
-            # Count patterns
-            segment_patterns = result.get('patterns', {})
-            for pattern, details in segment_patterns.items():
-                if pattern not in patterns:
-                    patterns[pattern] = 0
-                patterns[pattern] += details.get('frequency', 1)
+        patterns = report.pattern_counts
         
         # Create summary data
         summary_data = [
             ['Metric', 'Value'],
-            ['Total Video Duration', f"{total_duration:.1f} minutes"],
-            ['Segments Analyzed', str(num_segments)],
-            ['Total Actions Identified', str(total_actions)],
+            ['Total Video Duration', f"{report.total_duration:.1f} minutes"],
+            ['Segments Analyzed', str(len(report.segments))],
+            ['Total Actions Identified', str(report.total_actions)],
             ['Unique Patterns Found', str(len(patterns))],
-            ['Automation Opportunities', str(self._count_automation_opportunities(analysis_data))],
+            ['Automation Opportunities', str(len(report.all_automations))],
         ]
         
         # Create table
         table = Table(summary_data, colWidths=[3*inch, 2*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2563EB')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#F9FAFB')),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#E5E7EB')),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 12),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 12),
-            ('TOPPADDING', (0, 1), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
-        ]))
+        table.setStyle(_SUMMARY_TABLE_STYLE)
         
         story.append(table)
         story.append(Spacer(1, 0.3 * inch))
@@ -219,191 +354,160 @@ class WorkflowPDFGenerator:
         if patterns:
             story.append(Paragraph("Key Insights", self.styles['SubsectionHeader']))
             
-            top_patterns = sorted(patterns.items(), key=lambda x: x[1], reverse=True)[:3]
-            for pattern, count in top_patterns:
-                story.append(Paragraph(
-                    f"• <b>{pattern}:</b> Occurred {count} times",
-                    self.styles['CustomBodyText']
-                ))
+            top_patterns = nlargest(3, patterns.items(), key=itemgetter(1))
+            story.append(self._bullet_list(
+                f"• <b>{pattern}:</b> Occurred {count} times"
+                for pattern, count in top_patterns
+            ))
         
         story.append(Spacer(1, 0.5 * inch))
         
         return story
     
-    def _create_workflow_analysis(self, analysis_data: Dict[str, Any]) -> List:
+    def _create_workflow_analysis(self, report: _ReportData) -> List:
         """Create detailed workflow analysis section."""
+        if not report.segments:
+            return []
+        
         story = []
         
-        story.append(Paragraph("Detailed Workflow Analysis", self.styles['SectionHeader']))
+        # Resolve styles once rather than per segment
+        subsection = self.styles['SubsectionHeader']
+        normal = self.styles['Normal']
+        bullet_list = self._bullet_list
         
-        segments = analysis_data.get('segments', [])
+        story.append(Paragraph("Detailed Workflow Analysis", self.styles['SectionHeader']))
         
-        for i, segment in enumerate(segments):
-            result = segment.get('result', {})
-            
+        for i, segment in enumerate(report.segments):
             # Segment header
             story.append(Paragraph(
-                f"Segment {i+1}: {segment.get('start', 0)}-{segment.get('end', 0)} seconds",
-                self.styles['SubsectionHeader']
+                f"Segment {i+1}: {segment.start}-{segment.end} seconds",
+                subsection
             ))
             
             # Active windows/apps
-            active_windows = result.get('active_windows_apps', [])
+            active_windows = segment.active_windows
             if active_windows:
-                story.append(Paragraph("<b>Active Applications:</b>", self.styles['Normal']))
-                for window in active_windows[:3]:  # Limit to top 3
-                    story.append(Paragraph(
-                        f"• {window}",
-                        self.styles['CustomBodyText']
-                    ))
+                story.append(Paragraph("<b>Active Applications:</b>", normal))
+                story.append(bullet_list(
+                    f"• {window}" for window in active_windows[:3]  # Limit to top 3
+                ))
             
             # Key actions
-            actions = result.get('chronological_actions', [])
+            actions = segment.actions
             if actions:
-                story.append(Paragraph("<b>Key Actions:</b>", self.styles['Normal']))
-                for action in actions[:5]:  # Limit to top 5
-                    action_text = action
-                    if isinstance(action, dict):
-                        action_text = action.get('description', str(action))
-                    story.append(Paragraph(
-                        f"• {action_text}",
-                        self.styles['CustomBodyText']
-                    ))
+                story.append(Paragraph("<b>Key Actions:</b>", normal))
+                story.append(bullet_list(f"• {action}" for action in actions))
             
             story.append(Spacer(1, 0.2 * inch))
         
         return story
     
-    def _create_automation_recommendations(self, analysis_data: Dict[str, Any]) -> List:
+    def _create_automation_recommendations(self, report: _ReportData) -> List:
         """Create automation recommendations section."""
-        story = []
+        all_automations = report.all_automations
         
-        story.append(Paragraph("Automation Recommendations", self.styles['SectionHeader']))
+        # Group by complexity in one pass
+        buckets = {'quick win': [], 'medium': [], 'complex': []}
+        fallback = buckets[_DEFAULT_COMPLEXITY]
+        for automation in all_automations:
+            buckets.get(automation.get('complexity', '').lower(), fallback).append(automation)
+        quick_wins = buckets['quick win']
+        medium = buckets['medium']
+        complex = buckets['complex']
         
-        # Collect all automation ideas
-        all_automations = []
+        # Nothing to recommend: leave the section out
+        if not (quick_wins or medium or complex):
+            return []
         
-        for segment in analysis_data.get('segments', []):
-            result = segment.get('result', {})
-            automations = result.get('automation_ideas', [])
-            
-            for automation in automations:
-                if isinstance(automation, dict):
-                    all_automations.append(automation)
-                else:
-                    # Handle string format
-                    all_automations.append({
-                        'task': automation,
-                        'complexity': 'Medium',
-                        'tool': 'Custom',
-                        'impact': 'Medium'
-                    })
+        story = []
+        subsection = self.styles['SubsectionHeader']
         
-        # Group by complexity
-        quick_wins = [a for a in all_automations if a.get('complexity', '').lower() == 'quick win']
-        medium = [a for a in all_automations if a.get('complexity', '').lower() == 'medium']
-        complex = [a for a in all_automations if a.get('complexity', '').lower() == 'complex']
+        story.append(Paragraph("Automation Recommendations", self.styles['SectionHeader']))
         
         # Quick Wins
         if quick_wins:
-            story.append(Paragraph("Quick Wins (Implement in 1-2 weeks)", self.styles['SubsectionHeader']))
-            for automation in quick_wins[:3]:
-                story.append(Paragraph(
-                    f"• <b>{automation.get('task', 'Unknown')}:</b> "
-                    f"Use {automation.get('tool', 'TBD')} - "
-                    f"{automation.get('impact', 'Efficiency gain')}",
-                    self.styles['CustomBodyText']
-                ))
+            story.append(Paragraph("Quick Wins (Implement in 1-2 weeks)", subsection))
+            story.append(self._automation_table(quick_wins[:3], 'Efficiency gain'))
         
         # Medium Complexity
         if medium:
-            story.append(Paragraph("Medium Complexity (1-2 months)", self.styles['SubsectionHeader']))
-            for automation in medium[:3]:
-                story.append(Paragraph(
-                    f"• <b>{automation.get('task', 'Unknown')}:</b> "
-                    f"Use {automation.get('tool', 'TBD')} - "
-                    f"{automation.get('impact', 'Process improvement')}",
-                    self.styles['CustomBodyText']
-                ))
+            story.append(Paragraph("Medium Complexity (1-2 months)", subsection))
+            story.append(self._automation_table(medium[:3], 'Process improvement'))
         
         # Complex
         if complex:
-            story.append(Paragraph("Complex Initiatives (3+ months)", self.styles['SubsectionHeader']))
-            for automation in complex[:2]:
-                story.append(Paragraph(
-                    f"• <b>{automation.get('task', 'Unknown')}:</b> "
-                    f"Use {automation.get('tool', 'TBD')} - "
-                    f"{automation.get('impact', 'Strategic transformation')}",
-                    self.styles['CustomBodyText']
-                ))
+            story.append(Paragraph("Complex Initiatives (3+ months)", subsection))
+            story.append(self._automation_table(complex[:2], 'Strategic transformation'))
         
         story.append(Spacer(1, 0.5 * inch))
         
         return story
     
-    def _create_patterns_section(self, analysis_data: Dict[str, Any]) -> List:
+    def _create_patterns_section(self, report: _ReportData) -> List:
         """Create patterns and insights section."""
-        story = []
+        if not report.pattern_details:
+            return []
         
-        story.append(Paragraph("Workflow Patterns & Insights", self.styles['SectionHeader']))
+        story = []
         
-        # Collect all patterns
-        all_patterns = {}
+        # Resolve styles once rather than per pattern
+        normal = self.styles['Normal']
+        body = self.styles['CustomBodyText']
         
-        for segment in analysis_data.get('segments', []):
-            result = segment.get('result', {})
-            patterns = result.get('patterns', {})
-            
-            for pattern_type, details in patterns.items():
-                if pattern_type not in all_patterns:
-                    all_patterns[pattern_type] = []
-                all_patterns[pattern_type].append(details)
+        story.append(Paragraph("Workflow Patterns & Insights", self.styles['SectionHeader']))
         
         # Display patterns
-        for pattern_type, occurrences in all_patterns.items():
+        for pattern_type, occurrences in report.pattern_details.items():
             if occurrences:
-                story.append(Paragraph(f"<b>{pattern_type}:</b>", self.styles['Normal']))
+                story.append(Paragraph(f"<b>{pattern_type}:</b>", normal))
                 
-                # Aggregate frequency
-                total_frequency = sum(o.get('frequency', 1) for o in occurrences)
+                # Aggregated during the pre-pass
+                total_frequency = report.pattern_counts[pattern_type]
                 
-                # Get unique examples
-                examples = []
-                for occ in occurrences:
-                    if 'example' in occ:
-                        examples.append(occ['example'])
+                # First three examples; stop scanning once they are found
+                examples = list(islice(
+                    (occ['example'] for occ in occurrences if 'example' in occ), 3
+                ))
                 
                 story.append(Paragraph(
                     f"Frequency: {total_frequency} occurrences",
-                    self.styles['CustomBodyText']
+                    body
                 ))
                 
                 if examples:
                     story.append(Paragraph(
-                        f"Examples: {', '.join(examples[:3])}",
-                        self.styles['CustomBodyText']
+                        "Examples: " + ", ".join(examples),
+                        body
                     ))
                 
                 story.append(Spacer(1, 0.1 * inch))
         
         return story
     
-    def _create_next_steps(self, analysis_data: Dict[str, Any]) -> List:
+    def _create_next_steps(self, report: _ReportData) -> List:
         """Create next steps section."""
         story = []
         
         story.append(Paragraph("Recommended Next Steps", self.styles['SectionHeader']))
         
         next_steps = [
-            "1. Review and prioritize the Quick Win automation opportunities",
-            "2. Schedule a workflow optimization workshop with your team",
-            "3. Create detailed documentation for the most repetitive tasks",
-            "4. Evaluate automation tools that match your identified needs",
-            "5. Set up metrics to track time saved after implementing automations"
+            "Review and prioritize the Quick Win automation opportunities",
+            "Schedule a workflow optimization workshop with your team",
+            "Create detailed documentation for the most repetitive tasks",
+            "Evaluate automation tools that match your identified needs",
+            "Set up metrics to track time saved after implementing automations"
         ]
         
-        for step in next_steps:
-            story.append(Paragraph(step, self.styles['CustomBodyText']))
+        body = self.styles['CustomBodyText']
+        story.append(ListFlowable(
+            [ListItem(Paragraph(step, body)) for step in next_steps],
+            bulletType='1',
+            bulletFormat='%s.',
+            bulletFontName='Helvetica',
+            bulletFontSize=body.fontSize,
+            bulletColor=body.textColor,
+        ))
         
         # Add a highlight box
         story.append(Spacer(1, 0.3 * inch))
@@ -415,41 +519,138 @@ class WorkflowPDFGenerator:
         
         return story
     
-    def _count_automation_opportunities(self, analysis_data: Dict[str, Any]) -> int:
-        """Count total automation opportunities."""
-        count = 0
-        for segment in analysis_data.get('segments', []):
-            result = segment.get('result', {})
-            automations = result.get('automation_ideas', [])
-            count += len(automations)
-        return count
+    def _automation_table(self, automations: List[Dict[str, Any]], default_impact: str) -> Table:
+        """Lay out automation ideas as task / tool / impact rows of wrapping cells."""
+        cell = self.styles['AutomationCell']
+        rows = [
+            [Paragraph(f"<b>{escape(str(a.get('task', 'Unknown')))}</b>", cell),
+             Paragraph(escape(str(a.get('tool', 'TBD'))), cell),
+             Paragraph(escape(str(a.get('impact', default_impact))), cell)]
+            for a in automations
+        ]
+        table = Table(rows, colWidths=[2.5*inch, 1.3*inch, 2.4*inch], hAlign='LEFT')
+        table.setStyle(_AUTO_TABLE_STYLE)
+        return table
+    
+    def _bullet_list(self, lines) -> Paragraph:
+        """Render bullet lines as one paragraph instead of one flowable per line."""
+        return Paragraph("<br/>".join(lines), self.styles['CustomBodyText'])
     
     def _add_page_number(self, canvas, doc):
         """Add page numbers to the document."""
         canvas.saveState()
-        canvas.setFont('Helvetica', 9)
-        canvas.setFillColor(colors.HexColor('#9CA3AF'))
         
-        # Add page number
-        page_num = canvas.getPageNumber()
-        text = f"Page {page_num}"
-        canvas.drawRightString(doc.width + doc.rightMargin, 0.5 * inch, text)
+        # Footer and page number share one text object, so font and colour are set once
+        text = canvas.beginText(doc.leftMargin, 0.5 * inch)
+        text.setFont(*_FOOTER_FONT)
+        text.setFillColor(_C_FOOTER)
+        text.textOut(_FOOTER_TEXT)
         
-        # Add footer
-        canvas.drawString(doc.leftMargin, 0.5 * inch, 
-                         "Workflow Analyzer Pro - Confidential Report")
+        # Right-align the page number
+        label = _PAGE_LABEL(canvas.getPageNumber())
+        text.setTextOrigin(doc.width + doc.rightMargin - stringWidth(label, *_FOOTER_FONT), 0.5 * inch)
+        text.textOut(label)
         
+        canvas.drawText(text)
         canvas.restoreState()
 
 
+@functools.lru_cache(maxsize=1)
+def _default_generator() -> WorkflowPDFGenerator:
+    """Generator reused by generate_pdf_from_json across calls."""
+    return WorkflowPDFGenerator()
+
+
+def _cache_key(json_bytes: bytes, video_filename: str) -> str:
+    """Hash of everything that shapes the report besides the generation time."""
+    digest = hashlib.blake2b(json_bytes, digest_size=20)
+    digest.update(b"\0" + video_filename.encode() + b"\0" + _REPORT_VERSION.encode())
+    return digest.hexdigest()
+
+
+def _evict_pdf_cache() -> None:
+    """Drop the least recently used cached PDFs once the cache exceeds its size limit."""
+    entries = []
+    for path in _PDF_CACHE_DIR.glob("*.pdf"):
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= _PDF_CACHE_MAX_BYTES:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+
+
 def generate_pdf_from_json(json_path: Path, output_path: Path, 
-                          video_filename: str = "Video Analysis") -> Path:
-    """Convenience function to generate PDF from JSON file."""
-    with open(json_path, 'r') as f:
-        analysis_data = json.load(f)
+                          video_filename: str = "Video Analysis",
+                          use_cache: bool = False) -> Path:
+    """Convenience function to generate PDF from JSON file.
+
+    With use_cache, an unchanged analysis reuses the PDF rendered for it last time,
+    including that render's "Generated:" date, so it is off by default.
+    """
+    return generate_pdf_from_bytes(Path(json_path).read_bytes(), output_path,
+                                   video_filename, use_cache)
+
+
+def generate_pdf_from_bytes(json_bytes: bytes, output_path: Path,
+                            video_filename: str = "Video Analysis",
+                            use_cache: bool = False) -> Path:
+    """Generate a PDF from raw JSON bytes; picklable arguments for a process pool."""
+    if use_cache:
+        cached = _PDF_CACHE_DIR / f"{_cache_key(json_bytes, video_filename)}.pdf"
+        if cached.exists():
+            shutil.copyfile(cached, output_path)
+            os.utime(cached)  # mark as recently used
+            logger.info(f"PDF report served from cache: {output_path}")
+            return output_path
     
-    generator = WorkflowPDFGenerator()
-    return generator.generate_report(analysis_data, output_path, video_filename)
+    analysis_data = _loads(json_bytes)
+    _default_generator().generate_report(analysis_data, output_path, video_filename)
+    
+    if use_cache:
+        try:
+            _PDF_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            partial = cached.with_suffix(f".{os.getpid()}.tmp")
+            shutil.copyfile(output_path, partial)
+            os.replace(partial, cached)
+            _evict_pdf_cache()
+        except OSError as e:
+            logger.warning(f"Could not cache PDF report: {e}")
+    
+    return output_path
+
+
+def _warm_styles() -> None:
+    """Pool initializer: build the stylesheet once in each worker process."""
+    _get_styles()
+
+
+def create_pdf_pool(workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """Process pool whose workers start with the stylesheet already built.
+
+    Workers come from a fork server (spawned where unavailable) rather than a
+    fork of the caller, whose threads may hold locks at the moment of forking.
+    """
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return ProcessPoolExecutor(max_workers=workers, initializer=_warm_styles,
+                               mp_context=multiprocessing.get_context(method))
+
+
+def generate_pdf_batch(jobs: List[Tuple[Path, Path, str]],
+                       workers: Optional[int] = None) -> List[Path]:
+    """Generate one PDF per (json_path, output_path, video_filename) job across processes.
+
+    ReportLab layout is pure Python and holds the GIL, so separate reports
+    scale with cores only when they run in separate processes.
+    """
+    with create_pdf_pool(workers) as pool:
+        futures = [pool.submit(generate_pdf_from_json, *job) for job in jobs]
+        return [future.result() for future in futures]
 
 
 if __name__ == "__main__":
@@ -5,21 +5,37 @@ Watches Supabase for new jobs and processes them using the video analysis script
 """
 
 import asyncio
+import collections
+import functools
 import json
 import logging
 import os
+import re
+import shutil
 import subprocess
 import sys
 import tempfile
 import time
 import traceback
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any, Set
 
+import aiohttp
 import dotenv
+import httpx
 from supabase import create_client, Client
-from supabase.lib.client_options import ClientOptions
+try:
+    # Current supabase-py: only the sync options accept httpx_client
+    from supabase.lib.client_options import SyncClientOptions as ClientOptions
+except ImportError:            # older supabase-py with a single options class
+    from supabase.lib.client_options import ClientOptions
+try:
+    from supabase import acreate_client
+except ImportError:            # older supabase-py without the async client: poll only
+    acreate_client = None
 from tenacity import (
     retry, 
     stop_after_attempt, 
@@ -29,6 +45,16 @@ from tenacity import (
     after_log
 )
 
+try:
+    import orjson
+except ImportError:            # optional speed‑up, stdlib json otherwise
+    orjson = None
+
+try:
+    from better_video_analysis_fixed import analyse_video
+except ImportError:            # script not importable here: run it as a subprocess
+    analyse_video = None
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -49,76 +75,340 @@ GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
 
 # Service configuration
 POLL_INTERVAL = int(os.getenv('POLL_INTERVAL', '10'))  # seconds
+MAX_CONCURRENT_JOBS = int(os.getenv('MAX_CONCURRENT_JOBS', '2'))  # jobs processed at once
+PREFETCH_JOBS = int(os.getenv('PREFETCH_JOBS', '1'))  # extra jobs downloaded while analysis slots are busy
+REALTIME_POLL_INTERVAL = int(os.getenv('REALTIME_POLL_INTERVAL', '60'))  # safety-net poll while subscribed
+STATUS_FLUSH_INTERVAL = 0.25  # seconds status updates are gathered into one bulk write
+STATUS_BATCH_MAX = 50
+TERMINAL_STATUSES = frozenset({'completed', 'failed'})  # written without waiting for the batch
+IO_THREADS = 32  # blocking supabase-py and file calls run on this many threads
+PDF_WORKERS = int(os.getenv('PDF_WORKERS', str(min(MAX_CONCURRENT_JOBS, os.cpu_count() or 1))))  # report render processes
+SUPABASE_MAX_CONNECTIONS = 64  # pooled connections the supabase client may hold
+WEBHOOK_INCLUDE_PROCESSING = os.getenv('WEBHOOK_INCLUDE_PROCESSING', '0') == '1'  # also notify on job start
+DOWNLOAD_PART_SIZE = 16 << 20  # bytes fetched per ranged GET
+DOWNLOAD_PARALLEL = 8  # ranged GETs in flight per download
+DOWNLOAD_CHUNK = 1 << 20  # bytes buffered before each write to disk
+STORAGE_HEADERS = {
+    'Authorization': f'Bearer {SUPABASE_SERVICE_ROLE_KEY}',
+    'apikey': SUPABASE_SERVICE_ROLE_KEY or '',
+}
 WORKER_ID = os.getenv('WORKER_ID', f'worker-{os.getpid()}')
 ANALYSIS_SCRIPT_PATH = Path('/app/better_video_analysis_fixed.py')
+ANALYSIS_IN_PROCESS = os.getenv('ANALYSIS_IN_PROCESS', '1') != '0'  # 0: spawn the script per job
+ANALYSIS_TIMEOUT = 3600  # seconds
+SHM_MIN_FREE = 2 << 30  # /dev/shm is only used for job files when it has this much room
+STDOUT_TAIL_BYTES = 2 * 1024  # script output kept for the log
+STDERR_TAIL_BYTES = 8 * 1024  # script errors kept for classification
+
+
+def _default_temp_root() -> Optional[str]:
+    """RAM-backed /dev/shm when it is roomy enough (Cloud Run), else the system temp dir."""
+    try:
+        if shutil.disk_usage('/dev/shm').free >= SHM_MIN_FREE:
+            return '/dev/shm'
+    except OSError:
+        pass
+    return None
+
 
-# Initialize Supabase client with service role key
-options = ClientOptions(auto_refresh_token=False)
+# Job files live in memory on tmpfs; TEMP_ROOT picks another directory, e.g. on
+# instances where MAX_CONCURRENT_JOBS videos would not fit in RAM
+TEMP_ROOT = os.getenv('TEMP_ROOT') or _default_temp_root()
+
+# Initialize Supabase client with service role key, over one warm connection
+# pool sized for IO_THREADS concurrent storage and database calls
+supabase_http = httpx.Client(
+    limits=httpx.Limits(max_connections=SUPABASE_MAX_CONNECTIONS,
+                        max_keepalive_connections=IO_THREADS),
+    timeout=httpx.Timeout(60.0, connect=5.0)
+)
+try:
+    options = ClientOptions(auto_refresh_token=False, httpx_client=supabase_http)
+except TypeError:              # supabase-py without httpx_client: default per-client pools
+    logger.warning("supabase-py does not accept httpx_client; using its default connection pools")
+    options = ClientOptions(auto_refresh_token=False)
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY, options)
 
 
+# Error categories in priority order; the earliest category whose keyword
+# appears anywhere in the message wins, as with the chained `in` checks
+_ERROR_CATEGORIES = (
+    ('quota_exceeded', 'quota|rate limit'),
+    ('api_key_invalid', 'api key|authentication'),
+    ('storage_error', 'storage|bucket'),
+    ('timeout', 'timeout'),
+    ('network_error', 'network|connection'),
+    ('resource_error', 'memory|resource'),
+    ('video_processing_error', 'ffmpeg|video'),
+)
+_CATEGORY_RE = re.compile('|'.join(f'(?P<{name}>{words})' for name, words in _ERROR_CATEGORIES),
+                          re.IGNORECASE)
+_CATEGORY_RANK = {name: rank for rank, (name, _) in enumerate(_ERROR_CATEGORIES)}
+
+_sec_cache = [None, '']  # last whole second and its formatted prefix
+
+
+def _now_iso() -> str:
+    """Current UTC time in the same form as datetime.utcnow().isoformat()."""
+    s, ns = divmod(time.time_ns(), 1_000_000_000)
+    if s != _sec_cache[0]:
+        _sec_cache[:] = s, datetime.fromtimestamp(s, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S')
+    return f"{_sec_cache[1]}.{ns // 1000:06d}"
+
+
+def _short_trace(error: BaseException, limit: int = 1000) -> str:
+    """First `limit` characters of the formatted traceback, formatting no further."""
+    parts = []
+    size = 0
+    # Source lines are looked up lazily, only for the frames actually formatted
+    trace = traceback.TracebackException.from_exception(error, lookup_lines=False)
+    for part in trace.format():
+        parts.append(part)
+        size += len(part)
+        if size >= limit:
+            break
+    return ''.join(parts)[:limit]
+
+
+def _loads(data: bytes) -> Any:
+    """Parse JSON bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dumps(obj: Any) -> bytes:
+    """Serialize a request body to JSON bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
+
+
+def _parse_summary(stdout: bytes) -> Dict[str, Any]:
+    """Parse the analysis script's final JSON summary line, or {} if it printed none."""
+    for line in reversed(stdout.splitlines()):
+        line = line.strip()
+        if line:
+            try:
+                summary = _loads(line)
+            except ValueError:
+                return {}
+            return summary if isinstance(summary, dict) else {}
+    return {}
+
+
+async def _read_tail(stream: asyncio.StreamReader, limit: int) -> bytes:
+    """Read a stream to EOF, keeping only its last `limit` bytes."""
+    tail = collections.deque()
+    size = 0
+    while chunk := await stream.read(64 * 1024):
+        tail.append(chunk)
+        size += len(chunk)
+        # Drop whole chunks that fall entirely before the window
+        while size - len(tail[0]) >= limit:
+            size -= len(tail.popleft())
+    return b''.join(tail)[-limit:]
+
+
 class JobProcessor:
     """Processes video analysis jobs from Supabase."""
     
     def __init__(self):
         self.running = True
-        self.current_job_id = None
+        self.current_job_ids: Set[str] = set()
+        self._in_flight: Set[asyncio.Task] = set()
+        self._analysis_slots = asyncio.Semaphore(MAX_CONCURRENT_JOBS)
+        self._wake = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._realtime = None
+        self._realtime_ok = False
+        self._status_queue: asyncio.Queue = asyncio.Queue()
+        self._status_flusher: Optional[asyncio.Task] = None
+        self._io_pool = ThreadPoolExecutor(max_workers=IO_THREADS, thread_name_prefix='io')
+        self._pdf_pool = None
+        self._http: Optional[aiohttp.ClientSession] = None
+        self._background: Set[asyncio.Task] = set()
+        self._last_webhook: Dict[str, asyncio.Task] = {}
         
     async def run(self):
         """Main runner loop."""
-        logger.info(f"Starting runner service (Worker ID: {WORKER_ID})")
+        logger.info(f"Starting runner service (Worker ID: {WORKER_ID}, "
+                    f"up to {MAX_CONCURRENT_JOBS} concurrent jobs, {PREFETCH_JOBS} prefetched)")
+        
+        # Jobs beyond the analysis slots download their inputs ahead of time,
+        # so job N's upload and job N+1's download overlap with analysis
+        max_in_flight = MAX_CONCURRENT_JOBS + PREFETCH_JOBS
+        
+        self._loop = asyncio.get_running_loop()
+        await self._subscribe_new_jobs()
         
         while self.running:
             try:
-                # Get next pending job
-                job = await self._get_next_job()
+                # Claim as many jobs as there are free slots
+                free_slots = max_in_flight - len(self._in_flight)
+                jobs = await self._get_next_jobs(free_slots) if free_slots > 0 else []
+                
+                for job in jobs:
+                    task = asyncio.create_task(self._process_job(job))
+                    self._in_flight.add(task)
+                    task.add_done_callback(self._in_flight.discard)
+                
+                # A backlog keeps draining back-to-back while slots are free
+                if jobs and len(self._in_flight) < max_in_flight:
+                    continue
                 
-                if job:
-                    await self._process_job(job)
-                else:
-                    # No jobs available, wait before polling again
-                    await asyncio.sleep(POLL_INTERVAL)
+                # Queue empty or all slots busy: wait for a slot, a new job or the next poll
+                await self._wait_for_work()
                     
             except Exception as e:
                 logger.error(f"Error in main loop: {str(e)}")
                 logger.error(traceback.format_exc())
                 await asyncio.sleep(POLL_INTERVAL)
+        
+        # Let jobs already claimed by this worker finish
+        if self._in_flight:
+            logger.info(f"Waiting for {len(self._in_flight)} in-flight job(s) to finish")
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+        
+        # Deliver webhooks still in flight before the session closes
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+        
+        if self._status_flusher is not None:
+            self._status_flusher.cancel()
+        self._io_pool.shutdown(wait=False)
+        if self._pdf_pool is not None:
+            self._pdf_pool.shutdown(wait=False)
+        if self._http is not None:
+            await self._http.close()
+        
+        if self._realtime is not None:
+            try:
+                await self._realtime.remove_all_channels()
+            except Exception as e:
+                logger.warning(f"Error closing realtime channel: {str(e)}")
     
-    async def _get_next_job(self) -> Optional[Dict[str, Any]]:
-        """Get the next pending job from the queue."""
+    async def _subscribe_new_jobs(self):
+        """Subscribe to job inserts so the runner wakes as soon as a job is queued."""
+        if acreate_client is None:
+            logger.info(f"Realtime client unavailable, polling every {POLL_INTERVAL}s")
+            return
+        
         try:
-            # Atomic update to claim a job
-            response = supabase.rpc('claim_next_job', {
-                'worker_id': WORKER_ID
-            }).execute()
+            self._realtime = await acreate_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+            channel = self._realtime.channel('jobs-new')
+            channel.on_postgres_changes(
+                'INSERT',
+                schema='public',
+                table='jobs',
+                filter='status=eq.pending',
+                callback=self._on_new_job
+            )
+            await channel.subscribe(self._on_realtime_status)
+        except Exception as e:
+            logger.warning(f"Realtime subscription failed, polling every {POLL_INTERVAL}s: {str(e)}")
+    
+    def _on_realtime_status(self, status, err=None):
+        """Track the subscription; polling falls back to POLL_INTERVAL while it is down."""
+        self._realtime_ok = getattr(status, 'value', status) == 'SUBSCRIBED'
+        if self._realtime_ok:
+            logger.info("Subscribed to new jobs via realtime")
+        else:
+            logger.warning(f"Realtime channel {status}, polling every {POLL_INTERVAL}s: {err}")
+    
+    def _on_new_job(self, payload):
+        """Realtime callback for a newly inserted pending job."""
+        self._notify()
+    
+    def _notify(self):
+        """Wake the main loop; safe to call from any thread."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+    
+    async def _wait_for_work(self):
+        """Sleep until a job finishes, a new job is announced or the poll interval passes."""
+        timeout = REALTIME_POLL_INTERVAL if self._realtime_ok else POLL_INTERVAL
+        wake = asyncio.create_task(self._wake.wait())
+        try:
+            await asyncio.wait({wake, *self._in_flight}, timeout=timeout,
+                               return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            wake.cancel()
+        self._wake.clear()
+    
+    async def _blocking(self, fn, *args, **kwargs):
+        """Run a blocking call on the I/O pool so other jobs keep progressing."""
+        return await asyncio.get_running_loop().run_in_executor(
+            self._io_pool, functools.partial(fn, *args, **kwargs)
+        )
+    
+    def _get_http(self) -> aiohttp.ClientSession:
+        """Shared HTTP session, so storage and webhook connections stay warm across jobs."""
+        if self._http is None or self._http.closed:
+            self._http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=64, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=60)
+            )
+        return self._http
+    
+    def _spawn(self, coro):
+        """Run coro without blocking the caller; run() waits for it before shutting down."""
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+    
+    def _queue_webhook(self, job_id: str, status: str, metadata: Dict[str, Any]):
+        """Send a job's webhook in the background, after any earlier one for the same job."""
+        previous = self._last_webhook.get(job_id)
+        
+        async def send():
+            if previous is not None:
+                await asyncio.wait({previous})
+            await self._send_webhook_notification(job_id, status, metadata)
+        
+        task = self._spawn(send())
+        self._last_webhook[job_id] = task
+        
+        def forget(done: asyncio.Task):
+            if self._last_webhook.get(job_id) is done:
+                del self._last_webhook[job_id]
+        task.add_done_callback(forget)
+    
+    async def _get_next_jobs(self, max_jobs: int) -> List[Dict[str, Any]]:
+        """Claim up to max_jobs pending jobs from the queue."""
+        try:
+            # Atomic update to claim the jobs
+            response = await self._blocking(supabase.rpc('claim_next_jobs', {
+                'worker_id': WORKER_ID,
+                'max_jobs': max_jobs
+            }).execute)
             
-            if response.data and len(response.data) > 0:
-                job = response.data[0]
+            jobs = response.data or []
+            for job in jobs:
                 logger.info(f"Claimed job {job['id']} for user {job['user_id']}")
-                return job
-            
-            return None
+            return jobs
             
         except Exception as e:
-            logger.error(f"Error getting next job: {str(e)}")
-            return None
+            logger.error(f"Error getting next jobs: {str(e)}")
+            return []
     
     async def _process_job(self, job: Dict[str, Any]):
         """Process a single job."""
         job_id = job['id']
-        self.current_job_id = job_id
+        self.current_job_ids.add(job_id)
         
         try:
             logger.info(f"Starting processing job {job_id}")
             
             # Update job status to processing
             await self._update_job_status(job_id, 'processing', {
-                'started_at': datetime.utcnow().isoformat(),
+                'started_at': _now_iso(),
                 'worker_id': WORKER_ID
             })
             
             # Create temp directory for this job
-            with tempfile.TemporaryDirectory() as temp_dir:
+            with tempfile.TemporaryDirectory(dir=TEMP_ROOT) as temp_dir:
                 temp_path = Path(temp_dir)
                 
                 # Download video from storage
@@ -131,35 +421,45 @@ class JobProcessor:
                 output_dir = temp_path / 'output'
                 output_dir.mkdir(exist_ok=True)
                 
-                analysis_result = await self._run_analysis(
-                    video_path, 
-                    prompt_path, 
-                    output_dir,
-                    job.get('model', 'pro'),
-                    job.get('segment_length', 10)
-                )
+                # Prefetched jobs wait here, inputs ready, for an analysis slot
+                async with self._analysis_slots:
+                    analysis_result = await self._run_analysis(
+                        video_path, 
+                        prompt_path, 
+                        output_dir,
+                        job.get('model', 'pro'),
+                        job.get('segment_length', 10)
+                    )
+                
+                # Read and parse the output once; the bytes are uploaded
+                # as-is and the parsed data feeds the frame count and PDF
+                json_file = analysis_result['json_file']
+                json_data = await self._blocking(json_file.read_bytes)
+                try:
+                    analysis_data = _loads(json_data)
+                except ValueError as e:
+                    raise ValueError(f"Invalid JSON in output file: {str(e)}")
                 
                 # Upload results
-                result_urls = await self._upload_results(job, output_dir)
+                result_urls = await self._upload_results(job, output_dir, json_data)
                 
-                # Extract frame count from analysis results
-                frames_analyzed = 0
-                try:
-                    json_files = list(output_dir.glob('*.json'))
-                    if json_files:
-                        with open(json_files[0], 'r') as f:
-                            analysis_data = json.load(f)
-                            # Count frames from segments
-                            if 'segments' in analysis_data:
-                                frames_analyzed = len(analysis_data['segments'])
-                            elif 'frames_analyzed' in analysis_data:
-                                frames_analyzed = analysis_data['frames_analyzed']
-                except Exception as e:
-                    logger.warning(f"Could not extract frame count: {str(e)}")
+                # Frame count as reported by the analyzer
+                frames_analyzed = analysis_result.get('frames_analyzed')
+                if frames_analyzed is None:
+                    # No summary from the script: extract it from the results
+                    frames_analyzed = 0
+                    try:
+                        # Count frames from segments
+                        if 'segments' in analysis_data:
+                            frames_analyzed = len(analysis_data['segments'])
+                        elif 'frames_analyzed' in analysis_data:
+                            frames_analyzed = analysis_data['frames_analyzed']
+                    except Exception as e:
+                        logger.warning(f"Could not extract frame count: {str(e)}")
                 
                 # Update job as completed
                 await self._update_job_status(job_id, 'completed', {
-                    'completed_at': datetime.utcnow().isoformat(),
+                    'completed_at': _now_iso(),
                     'result_json_url': result_urls.get('json'),
                     'result_pdf_url': result_urls.get('pdf'),
                     'processing_time': analysis_result.get('processing_time'),
@@ -177,10 +477,10 @@ class JobProcessor:
             
             # Update job as failed with categorized error
             await self._update_job_status(job_id, 'failed', {
-                'failed_at': datetime.utcnow().isoformat(),
+                'failed_at': _now_iso(),
                 'error': str(e),
                 'error_category': error_category,
-                'error_trace': traceback.format_exc()[:1000]  # Limit trace length
+                'error_trace': _short_trace(e)  # Limit trace length
             })
             
             # For critical errors, send alert
@@ -188,7 +488,7 @@ class JobProcessor:
                 await self._send_critical_error_alert(job_id, error_category, str(e))
         
         finally:
-            self.current_job_id = None
+            self.current_job_ids.discard(job_id)
     
     @retry(
         stop=stop_after_attempt(3),
@@ -205,44 +505,125 @@ class JobProcessor:
             
             # Extract bucket and path from URL
             # Format: https://[project].supabase.co/storage/v1/object/public/[bucket]/[path]
-            url_parts = video_url.split('/storage/v1/object/public/')
-            if len(url_parts) != 2:
+            _, sep, bucket_and_path = video_url.partition('/storage/v1/object/public/')
+            if not sep or sep in bucket_and_path:
                 raise ValueError(f"Invalid video URL format: {video_url}")
             
-            bucket_and_path = url_parts[1]
-            bucket = bucket_and_path.split('/')[0]
-            file_path = '/'.join(bucket_and_path.split('/')[1:])
+            bucket, _, file_path = bucket_and_path.partition('/')
             
             logger.info(f"Downloading video from bucket '{bucket}', path '{file_path}'")
             
-            # Download file with timeout
+            video_path = temp_path / video_filename
+            
+            # Parallel byte-range GETs written straight to their file offsets
+            object_url = f"{SUPABASE_URL}/storage/v1/object/{bucket}/{file_path}"
             try:
-                video_data = supabase.storage.from_(bucket).download(file_path)
-            except Exception as e:
-                # Wrap common network errors for retry
-                if "timeout" in str(e).lower() or "connection" in str(e).lower():
-                    raise ConnectionError(f"Network error downloading video: {str(e)}")
-                raise
+                size = await self._download_ranged(object_url, video_path)
+                if size is None:
+                    # Storage did not offer ranges; stream it in a single GET
+                    size = await self._download_stream(object_url, video_path)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # Wrap network errors for retry
+                raise ConnectionError(f"Network error downloading video: {str(e)}")
             
             # Validate download
-            if not video_data or len(video_data) == 0:
+            if size == 0:
                 raise ValueError("Downloaded video is empty")
             
-            # Save to temp directory
-            video_path = temp_path / video_filename
-            video_path.write_bytes(video_data)
-            
             # Verify file was written correctly
-            if not video_path.exists() or video_path.stat().st_size == 0:
+            if not video_path.exists() or video_path.stat().st_size != size:
                 raise IOError(f"Failed to write video file to {video_path}")
             
-            logger.info(f"Downloaded video to {video_path} ({len(video_data)} bytes)")
+            logger.info(f"Downloaded video to {video_path} ({size} bytes)")
             return video_path
             
         except Exception as e:
             logger.error(f"Error downloading video: {str(e)}")
             raise
     
+    async def _download_ranged(self, url: str, dest: Path) -> Optional[int]:
+        """Download url into dest in parallel parts; None if the server cannot serve ranges."""
+        async with self._get_http().head(url, headers=STORAGE_HEADERS) as response:
+            if response.status != 200:
+                return None
+            size = response.content_length
+            ranged = response.headers.get('Accept-Ranges', '').lower() == 'bytes'
+        
+        if not size or not ranged:
+            return None
+        
+        semaphore = asyncio.Semaphore(DOWNLOAD_PARALLEL)
+        
+        async def fetch(start: int):
+            async with semaphore:
+                end = min(start + DOWNLOAD_PART_SIZE, size) - 1
+                await self._download_part(url, fd, start, end)
+        
+        fd = os.open(dest, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.ftruncate(fd, size)
+            # Every part settles before the descriptor is closed
+            results = await asyncio.gather(
+                *(fetch(start) for start in range(0, size, DOWNLOAD_PART_SIZE)),
+                return_exceptions=True
+            )
+        finally:
+            os.close(fd)
+        
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return size
+    
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=1, max=8),
+        retry=retry_if_exception_type((aiohttp.ClientError, asyncio.TimeoutError)),
+        before=before_log(logger, logging.DEBUG),
+        after=after_log(logger, logging.INFO),
+        reraise=True  # _download_video maps the last error to ConnectionError
+    )
+    async def _download_part(self, url: str, fd: int, start: int, end: int):
+        """Fetch bytes start..end (inclusive) of url and write them at the same file offset."""
+        headers = {**STORAGE_HEADERS, 'Range': f'bytes={start}-{end}'}
+        async with self._get_http().get(url, headers=headers) as response:
+            if response.status != 206:
+                raise aiohttp.ClientResponseError(
+                    response.request_info, response.history,
+                    status=response.status, message="Range request not honoured"
+                )
+            # Written as it arrives; a part never sits in memory whole
+            offset = start
+            async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK):
+                await self._blocking(os.pwrite, fd, chunk, offset)
+                offset += len(chunk)
+        
+        if offset != end + 1:
+            raise aiohttp.ClientPayloadError(f"Short read for bytes {start}-{end}: got {offset - start}")
+    
+    async def _download_stream(self, url: str, dest: Path) -> int:
+        """Stream url into dest chunk by chunk and return the number of bytes written."""
+        async with self._get_http().get(url, headers=STORAGE_HEADERS) as response:
+            if 400 <= response.status < 500:
+                # Missing object or bad credentials; retrying will not help
+                raise ValueError(f"Storage returned {response.status} for {url}")
+            response.raise_for_status()
+            expected = response.content_length
+            
+            written = 0
+            f = await self._blocking(open, dest, 'wb')
+            try:
+                async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK):
+                    await self._blocking(f.write, chunk)
+                    written += len(chunk)
+            finally:
+                await self._blocking(f.close)
+        
+        # Checked against the header instead of buffering the body to compare
+        if expected is not None and written != expected:
+            raise aiohttp.ClientPayloadError(f"Truncated download: {written} of {expected} bytes")
+        return written
+    
     async def _download_prompt(self, job: Dict[str, Any], temp_path: Path) -> Path:
         """Download or create prompt file."""
         try:
@@ -278,80 +659,131 @@ Please be specific and detailed in your analysis."""
     )
     async def _run_analysis(self, video_path: Path, prompt_path: Path, 
                           output_dir: Path, model: str, segment_length: int) -> Dict[str, Any]:
-        """Run the video analysis script with retry and timeout handling."""
+        """Run the video analysis with retry and timeout handling."""
         try:
             start_time = time.time()
             
-            # Prepare command
-            cmd = [
-                'python3',
-                str(ANALYSIS_SCRIPT_PATH),
-                str(video_path),
-                '-m', model,
-                '-s', str(segment_length),
-                '--prompt_file', str(prompt_path),
-                '-o', str(output_dir)
-            ]
-            
-            logger.info(f"Running analysis command: {' '.join(cmd)}")
-            
-            # Run analysis script with timeout (1 hour max)
-            try:
-                process = await asyncio.create_subprocess_exec(
-                    *cmd,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                    env={**os.environ, 'GOOGLE_API_KEY': GOOGLE_API_KEY}
-                )
-                
-                # Wait for completion with timeout
-                stdout, stderr = await asyncio.wait_for(
-                    process.communicate(),
-                    timeout=3600  # 1 hour timeout
-                )
-                
-            except asyncio.TimeoutError:
-                logger.error("Analysis script timed out after 1 hour")
-                if process:
-                    process.kill()
-                    await process.wait()
-                raise asyncio.TimeoutError("Analysis exceeded 1 hour time limit")
-            
-            # Check return code
-            if process.returncode != 0:
-                error_msg = stderr.decode()
-                
-                # Check for specific error types
-                if "quota" in error_msg.lower() or "rate limit" in error_msg.lower():
-                    # API quota errors should retry with backoff
-                    raise RuntimeError(f"API quota/rate limit error: {error_msg}")
-                elif "gemini" in error_msg.lower() and "api" in error_msg.lower():
-                    # Gemini API errors might be transient
-                    raise RuntimeError(f"Gemini API error (retrying): {error_msg}")
-                else:
-                    # Other errors shouldn't retry
-                    raise ValueError(f"Analysis script failed: {error_msg}")
+            if ANALYSIS_IN_PROCESS and analyse_video is not None:
+                result = await self._analyse_in_process(video_path, prompt_path, output_dir,
+                                                        model, segment_length)
+                summary = {'frames_analyzed': result['segments_analyzed'],
+                           'json_path': result['json_path']}
+                stdout = stderr = b''
+            else:
+                stdout, stderr = await self._analyse_subprocess(video_path, prompt_path, output_dir,
+                                                                model, segment_length)
+                summary = _parse_summary(stdout)
             
             processing_time = time.time() - start_time
             
-            # Verify output was created
-            json_files = list(output_dir.glob('*.json'))
-            if not json_files:
+            # Verify output was created, at the path the analyzer reported
+            # when it did, so the results are never searched for again
+            if summary.get('json_path'):
+                json_file = output_dir / Path(summary['json_path']).name
+            else:
+                json_file = next(output_dir.glob('*.json'), None)
+            if json_file is None or not json_file.is_file():
                 raise ValueError("Analysis completed but no output JSON was generated")
             
             logger.info(f"Analysis completed in {processing_time:.2f} seconds")
-            logger.info(f"Script output: {stdout.decode()[:500]}...")  # Log first 500 chars
+            if stdout:
+                logger.info(f"Script output (tail): ...{stdout.decode(errors='replace')}")
             
             return {
                 'processing_time': processing_time,
-                'stdout': stdout.decode(),
-                'stderr': stderr.decode()
+                'frames_analyzed': summary.get('frames_analyzed'),
+                'json_file': json_file,
+                'stdout': stdout.decode(errors='replace'),
+                'stderr': stderr.decode(errors='replace')
             }
             
         except Exception as e:
             logger.error(f"Error running analysis: {str(e)}")
             raise
     
+    async def _analyse_in_process(self, video_path: Path, prompt_path: Path,
+                                  output_dir: Path, model: str, segment_length: int):
+        """Run the analysis on this event loop, reusing warm imports, models and connections;
+        returns analyse_video's result."""
+        logger.info(f"Running analysis in-process: {video_path.name} (model {model}, "
+                    f"{segment_length} min segments)")
+        
+        try:
+            # The timeout cancels run(), which cancels and awaits its segment tasks
+            return await asyncio.wait_for(
+                # rich allows one live display per process; concurrent jobs run without
+                analyse_video(video_path, prompt_path, output_dir, model, segment_length,
+                              progress_bar=False),
+                timeout=ANALYSIS_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            logger.error("Analysis timed out after 1 hour")
+            raise asyncio.TimeoutError("Analysis exceeded 1 hour time limit")
+        except Exception as e:
+            raise self._analysis_error(str(e)) from e
+    
+    async def _analyse_subprocess(self, video_path: Path, prompt_path: Path,
+                                  output_dir: Path, model: str, segment_length: int):
+        """Run the analysis script as a child process; returns the tails of its stdout and stderr."""
+        # Prepare command
+        cmd = [
+            'python3',
+            str(ANALYSIS_SCRIPT_PATH),
+            str(video_path),
+            '-m', model,
+            '-s', str(segment_length),
+            '--prompt_file', str(prompt_path),
+            '-o', str(output_dir)
+        ]
+        
+        logger.info(f"Running analysis command: {' '.join(cmd)}")
+        
+        # Run analysis script with timeout (1 hour max)
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                env={**os.environ, 'GOOGLE_API_KEY': GOOGLE_API_KEY}
+            )
+            
+            # Drain both pipes as the script runs, keeping only their tails,
+            # and wait for completion with timeout
+            stdout, stderr, _ = await asyncio.wait_for(
+                asyncio.gather(
+                    _read_tail(process.stdout, STDOUT_TAIL_BYTES),
+                    _read_tail(process.stderr, STDERR_TAIL_BYTES),
+                    process.wait()
+                ),
+                timeout=ANALYSIS_TIMEOUT
+            )
+            
+        except asyncio.TimeoutError:
+            logger.error("Analysis script timed out after 1 hour")
+            if process:
+                process.kill()
+                await process.wait()
+            raise asyncio.TimeoutError("Analysis exceeded 1 hour time limit")
+        
+        # Check return code
+        if process.returncode != 0:
+            raise self._analysis_error(stderr.decode(errors='replace'))
+        
+        return stdout, stderr
+    
+    def _analysis_error(self, error_msg: str) -> Exception:
+        """Map an analysis failure to RuntimeError (retried) or ValueError (not retried)."""
+        # Check for specific error types
+        if "quota" in error_msg.lower() or "rate limit" in error_msg.lower():
+            # API quota errors should retry with backoff
+            return RuntimeError(f"API quota/rate limit error: {error_msg}")
+        elif "gemini" in error_msg.lower() and "api" in error_msg.lower():
+            # Gemini API errors might be transient
+            return RuntimeError(f"Gemini API error (retrying): {error_msg}")
+        else:
+            # Other errors shouldn't retry
+            return ValueError(f"Analysis script failed: {error_msg}")
+    
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=4, max=10),
@@ -359,66 +791,50 @@ Please be specific and detailed in your analysis."""
         before=before_log(logger, logging.INFO),
         after=after_log(logger, logging.INFO)
     )
-    async def _upload_results(self, job: Dict[str, Any], output_dir: Path) -> Dict[str, str]:
-        """Upload analysis results to Supabase storage with retry logic."""
+    async def _upload_results(self, job: Dict[str, Any], output_dir: Path,
+                              json_data: bytes) -> Dict[str, str]:
+        """Upload already-validated analysis results to Supabase storage with retry logic."""
         try:
             result_urls = {}
             user_id = job['user_id']
             job_id = job['id']
             
-            # Find the JSON output file
-            json_files = list(output_dir.glob('*.json'))
-            if not json_files:
-                raise FileNotFoundError("No JSON output file found")
-            
-            json_file = json_files[0]
-            
             # Upload JSON file with retry-friendly error handling
             json_path = f"{user_id}/{job_id}/analysis_result.json"
             try:
-                with open(json_file, 'rb') as f:
-                    json_data = f.read()
-                    
-                # Validate JSON before upload
-                json.loads(json_data.decode('utf-8'))
-                
-                # Upload with error wrapping
-                try:
-                    supabase.storage.from_('results').upload(
-                        json_path,
-                        json_data,
-                        file_options={"content-type": "application/json"}
-                    )
-                except Exception as e:
-                    if "timeout" in str(e).lower() or "connection" in str(e).lower():
-                        raise ConnectionError(f"Network error uploading JSON: {str(e)}")
-                    raise
-                    
-            except json.JSONDecodeError as e:
-                raise ValueError(f"Invalid JSON in output file: {str(e)}")
+                await self._blocking(
+                    supabase.storage.from_('results').upload,
+                    json_path,
+                    json_data,
+                    file_options={"content-type": "application/json"}
+                )
+            except Exception as e:
+                if "timeout" in str(e).lower() or "connection" in str(e).lower():
+                    raise ConnectionError(f"Network error uploading JSON: {str(e)}")
+                raise
             
             result_urls['json'] = f"{SUPABASE_URL}/storage/v1/object/public/results/{json_path}"
             logger.info(f"Uploaded JSON results to {json_path}")
             
             # Generate and upload PDF report
-            pdf_path = await self._generate_pdf_report(job, json_file, output_dir)
+            pdf_path = await self._generate_pdf_report(job, json_data, output_dir)
             if pdf_path and pdf_path.exists():
                 pdf_storage_path = f"{user_id}/{job_id}/analysis_report.pdf"
                 try:
-                    with open(pdf_path, 'rb') as f:
-                        pdf_data = f.read()
-                        
                     # Validate PDF has content
-                    if len(pdf_data) == 0:
+                    if pdf_path.stat().st_size == 0:
                         raise ValueError("Generated PDF is empty")
                     
-                    # Upload with error wrapping
+                    # Upload with error wrapping; the open file is streamed
+                    # by the HTTP client rather than read into memory first
                     try:
-                        supabase.storage.from_('results').upload(
-                            pdf_storage_path,
-                            pdf_data,
-                            file_options={"content-type": "application/pdf"}
-                        )
+                        with pdf_path.open('rb') as pdf_file:
+                            await self._blocking(
+                                supabase.storage.from_('results').upload,
+                                pdf_storage_path,
+                                pdf_file,
+                                file_options={"content-type": "application/pdf"}
+                            )
                     except Exception as e:
                         if "timeout" in str(e).lower() or "connection" in str(e).lower():
                             raise ConnectionError(f"Network error uploading PDF: {str(e)}")
@@ -437,28 +853,28 @@ Please be specific and detailed in your analysis."""
             logger.error(f"Error uploading results: {str(e)}")
             raise
     
-    async def _generate_pdf_report(self, job: Dict[str, Any], json_file: Path, 
+    async def _generate_pdf_report(self, job: Dict[str, Any], json_data: bytes, 
                                   output_dir: Path) -> Optional[Path]:
-        """Generate PDF report from JSON analysis results."""
+        """Generate PDF report from the analysis JSON in a worker process."""
         try:
             # Import our enhanced PDF generator
-            from pdf_generator import WorkflowPDFGenerator
+            from pdf_generator import create_pdf_pool, generate_pdf_from_bytes
             
-            # Load analysis results
-            with open(json_file, 'r') as f:
-                results = json.load(f)
+            # ReportLab layout holds the GIL for the whole render; a worker
+            # process keeps it off the event loop and other jobs' threads
+            if self._pdf_pool is None:
+                self._pdf_pool = create_pdf_pool(PDF_WORKERS)
             
-            # Create PDF using our enhanced generator
             pdf_path = output_dir / 'analysis_report.pdf'
-            generator = WorkflowPDFGenerator()
-            
             video_filename = job.get('video_filename', 'Video Analysis')
-            generator.generate_report(
-                analysis_data=results,
-                output_path=pdf_path,
-                video_filename=video_filename,
-                company_name="Workflow Analyzer Pro"
-            )
+            try:
+                await asyncio.get_running_loop().run_in_executor(
+                    self._pdf_pool, generate_pdf_from_bytes, json_data, pdf_path, video_filename
+                )
+            except BrokenProcessPool:
+                # A crashed worker breaks the pool; start a fresh one next time
+                self._pdf_pool = None
+                raise
             
             logger.info(f"Generated PDF report at {pdf_path}")
             return pdf_path
@@ -473,21 +889,60 @@ Please be specific and detailed in your analysis."""
         try:
             update_data = {
                 'status': status,
-                'updated_at': datetime.utcnow().isoformat(),
+                'updated_at': _now_iso(),
                 **metadata
             }
             
-            response = supabase.table('jobs').update(update_data).eq('id', job_id).execute()
+            # Queued for the next bulk write; wait until it has been applied
+            if self._status_flusher is None or self._status_flusher.done():
+                self._status_flusher = asyncio.create_task(self._flush_status_updates())
+            written = asyncio.get_running_loop().create_future()
+            await self._status_queue.put((job_id, update_data, written))
+            await written
             
             logger.info(f"Updated job {job_id} status to {status}")
             
-            # Send webhook notification to Next.js app
-            await self._send_webhook_notification(job_id, status, metadata)
+            # Notify the Next.js app in the background; by default only the
+            # terminal states, which are all most consumers act on
+            if status in TERMINAL_STATUSES or WEBHOOK_INCLUDE_PROCESSING:
+                self._queue_webhook(job_id, status, metadata)
             
         except Exception as e:
             logger.error(f"Error updating job status: {str(e)}")
             raise
     
+    async def _flush_status_updates(self):
+        """Apply queued status updates with one bulk_update_jobs RPC per batch."""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = [await self._status_queue.get()]
+            deadline = loop.time() + STATUS_FLUSH_INTERVAL
+            
+            # Gather more updates until the window closes, the batch is full
+            # or a job reaches a terminal state
+            while (len(batch) < STATUS_BATCH_MAX
+                   and batch[-1][1]['status'] not in TERMINAL_STATUSES):
+                try:
+                    item = await asyncio.wait_for(self._status_queue.get(),
+                                                  deadline - loop.time())
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+            
+            # Updates for one job stay in the order they were made
+            updates = [{'id': job_id, 'data': data} for job_id, data, _ in batch]
+            try:
+                await self._blocking(supabase.rpc('bulk_update_jobs', {'updates': updates}).execute)
+            except Exception as e:
+                for _, _, written in batch:
+                    if not written.done():
+                        written.set_exception(e)
+            else:
+                for _, _, written in batch:
+                    if not written.done():
+                        written.set_result(None)
+    
     async def _send_webhook_notification(self, job_id: str, status: str, metadata: Dict[str, Any]):
         """Send webhook notification to the Next.js application."""
         try:
@@ -501,7 +956,7 @@ Please be specific and detailed in your analysis."""
                 'analysis_id': job_id,
                 'status': status,
                 'frames_analyzed': metadata.get('frames_analyzed', 0),
-                'timestamp': datetime.utcnow().isoformat()
+                'timestamp': _now_iso()
             }
             
             # Add result data for completed jobs
@@ -514,28 +969,26 @@ Please be specific and detailed in your analysis."""
             elif status == 'failed':
                 payload['error'] = metadata.get('error', 'Unknown error')
             
-            # Send webhook with timeout
-            import aiohttp
-            async with aiohttp.ClientSession() as session:
-                try:
-                    async with session.post(
-                        webhook_url, 
-                        json=payload,
-                        headers={
-                            'Content-Type': 'application/json',
-                            'X-Webhook-Source': 'cloud-run-runner'
-                        },
-                        timeout=aiohttp.ClientTimeout(total=10)
-                    ) as response:
-                        if response.status == 200:
-                            logger.info(f"Successfully sent webhook for job {job_id}")
-                        else:
-                            logger.warning(f"Webhook returned status {response.status}: {await response.text()}")
-                except asyncio.TimeoutError:
-                    logger.warning("Webhook notification timed out")
-                except Exception as e:
-                    logger.warning(f"Failed to send webhook: {str(e)}")
-                    # Don't fail the job update if webhook fails
+            # Send webhook with timeout over the shared session
+            try:
+                async with self._get_http().post(
+                    webhook_url, 
+                    data=_dumps(payload),
+                    headers={
+                        'Content-Type': 'application/json',
+                        'X-Webhook-Source': 'cloud-run-runner'
+                    },
+                    timeout=aiohttp.ClientTimeout(total=10)
+                ) as response:
+                    if response.status == 200:
+                        logger.info(f"Successfully sent webhook for job {job_id}")
+                    else:
+                        logger.warning(f"Webhook returned status {response.status}: {await response.text()}")
+            except asyncio.TimeoutError:
+                logger.warning("Webhook notification timed out")
+            except Exception as e:
+                logger.warning(f"Failed to send webhook: {str(e)}")
+                # Don't fail the job update if webhook fails
                     
         except Exception as e:
             logger.error(f"Error in webhook notification: {str(e)}")
@@ -543,24 +996,14 @@ Please be specific and detailed in your analysis."""
     
     def _categorize_error(self, error: Exception) -> str:
         """Categorize error for better handling and alerting."""
-        error_msg = str(error).lower()
-        
-        if "quota" in error_msg or "rate limit" in error_msg:
-            return "quota_exceeded"
-        elif "api key" in error_msg or "authentication" in error_msg:
-            return "api_key_invalid"
-        elif "storage" in error_msg or "bucket" in error_msg:
-            return "storage_error"
-        elif "timeout" in error_msg:
-            return "timeout"
-        elif "network" in error_msg or "connection" in error_msg:
-            return "network_error"
-        elif "memory" in error_msg or "resource" in error_msg:
-            return "resource_error"
-        elif "ffmpeg" in error_msg or "video" in error_msg:
-            return "video_processing_error"
-        else:
-            return "unknown_error"
+        # One case-insensitive scan; a later, higher-priority keyword still wins
+        category = None
+        for match in _CATEGORY_RE.finditer(str(error)):
+            if category is None or _CATEGORY_RANK[match.lastgroup] < _CATEGORY_RANK[category]:
+                category = match.lastgroup
+                if _CATEGORY_RANK[category] == 0:
+                    break
+        return category or "unknown_error"
     
     async def _send_critical_error_alert(self, job_id: str, error_category: str, error_message: str):
         """Send alert for critical errors that need immediate attention."""
@@ -572,7 +1015,7 @@ CRITICAL ERROR ALERT
 Job ID: {job_id}
 Category: {error_category}
 Worker: {WORKER_ID}
-Time: {datetime.utcnow().isoformat()}
+Time: {_now_iso()}
 
 Error Message:
 {error_message}
@@ -587,26 +1030,26 @@ Action Required:
             # If webhook URL is configured, send alert there too
             webhook_url = os.getenv('WEBHOOK_URL')
             if webhook_url:
-                import aiohttp
-                async with aiohttp.ClientSession() as session:
-                    try:
-                        alert_payload = {
-                            'type': 'critical_error',
-                            'job_id': job_id,
-                            'error_category': error_category,
-                            'error_message': error_message,
-                            'worker_id': WORKER_ID,
-                            'timestamp': datetime.utcnow().isoformat()
-                        }
-                        
-                        await session.post(
-                            webhook_url.replace('/analysis', '/alerts'),  # Use alerts endpoint
-                            json=alert_payload,
-                            headers={'Content-Type': 'application/json'},
-                            timeout=aiohttp.ClientTimeout(total=5)
-                        )
-                    except Exception as e:
-                        logger.error(f"Failed to send critical error alert: {str(e)}")
+                try:
+                    alert_payload = {
+                        'type': 'critical_error',
+                        'job_id': job_id,
+                        'error_category': error_category,
+                        'error_message': error_message,
+                        'worker_id': WORKER_ID,
+                        'timestamp': _now_iso()
+                    }
+                    
+                    # Exiting the context hands the connection back to the pool
+                    async with self._get_http().post(
+                        webhook_url.replace('/analysis', '/alerts'),  # Use alerts endpoint
+                        data=_dumps(alert_payload),
+                        headers={'Content-Type': 'application/json'},
+                        timeout=aiohttp.ClientTimeout(total=5)
+                    ):
+                        pass
+                except Exception as e:
+                    logger.error(f"Failed to send critical error alert: {str(e)}")
                         
         except Exception as e:
             logger.error(f"Error in critical error alert: {str(e)}")
@@ -615,6 +1058,7 @@ Action Required:
         """Stop the runner service."""
         logger.info("Stopping runner service...")
         self.running = False
+        self._notify()
 
 
 async def health_check_handler():
@@ -626,7 +1070,7 @@ async def health_check_handler():
             'status': 'healthy',
             'service': 'workflow-analyzer-runner',
             'worker_id': WORKER_ID,
-            'timestamp': datetime.utcnow().isoformat()
+            'timestamp': _now_iso()
         })
     
     app = web.Application()
@@ -52,6 +52,62 @@ $$;
 -- Grant execute permission to service role
 GRANT EXECUTE ON FUNCTION claim_next_job(TEXT) TO service_role;
 
+-- Function to atomically claim up to max_jobs pending jobs in one round trip
+-- Lets a worker fill all of its free job slots without one RPC per job
+
+CREATE OR REPLACE FUNCTION claim_next_jobs(worker_id TEXT, max_jobs INTEGER DEFAULT 1)
+RETURNS TABLE (
+    id UUID,
+    user_id UUID,
+    video_url TEXT,
+    video_filename TEXT,
+    prompt_text TEXT,
+    model TEXT,
+    segment_length INTEGER,
+    status TEXT,
+    created_at TIMESTAMPTZ,
+    updated_at TIMESTAMPTZ
+) 
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    RETURN QUERY
+    UPDATE jobs
+    SET 
+        status = 'processing',
+        updated_at = NOW(),
+        metadata = jsonb_set(
+            COALESCE(metadata, '{}'::jsonb),
+            '{worker_id}',
+            to_jsonb(claim_next_jobs.worker_id)
+        )
+    -- Qualified throughout: the RETURNS TABLE columns are PL/pgSQL variables
+    -- named id, status, created_at, ... and would make bare names ambiguous
+    WHERE jobs.id IN (
+        SELECT j.id 
+        FROM jobs j 
+        WHERE j.status = 'pending'
+        ORDER BY j.created_at ASC
+        LIMIT claim_next_jobs.max_jobs
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING 
+        jobs.id,
+        jobs.user_id,
+        jobs.video_url,
+        jobs.video_filename,
+        jobs.prompt_text,
+        jobs.model,
+        jobs.segment_length,
+        jobs.status,
+        jobs.created_at,
+        jobs.updated_at;
+END;
+$$;
+
+-- Grant execute permission to service role
+GRANT EXECUTE ON FUNCTION claim_next_jobs(TEXT, INTEGER) TO service_role;
+
 -- Optional: Function to reset stuck jobs
 CREATE OR REPLACE FUNCTION reset_stuck_jobs(timeout_minutes INTEGER DEFAULT 30)
 RETURNS INTEGER
@@ -79,4 +135,44 @@ END;
 $$;
 
 -- Grant execute permission to service role
-GRANT EXECUTE ON FUNCTION reset_stuck_jobs(INTEGER) TO service_role;
\ No newline at end of file
+GRANT EXECUTE ON FUNCTION reset_stuck_jobs(INTEGER) TO service_role;
+
+-- Function to apply a batch of job updates in one round trip
+-- updates: [{"id": "<job uuid>", "data": {"status": "...", ...}}, ...]
+-- Only the keys present in each "data" object are written, in array order
+
+CREATE OR REPLACE FUNCTION bulk_update_jobs(updates JSONB)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    item JSONB;
+    set_clause TEXT;
+    affected_rows INTEGER := 0;
+BEGIN
+    FOR item IN SELECT * FROM jsonb_array_elements(updates)
+    LOOP
+        SELECT string_agg(format('%I = r.%I', key, key), ', ')
+        INTO set_clause
+        FROM jsonb_object_keys(item->'data') AS key;
+        
+        CONTINUE WHEN set_clause IS NULL;
+        
+        EXECUTE format(
+            'UPDATE jobs SET %s FROM jsonb_populate_record(NULL::jobs, $1) AS r WHERE jobs.id = $2::uuid',
+            set_clause
+        ) USING item->'data', item->>'id';
+        
+        affected_rows := affected_rows + 1;
+    END LOOP;
+    
+    RETURN affected_rows;
+END;
+$$;
+
+-- Grant execute permission to service role
+GRANT EXECUTE ON FUNCTION bulk_update_jobs(JSONB) TO service_role;
+
+-- Publish job inserts over Realtime so runners wake immediately instead of
+-- waiting for their next poll
+ALTER PUBLICATION supabase_realtime ADD TABLE jobs;